@@ -1,2 +1,14 @@
+from pythia.cleaning.array_elo import *
+from pythia.cleaning.bradley_terry import *
+from pythia.cleaning.classification_cleaner import *
+from pythia.cleaning.comparison_graph import *
 from pythia.cleaning.elo import *
+from pythia.cleaning.evaluation import *
+from pythia.cleaning.glicko import *
+from pythia.cleaning.instrumentation import *
 from pythia.cleaning.midnight_rotation import *
+from pythia.cleaning.player_index import *
+from pythia.cleaning.rankings_io import *
+from pythia.cleaning.rating_history import *
+from pythia.cleaning.scheduler import *
+from pythia.cleaning.sweep import *
@@ -0,0 +1,868 @@
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pythia.cleaning.comparison_graph import ComparisonGraph
+from pythia.cleaning.elo import ELO
+from pythia.cleaning.instrumentation import RunMonitor
+from pythia.cleaning.player_index import PlayerIndex
+from pythia.cleaning.rankings_io import save_rankings
+from pythia.cleaning.rating_history import RatingHistory
+from sunpy.util import SunpyUserWarning
+
+__all__ = ['ArrayELO']
+
+CHECKPOINT_VERSION = 1
+
+# Average number of matches per level from which the levels are rated with NumPy.
+_MIN_LEVEL_WIDTH = 16
+
+
+class ArrayELO(ELO):
+    """
+    ELO rating algorithm for Sunspotter, backed by contiguous NumPy arrays.
+
+    Produces the same rankings as `~pythia.cleaning.ELO`, but keeps the score,
+    k value, count and standard deviation of every player in flat arrays and
+    the last ``score_memory`` scores in a fixed width ring buffer, instead of
+    updating a DataFrame for every match.
+
+    The score board can also be streamed: if it is a path to a CSV file, or an
+    iterator of DataFrame chunks, the ratings are updated as each chunk arrives,
+    so memory is bounded by the number of players rather than the number of matches.
+
+    The rating state can be saved to a checkpoint with `save_checkpoint`, and a
+    later run resumed from it with `from_checkpoint`, so that only new matches
+    have to be rated.
+
+    Matches in different connected components of the `~pythia.cleaning.ComparisonGraph`
+    never share a player, so an in-memory score board can be rated one component
+    per worker process, with the same result as a serial run.
+    """
+
+    def __init__(self, score_board, *, chunksize=100_000, checkpoint=None, skip_processed=True,
+                 record_history=False, **kwargs):
+        """
+        Parameters
+        ----------
+        score_board : pandas.DataFrame, str, pathlib.Path or iterable of pandas.DataFrame
+            DataFrame holding the scores of individual matches, a path to a CSV
+            file holding them, or an iterator over DataFrame chunks of it.
+        chunksize : int, optional
+            Number of matches read at a time when ``score_board`` is a path, by default 100_000
+        checkpoint : str or pathlib.Path, optional
+            Checkpoint written by `save_checkpoint` to restore the rating state from,
+            by default None
+        skip_processed : bool, optional
+            If True, and a checkpoint is given, the score board is taken to be the
+            same archive the checkpoint was made from, with new matches appended,
+            and the matches already processed are skipped. Otherwise the whole
+            score board is rated on top of the checkpoint. By default True
+        record_history : bool, optional
+            If True, every rating update is recorded in the ``history`` attribute,
+            a `~pythia.cleaning.RatingHistory`, by default False
+        **kwargs : dict
+            Keyword arguments passed to `~pythia.cleaning.ELO`.
+        """
+        self.chunksize = chunksize
+        self.streaming = not isinstance(score_board, pd.DataFrame)
+        self.checkpoint = checkpoint
+        self.skip_processed = skip_processed
+        self.record_history = record_history
+        super().__init__(score_board, **kwargs)
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint, score_board, *, skip_processed=True, **kwargs):
+        """
+        Resumes a rating run from a checkpoint, with the configuration it was saved with.
+
+        Parameters
+        ----------
+        checkpoint : str or pathlib.Path
+            Checkpoint written by `save_checkpoint`.
+        score_board : pandas.DataFrame, str, pathlib.Path or iterable of pandas.DataFrame
+            Score board holding the matches to be rated.
+        skip_processed : bool, optional
+            If True, the first ``matches_processed`` matches of the score board
+            are skipped, by default True
+        **kwargs : dict
+            Keyword arguments overriding the saved configuration.
+
+        Returns
+        -------
+        elo : ArrayELO
+            Rating engine holding the restored state.
+        """
+        with np.load(checkpoint, allow_pickle=False) as data:
+            config = json.loads(str(data['config']))
+        config.update(kwargs)
+        return cls(score_board, checkpoint=checkpoint, skip_processed=skip_processed, **config)
+
+    def _check_columns(self, score_board):
+        # Streamed score boards are checked one chunk at a time.
+        if isinstance(score_board, pd.DataFrame):
+            super()._check_columns(score_board)
+
+    def _create_ranking(self):
+        """
+        Prepares the rating state arrays.
+
+        State arrays are allocated with spare capacity, so that players first
+        seen in later chunks can be added without reallocating every time.
+        Only the first ``len(self.index)`` entries are in use.
+        """
+        self.index = PlayerIndex()
+        # The formatted ``last scores`` column of the rankings, None once the ratings change.
+        self._last_scores = None
+        (self.scores, self.k_values, self.counts, self.std_devs,
+         self.memory, self.memory_len, self.memory_pos) = _new_state(
+            0, self.score_memory, self.default_score, self.k_value, self.score_change['max'])
+        self.matches_processed = 0
+
+        if self.checkpoint is not None:
+            self._restore(self.checkpoint)
+        # Number of leading matches of the score board that were already rated.
+        self.start_offset = self.matches_processed if self.skip_processed else 0
+        self.history = (RatingHistory(self.index, default_score=self.default_score)
+                        if self.record_history else None)
+
+        if not self.streaming:
+            unrated = self.score_board.iloc[self.start_offset:]
+            self.player_0, self.player_1, self.outcome = self._encode(unrated)
+
+    def _encode(self, score_board):
+        """
+        Encodes the players and results of a score board, adding any new players to the state.
+        """
+        player_0, player_1 = self.index.encode_pairs(score_board[self.column_map['player 0']],
+                                                     score_board[self.column_map['player 1']])
+        outcome = score_board[self.column_map['score for player 0']].to_numpy(dtype=np.float64)
+        self._last_scores = None
+        self._grow(len(self.index))
+        return player_0, player_1, outcome
+
+    def _grow(self, n_players):
+        """
+        Makes room for ``n_players`` players, initialising the state of new players.
+        """
+        capacity = len(self.scores)
+        if n_players <= capacity:
+            return
+
+        new_state = _new_state(max(n_players, 2 * capacity) - capacity, self.score_memory,
+                               self.default_score, self.k_value, self.score_change['max'])
+        (self.scores, self.k_values, self.counts, self.std_devs,
+         self.memory, self.memory_len, self.memory_pos) = [
+            np.concatenate([array, new]) for array, new in zip(self._state, new_state)]
+
+    @property
+    def _state(self):
+        """
+        The state arrays, in the order expected by the rating kernel.
+        """
+        return [self.scores, self.k_values, self.counts, self.std_devs,
+                self.memory, self.memory_len, self.memory_pos]
+
+    @property
+    def rankings(self):
+        """
+        The rankings as a `pandas.DataFrame`, in the layout used by `~pythia.cleaning.ELO`.
+
+        Formatting the ``last scores`` column takes about a microsecond per score,
+        so it is kept until the ratings change rather than rebuilt on every access.
+        """
+        if self._last_scores is None:
+            history = self.score_history
+            filled = ~np.isnan(history)
+            values = list(map(str, history[filled].tolist()))
+            ends = np.cumsum(filled.sum(axis=1)).tolist()
+            self._last_scores = [",".join(values[start:end])
+                                 for start, end in zip([0] + ends[:-1], ends)]
+            for slot in np.flatnonzero(self.counts[:len(self.index)] == 0).tolist():
+                self._last_scores[slot] = str(self.default_score)
+
+        rankings = self._numeric_rankings()
+        rankings['last scores'] = self._last_scores
+        return rankings
+
+    def _numeric_rankings(self):
+        """
+        The rankings without the ``last scores`` column, which is slow to build for many players.
+        """
+        n_players = len(self.index)
+        player_ids = self.index.ids
+        return pd.DataFrame({'player id': player_ids,
+                             'score': self.scores[:n_players],
+                             'k value': self.k_values[:n_players],
+                             'count': self.counts[:n_players],
+                             'std dev': self.std_devs[:n_players]},
+                            index=player_ids)
+
+    @property
+    def score_history(self):
+        """
+        `numpy.ndarray` of the last ``score_memory`` scores of every player, oldest first,
+        padded with NaN.
+        """
+        n_players = len(self.index)
+        length = self.memory_len[:n_players]
+        positions = np.arange(self.score_memory)
+        ring = ((self.memory_pos[:n_players] - length)[:, None] + positions) % self.score_memory
+        history = np.take_along_axis(self.memory[:n_players], ring, axis=1)
+        history[positions >= length[:, None]] = np.nan
+        return history
+
+    def save_as_npz(self, filename, *, compressed=False):
+        """
+        Saves the rankings and score history to a binary ``.npz`` file,
+        see `~pythia.cleaning.save_rankings`.
+
+        Parameters
+        ----------
+        filename : str or pathlib.Path
+            filename to store the results.
+        compressed : bool, optional
+            If True, the file is compressed, which makes it smaller but slower
+            to load, by default False
+        """
+        save_rankings(filename, self._numeric_rankings(), self.score_history, compressed=compressed)
+
+    def _current_scores(self):
+        return self.scores[:len(self.index)]
+
+    def score_update(self, image_0, image_1, score_for_image_0):
+        """
+        Updates the ratings of the two images based on the complexity classification.
+
+        Parameters
+        ----------
+        image_0 : int
+            Image id for first image
+        image_1 : int
+            Image id for second image
+        score_for_image_0 : int
+            Actual result of classification of the image 0 in a pairwise match.
+            `0` denotes less complex, `1` denotes more complex
+        """
+        slots = self.index.encode([image_0, image_1], add=False)
+        if (slots < 0).any():
+            raise KeyError(f"Unknown image id in match ({image_0}, {image_1})")
+        self._rate(slots[:1], slots[1:], np.array([score_for_image_0], dtype=np.float64))
+
+    def update(self, score_board: pd.DataFrame):
+        """
+        Updates the ratings with the matches of another score board.
+
+        Players that have not been seen before are added to the rankings.
+
+        Parameters
+        ----------
+        score_board : pandas.DataFrame
+            DataFrame holding the scores of individual matches.
+        """
+        super()._check_columns(score_board)
+        self._rate(*self._encode(score_board))
+        self.matches_processed += len(score_board)
+
+    def _rate(self, player_0, player_1, outcome):
+        """
+        Runs the rating kernel over encoded matches, updating the state arrays in place.
+
+        Only the state of players taking part in the matches is handed to the kernel,
+        so that the cost of a call depends on the number of matches, not of players.
+        """
+        if len(player_0) == 0:
+            return
+
+        players, local_0, local_1, state = self._gather(player_0, player_1)
+        records = self._records(np.arange(len(player_0)) + self.matches_processed)
+        _rate_matches(local_0, local_1, outcome, *state,
+                      self.score_change['min'], self.score_change['max'], records)
+        self._scatter(players, state)
+        self._record(players, records)
+
+    def _records(self, match_index):
+        """
+        Returns the lists the kernel records updates in, or None if no history is kept.
+        """
+        if self.history is None:
+            return None
+        return match_index.tolist(), [], [], []
+
+    def _record(self, players, records):
+        """
+        Appends the updates recorded by the kernel to the history, mapping local slots back to
+        players.
+        """
+        if records is not None:
+            _, matches, slots, scores = records
+            self.history.append(np.array(matches, dtype=np.int64),
+                                players[np.array(slots, dtype=np.int64)],
+                                np.array(scores, dtype=np.float32))
+
+    def _gather(self, player_0, player_1):
+        """
+        Returns the players of the matches, the matches renumbered from zero,
+        and the state of the players.
+        """
+        players, local = np.unique(np.concatenate([player_0, player_1]), return_inverse=True)
+        state = [array[players] for array in self._state]
+        return players, local[:len(player_0)], local[len(player_0):], state
+
+    def _scatter(self, players, state):
+        """
+        Writes the state of the players, as returned by `_gather`, back into the state arrays.
+        """
+        for array, new in zip(self._state, state):
+            array[players] = new
+        self._last_scores = None
+
+    def _rate_components(self, player_0, player_1, outcome, n_jobs):
+        """
+        Rates the encoded matches in a process pool, one batch of connected components per task.
+
+        Matches are ordered by component, keeping their order within every component,
+        and cut into batches of about equal size at component boundaries only, so that
+        no player is rated by more than one task.
+        """
+        graph = ComparisonGraph(self.index, player_0, player_1, outcome)
+        components = graph.labels[player_0]
+        order = np.argsort(components, kind='stable')
+        player_0, player_1, outcome = player_0[order], player_1[order], outcome[order]
+
+        bounds = np.r_[0, np.flatnonzero(np.diff(components[order])) + 1, len(order)]
+        targets = np.linspace(0, len(order), min(4 * n_jobs, len(bounds) - 1) + 1)
+        cuts = np.unique(bounds[np.searchsorted(bounds, targets)])
+
+        match_index = order + self.matches_processed
+        players, tasks = [], []
+        for start, end in zip(cuts[:-1], cuts[1:]):
+            batch_players, local_0, local_1, state = self._gather(player_0[start:end],
+                                                                  player_1[start:end])
+            players.append(batch_players)
+            tasks.append((local_0, local_1, outcome[start:end], state,
+                          self.score_change['min'], self.score_change['max'],
+                          self._records(match_index[start:end])))
+
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            for batch_players, (state, records) in zip(players, executor.map(_rate_batch, tasks)):
+                self._scatter(batch_players, state)
+                self._record(batch_players, records)
+
+    def _chunks(self):
+        """
+        Yields the unrated matches of the score board of a streaming run one chunk at a time.
+
+        The rows of a file rated before the checkpoint are skipped without being parsed,
+        so resuming costs time in the number of new matches only.
+        """
+        if isinstance(self.score_board, (str, Path)):
+            yield from pd.read_csv(self.score_board, delimiter=self.delimiter,
+                                   usecols=list(self.column_map.values()),
+                                   skiprows=range(1, self.start_offset + 1),
+                                   chunksize=self.chunksize)
+        else:
+            position = 0
+            for chunk in self.score_board:
+                skip = min(max(self.start_offset - position, 0), len(chunk))
+                position += len(chunk)
+                yield chunk.iloc[skip:]
+
+    def run(self, save_to_disk=True, filename='run_results.csv', n_jobs=1, *, callbacks=None,
+            progress_every=10_000, snapshot_every=None):
+        """
+        Runs the ELO ranking Algorithm for all score_board.
+
+        Parameters
+        ----------
+        save_to_disk : bool, optional
+            If true, saves the rankings in a CSV file on the disk, by default True
+        filename : str, optional
+            filename to store the results, by default 'run_results.csv'
+        n_jobs : int, optional
+            Number of worker processes the connected components of the comparison
+            graph are rated in, by default 1, which rates all matches in the current
+            process. ``None`` uses all CPUs.
+        callbacks : list of callable, optional
+            Functions called with the `~pythia.cleaning.RunReport` of the run every
+            ``progress_every`` matches and at the end of the run, by default None
+        progress_every : int, optional
+            Number of matches between progress callbacks, by default 10_000
+        snapshot_every : int, optional
+            Number of matches between snapshots of the score distribution,
+            by default None, which takes no snapshots
+
+        Returns
+        -------
+        report : pythia.cleaning.RunReport
+            Counters and timings of the run, also kept in the ``report`` attribute.
+
+        Raises
+        ------
+        SunpyUserWarning
+            If ``n_jobs`` is not 1 and the score board is streamed.
+
+        Notes
+        -----
+        Matches are rated, and progress reported, one chunk of ``chunksize`` matches
+        at a time, so callbacks and snapshots fire at chunk boundaries. A parallel
+        run reports its progress once all components are rated.
+        """
+        if n_jobs != 1 and self.streaming:
+            raise SunpyUserWarning("Rating components in parallel needs the score board "
+                                   "to be held in memory.")
+
+        monitor = RunMonitor(callbacks, progress_every, snapshot_every)
+
+        if self.streaming:
+            chunks = iter(self._chunks())
+            while True:
+                with monitor.phase('reading'):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+
+                with monitor.phase('encoding'):
+                    super()._check_columns(chunk)
+                    player_0, player_1, outcome = self._encode(chunk)
+                with monitor.phase('rating'):
+                    self._rate(player_0, player_1, outcome)
+                self.matches_processed += len(chunk)
+                monitor.advance(len(chunk), np.count_nonzero(player_0 == player_1),
+                                self._current_scores)
+        elif n_jobs != 1:
+            with monitor.phase('rating'):
+                self._rate_components(self.player_0, self.player_1, self.outcome,
+                                      n_jobs or os.cpu_count())
+            self.matches_processed += len(self.player_0)
+            monitor.advance(len(self.player_0), np.count_nonzero(self.player_0 == self.player_1),
+                            self._current_scores)
+        else:
+            for start in range(0, len(self.player_0), self.chunksize):
+                player_0 = self.player_0[start:start + self.chunksize]
+                player_1 = self.player_1[start:start + self.chunksize]
+                with monitor.phase('rating'):
+                    self._rate(player_0, player_1, self.outcome[start:start + self.chunksize])
+                self.matches_processed += len(player_0)
+                monitor.advance(len(player_0), np.count_nonzero(player_0 == player_1),
+                                self._current_scores)
+
+        if save_to_disk:
+            with monitor.phase('saving'):
+                self.save_as_csv(filename)
+
+        self.report = monitor.finish()
+        return self.report
+
+    def bootstrap(self, n_samples=100, *, resample=False, confidence=0.95, n_jobs=None,
+                  random_state=None):
+        """
+        Estimates the uncertainty of the rankings by rerating many reorderings of the matches.
+
+        ELO ratings depend on the order in which matches are played. Every bootstrap
+        sample replays the score board, starting from default ratings, in a random
+        order (or on a resample of the matches, drawn with replacement). Samples are
+        spread across a process pool. The encoded match arrays are handed to every
+        worker once, when it starts, rather than with every sample.
+
+        An engine resumed from a checkpoint cannot be bootstrapped: the matches rated
+        before the checkpoint only survive in its ratings, so a replay from default
+        ratings would describe the new matches alone.
+
+        Parameters
+        ----------
+        n_samples : int, optional
+            Number of bootstrap samples, by default 100
+        resample : bool, optional
+            If True, matches are drawn with replacement, otherwise every sample is
+            a permutation of all matches, by default False
+        confidence : float, optional
+            Coverage of the reported percentile intervals, by default 0.95
+        n_jobs : int, optional
+            Number of worker processes, by default None, which uses all CPUs.
+            ``1`` runs all samples in the current process.
+        random_state : int, optional
+            Seed for the match orderings, by default None
+
+        Returns
+        -------
+        bootstrap : pandas.DataFrame
+            Indexed by player id, with the mean, standard deviation and percentile
+            interval of the score, and the mean, standard deviation and percentile
+            interval of the rank of every image over all samples. Rank ``1`` is the
+            most complex image.
+
+        Raises
+        ------
+        SunpyUserWarning
+            If the score board is streamed, as it has to be held in memory, or if the
+            engine was resumed from a checkpoint.
+        """
+        if self.streaming:
+            raise SunpyUserWarning("Bootstrapping needs the score board to be held in memory.")
+        if self.checkpoint is not None:
+            raise SunpyUserWarning("Bootstrapping replays all matches from default ratings, which "
+                                   "an engine resumed from a checkpoint does not hold. Bootstrap "
+                                   "an engine built on the full score board instead.")
+
+        seeds = np.random.SeedSequence(random_state).generate_state(n_samples)
+        config = (len(self.index), self.score_memory, self.default_score, self.k_value,
+                  self.score_change['min'], self.score_change['max'], resample)
+        matches = (self.player_0, self.player_1, self.outcome)
+
+        if n_jobs == 1:
+            _init_bootstrap_worker(matches, config)
+            samples = [_bootstrap_sample(seed) for seed in seeds]
+        else:
+            n_jobs = n_jobs or os.cpu_count()
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_bootstrap_worker,
+                                     initargs=(matches, config)) as executor:
+                chunksize = max(1, n_samples // (4 * n_jobs))
+                samples = list(executor.map(_bootstrap_sample, seeds, chunksize=chunksize))
+        samples = np.vstack(samples)
+
+        # Rank 1 is the highest score in every sample.
+        ranks = np.empty(samples.shape, dtype=np.int64)
+        np.put_along_axis(ranks, np.argsort(-samples, axis=1, kind='stable'),
+                          np.arange(1, samples.shape[1] + 1), axis=1)
+
+        tail = 100 * (1 - confidence) / 2
+        score_interval = np.percentile(samples, [tail, 100 - tail], axis=0)
+        rank_interval = np.percentile(ranks, [tail, 100 - tail], axis=0)
+
+        return pd.DataFrame({'mean score': samples.mean(axis=0),
+                             'std score': samples.std(axis=0),
+                             'lower score': score_interval[0],
+                             'upper score': score_interval[1],
+                             'mean rank': ranks.mean(axis=0),
+                             'std rank': ranks.std(axis=0),
+                             'lower rank': rank_interval[0],
+                             'upper rank': rank_interval[1]},
+                            index=self.index.ids)
+
+    def save_checkpoint(self, filename):
+        """
+        Saves the rating state to a compressed ``.npz`` checkpoint.
+
+        The checkpoint holds the configuration, the player ids, the score, k value,
+        count and standard deviation of every player, the score memory ring buffer
+        and the number of matches processed so far.
+
+        Parameters
+        ----------
+        filename : str or pathlib.Path
+            filename to store the checkpoint.
+        """
+        n_players = len(self.index)
+        player_ids = np.asarray(self.index.ids)
+        if player_ids.dtype == object:
+            player_ids = player_ids.astype(str)
+
+        config = {'k_value': self.k_value,
+                  'default_score': self.default_score,
+                  'max_comparisons': self.max_comparisions,
+                  'max_score_change': self.score_change['max'],
+                  'min_score_change': self.score_change['min'],
+                  'score_memory': self.score_memory,
+                  'delimiter': self.delimiter,
+                  'column_map': self.column_map}
+
+        np.savez_compressed(filename,
+                            version=np.array(CHECKPOINT_VERSION),
+                            config=np.array(json.dumps(config)),
+                            player_ids=player_ids,
+                            scores=self.scores[:n_players],
+                            k_values=self.k_values[:n_players],
+                            counts=self.counts[:n_players],
+                            std_devs=self.std_devs[:n_players],
+                            memory=self.memory[:n_players],
+                            memory_len=self.memory_len[:n_players],
+                            memory_pos=self.memory_pos[:n_players],
+                            matches_processed=np.array(self.matches_processed))
+
+    def _restore(self, checkpoint):
+        """
+        Restores the rating state from a checkpoint written by `save_checkpoint`.
+
+        Raises
+        ------
+        SunpyUserWarning
+            If the checkpoint version is not supported, or its score memory
+            does not match the score memory of this engine.
+        """
+        with np.load(checkpoint, allow_pickle=False) as data:
+            if int(data['version']) != CHECKPOINT_VERSION:
+                raise SunpyUserWarning("Unsupported ELO checkpoint version: "
+                                       f"{int(data['version'])}")
+            if data['memory'].shape[1] != self.score_memory:
+                raise SunpyUserWarning("The score memory of the checkpoint does not match the"
+                                       f" score memory of the engine: {data['memory'].shape[1]}")
+
+            self.index = PlayerIndex(data['player_ids'].tolist())
+            self._last_scores = None
+            self.scores = data['scores']
+            self.k_values = data['k_values']
+            self.counts = data['counts']
+            self.std_devs = data['std_devs']
+            self.memory = data['memory']
+            self.memory_len = data['memory_len']
+            self.memory_pos = data['memory_pos']
+            self.matches_processed = int(data['matches_processed'])
+
+
+def _new_state(n_players, score_memory, default_score, k_value, max_score_change):
+    """
+    Allocates the rating state of ``n_players`` new players, in the order expected by the kernel.
+    """
+    # Ring buffer holding the last `score_memory` scores of every player.
+    memory = np.zeros((n_players, score_memory), dtype=np.float64)
+    memory[:, 0] = default_score
+    return [np.full(n_players, default_score, dtype=np.float64),
+            np.full(n_players, k_value, dtype=np.float64),
+            np.zeros(n_players, dtype=np.int64),
+            np.full(n_players, max_score_change, dtype=np.float64),
+            memory,
+            np.ones(n_players, dtype=np.int64),
+            np.full(n_players, 1 % score_memory, dtype=np.int64)]
+
+
+_bootstrap_matches = None
+_bootstrap_config = None
+
+
+def _init_bootstrap_worker(matches, config):
+    """
+    Stores the encoded matches and configuration of a bootstrap in the worker process.
+    """
+    global _bootstrap_matches, _bootstrap_config
+    _bootstrap_matches = matches
+    _bootstrap_config = config
+
+
+def _bootstrap_sample(seed):
+    """
+    Rates one random ordering of the stored matches, returning the final scores.
+    """
+    player_0, player_1, outcome = _bootstrap_matches
+    (n_players, score_memory, default_score, k_value,
+     min_score_change, max_score_change, resample) = _bootstrap_config
+
+    rng = np.random.default_rng(seed)
+    if resample:
+        order = rng.integers(0, len(player_0), len(player_0))
+    else:
+        order = rng.permutation(len(player_0))
+
+    state = _new_state(n_players, score_memory, default_score, k_value, max_score_change)
+    _rate_matches(player_0[order], player_1[order], outcome[order], *state,
+                  min_score_change, max_score_change)
+    return state[0]
+
+
+def _rate_batch(task):
+    """
+    Rates one batch of components in a worker process, returning the updated state and recorded
+    updates.
+    """
+    player_0, player_1, outcome, state, min_score_change, max_score_change, records = task
+    _rate_matches(player_0, player_1, outcome, *state, min_score_change, max_score_change, records)
+    return state, records
+
+
+def _rate_matches(player_0, player_1, outcome, scores, k_values, counts, std_devs,
+                  memory, memory_len, memory_pos, min_score_change, max_score_change, records=None):
+    """
+    Applies the ELO update for every match, in order. Self matches are skipped.
+
+    Every match is given a level, one above the level of the last earlier match of
+    either of its players. Matches of the same level share no player, so a whole
+    level is rated at once with NumPy, with the same result as rating its matches
+    one by one. If levels hold few matches on average, as with few players, the
+    matches are instead rated one by one with plain scalar arithmetic.
+
+    The standard deviation of the last scores of every player is updated in constant
+    time from a running sum and sum of squares of its ring buffer. The sums are taken
+    relative to the score of the player when the call starts, which keeps the
+    cancellation in the variance small, and are rebuilt from the buffers on every call.
+
+    If ``records`` is given, it holds the match index of every match, followed by
+    three lists to which the match index, player and new score of every update are appended.
+    """
+    score_memory = memory.shape[1]
+    shifts = scores.copy()
+    filled = np.arange(score_memory) < memory_len[:, None]
+    deviations = np.where(filled, memory - shifts[:, None], 0.0)
+    state = [scores, k_values, counts, std_devs, memory, memory_len, memory_pos,
+             shifts, deviations.sum(axis=1), (deviations * deviations).sum(axis=1)]
+
+    rated = np.flatnonzero(player_0 != player_1)
+    levels = _match_levels(player_0[rated], player_1[rated], len(scores))
+    if len(rated) >= _MIN_LEVEL_WIDTH * (levels.max() + 1 if len(levels) else 0):
+        _rate_levels(rated, levels, player_0, player_1, outcome, state,
+                     min_score_change, max_score_change, records)
+    else:
+        _rate_sequential(rated, player_0, player_1, outcome, state,
+                         min_score_change, max_score_change, records)
+
+
+def _match_levels(player_0, player_1, n_players):
+    """
+    Returns the level of every match, one above the level of the last earlier match
+    of either player.
+    """
+    next_level = [0] * n_players
+    levels = []
+    for image_0, image_1 in zip(player_0.tolist(), player_1.tolist()):
+        level = next_level[image_0]
+        if next_level[image_1] > level:
+            level = next_level[image_1]
+        next_level[image_0] = next_level[image_1] = level + 1
+        levels.append(level)
+    return np.array(levels, dtype=np.int64)
+
+
+def _rate_levels(rated, levels, player_0, player_1, outcome, state,
+                 min_score_change, max_score_change, records):
+    """
+    Rates the matches one level at a time, with the arithmetic of `_rate_sequential` on arrays.
+    """
+    (scores, k_values, counts, std_devs, memory, memory_len, memory_pos,
+     shifts, last_sum, last_squares) = state
+    score_memory = memory.shape[1]
+    recorded = []
+
+    order = rated[np.argsort(levels, kind='stable')]
+    bounds = np.flatnonzero(np.diff(np.sort(levels))) + 1
+    for matches in np.split(order, bounds):
+        image_0, image_1, result = player_0[matches], player_1[matches], outcome[matches]
+        # Powers are taken by Python, as NumPy may round them differently.
+        exponents = (scores[image_1] - scores[image_0]) / 400.00
+        power = np.array([10 ** exponent for exponent in exponents.tolist()])
+        expected_0 = 1.0 / (1.0 + power)
+        new_0 = scores[image_0] + k_values[image_0] * (result - expected_0)
+        new_1 = scores[image_1] + k_values[image_1] * ((1 - result) - (1 - expected_0))
+
+        image = np.concatenate([image_0, image_1])
+        new_score = np.concatenate([new_0, new_1])
+        if records is not None:
+            recorded.append((np.concatenate([matches, matches]), np.repeat([0, 1], len(matches)),
+                             image, new_score))
+
+        pos = memory_pos[image]
+        length = memory_len[image]
+        full = length == score_memory
+        evicted = np.where(full, memory[image, pos] - shifts[image], 0.0)
+        length = memory_len[image] = np.where(full, length, length + 1)
+        memory[image, pos] = new_score
+        memory_pos[image] = (pos + 1) % score_memory
+
+        deviation = new_score - shifts[image]
+        total = last_sum[image] = last_sum[image] + (deviation - evicted)
+        squares = last_squares[image] = (last_squares[image] +
+                                         (deviation * deviation - evicted * evicted))
+        mean = total / length
+        variance = squares / length - mean * mean
+        new_std_dev = np.sqrt(np.where(variance > 0, variance, 0.0))
+        new_std_dev = np.where(new_std_dev > 1_000_000, 1_000_000, new_std_dev)  # prevents Infinity
+
+        scores[image] = new_score
+        std_devs[image] = new_std_dev
+        k_values[image] = np.where(new_std_dev < min_score_change, min_score_change,
+                                   np.where(new_std_dev > max_score_change, max_score_change,
+                                            new_std_dev))
+        counts[image] += 1
+
+    if recorded:
+        match_index, record_matches, record_players, record_scores = records
+        positions, sides, players, new_scores = map(np.concatenate, zip(*recorded))
+        # Updates are recorded in match order, the first player of a match first.
+        update_order = np.lexsort((sides, positions))
+        record_matches += np.asarray(match_index)[positions[update_order]].tolist()
+        record_players += players[update_order].tolist()
+        record_scores += new_scores[update_order].tolist()
+
+
+def _rate_sequential(rated, player_0, player_1, outcome, state,
+                     min_score_change, max_score_change, records):
+    """
+    Rates the matches one by one.
+
+    The state arrays are copied into Python lists once, updated with plain scalar
+    arithmetic, and written back at the end, which avoids the cost of indexing
+    NumPy arrays element by element.
+    """
+    (scores, k_values, counts, std_devs, memory, memory_len, memory_pos,
+     shifts, sums, sum_squares) = state
+    if records is not None:
+        match_index, record_matches, record_players, record_scores = records
+    score_memory = memory.shape[1]
+
+    score = scores.tolist()
+    k_value = k_values.tolist()
+    count = counts.tolist()
+    std_dev = std_devs.tolist()
+    # The ring buffers are flattened, as one flat list is much cheaper to build
+    # than a list per player.
+    last_scores = memory.ravel().tolist()
+    last_len = memory_len.tolist()
+    last_pos = memory_pos.tolist()
+    shift = shifts.tolist()
+    last_sum = sums.tolist()
+    last_squares = sum_squares.tolist()
+
+    matches = zip(rated.tolist(), player_0[rated].tolist(), player_1[rated].tolist(),
+                  outcome[rated].tolist())
+    for position, image_0, image_1, result in matches:
+        expected_0 = 1.0 / (1.0 + 10 ** ((score[image_1] - score[image_0]) / 400.00))
+        new_0 = score[image_0] + k_value[image_0] * (result - expected_0)
+        new_1 = score[image_1] + k_value[image_1] * ((1 - result) - (1 - expected_0))
+
+        if records is not None:
+            match = match_index[position]
+            record_matches += (match, match)
+            record_players += (image_0, image_1)
+            record_scores += (new_0, new_1)
+
+        for image, new_score in ((image_0, new_0), (image_1, new_1)):
+            pos = last_pos[image]
+            ring = image * score_memory + pos
+            length = last_len[image]
+            if length < score_memory:
+                length = last_len[image] = length + 1
+                evicted = 0.0
+            else:
+                evicted = last_scores[ring] - shift[image]
+            last_scores[ring] = new_score
+            last_pos[image] = (pos + 1) % score_memory
+
+            deviation = new_score - shift[image]
+            total = last_sum[image] = last_sum[image] + (deviation - evicted)
+            squares = last_squares[image] = (last_squares[image] +
+                                             (deviation * deviation - evicted * evicted))
+            mean = total / length
+            variance = squares / length - mean * mean
+            new_std_dev = math.sqrt(variance) if variance > 0 else 0.0
+            if new_std_dev > 1_000_000:  # prevents Infinity
+                new_std_dev = 1_000_000
+
+            score[image] = new_score
+            std_dev[image] = new_std_dev
+            if new_std_dev < min_score_change:
+                k_value[image] = min_score_change
+            elif new_std_dev > max_score_change:
+                k_value[image] = max_score_change
+            else:
+                k_value[image] = new_std_dev
+            count[image] += 1
+
+    scores[:] = score
+    k_values[:] = k_value
+    counts[:] = count
+    std_devs[:] = std_dev
+    memory[:] = np.reshape(last_scores, memory.shape)
+    memory_len[:] = last_len
+    memory_pos[:] = last_pos
@@ -0,0 +1,292 @@
+import numpy as np
+import pandas as pd
+from pythia.cleaning.comparison_graph import ComparisonGraph
+from pythia.cleaning.elo import _check_column_map
+from scipy import linalg, sparse
+from scipy.sparse.linalg import cg
+from sunpy.util import SunpyUserWarning
+
+__all__ = ['BradleyTerry']
+
+# Largest board whose standard errors are found by inverting the information matrix.
+_max_exact_size = 2048
+# Number of random probes estimating the standard errors of larger boards.
+_n_probes = 64
+
+
+class BradleyTerry:
+    """
+    Bradley-Terry maximum likelihood ranking of Sunspotter images.
+
+    Unlike `~pythia.cleaning.ELO`, all comparisons are used at once, and the
+    result does not depend on the order of the matches. The comparisons are
+    aggregated into a sparse wins matrix, and the log strengths are found with
+    Newton's method on the sparse structure of the compared pairs, or with the
+    minorization-maximization (MM) algorithm of Hunter (2004), every iteration
+    of which is a single vectorized pass over the compared pairs.
+    """
+
+    def __init__(self, score_board: pd.DataFrame, *, method='newton', default_score=1400, prior=1.0,
+                 max_iter=None, tol=1e-6,
+                 column_map={"player 0": "image_id_0",
+                             "player 1": "image_id_1",
+                             "score for player 0": "image0_more_complex_image1"}):
+        """
+        Parameters
+        ----------
+        score_board : pandas.DataFrame
+            DataFrame holding the scores of individual matches.
+        method : str, optional
+            The fitting algorithm, either 'newton' or 'mm', by default 'newton'
+        default_score : int, optional
+            Score of an image of average strength, by default 1400
+        prior : float, optional
+            Number of virtual wins and losses of every image against an image of
+            average strength. Keeps the strengths of images that never won, or
+            never lost, finite, and anchors the average strength. By default 1.0
+        max_iter : int, optional
+            Maximum number of iterations, by default None, which allows 100
+            iterations for 'newton' and 10000 for 'mm'
+        tol : float, optional
+            Convergence tolerance on the change of the log strengths, by default 1e-6
+        column_map : dict, optional
+            Dictionary, for mapping the column names of the score_board dataframe
+            to variable names used in the ranking system.
+            by default {"player 0": "image_id_0",
+                                    "player 1": "image_id_1",
+                                    "score for player 0": "image0_more_complex_image1"}
+
+        Raises
+        ------
+        SunpyUserWarning
+            If unrecognized method is passed.
+        """
+        if method not in ['newton', 'mm']:
+            raise SunpyUserWarning('Incorrect fitting algorithm specified.')
+
+        self.score_board = score_board
+        self.method = method
+        self.default_score = default_score
+        self.prior = prior
+        self.max_iter = max_iter if max_iter is not None else {'newton': 100, 'mm': 10000}[method]
+        self.tol = tol
+        self.column_map = column_map
+
+        _check_column_map(self.score_board, self.column_map)
+        self._create_wins()
+
+    def _create_wins(self):
+        """
+        Aggregates the score board into the sparse wins matrix.
+
+        ``wins[i, j]`` is the number of times image ``i`` was classified as more
+        complex than image ``j``. Self matches are ignored.
+        """
+        self.graph = ComparisonGraph.from_score_board(self.score_board, column_map=self.column_map)
+        self.index = self.graph.index
+        self.wins = self.graph.wins
+
+    def run(self, save_to_disk=True, filename='run_results.csv'):
+        """
+        Fits the Bradley-Terry model to all comparisons of the score board.
+
+        Parameters
+        ----------
+        save_to_disk : bool, optional
+            If true, saves the rankings in a CSV file on the disk, by default True
+        filename : str, optional
+            filename to store the results, by default 'run_results.csv'
+        """
+        # Every compared pair, in both directions, with the number of comparisons.
+        self.comparisons = (self.wins + self.wins.T).tocsr()
+        total_wins = np.asarray(self.wins.sum(axis=1)).ravel()
+
+        fit = {'newton': self._fit_newton, 'mm': self._fit_mm}
+        log_strength = fit[self.method](total_wins)
+
+        elo_scale = 400 / np.log(10)
+        self.scores = self.default_score + elo_scale * log_strength
+        self.std_devs = elo_scale * self._standard_errors(log_strength)
+        self.counts = np.asarray(self.comparisons.sum(axis=1)).ravel()
+
+        if save_to_disk:
+            self.save_as_csv(filename)
+
+    def _pairs(self):
+        """
+        Returns the rows, columns and number of comparisons of all compared pairs.
+        """
+        rows = np.repeat(np.arange(len(self.index)), np.diff(self.comparisons.indptr))
+        return rows, self.comparisons.indices, self.comparisons.data
+
+    def _information(self, log_strength):
+        """
+        Fisher information matrix of the log strengths, as a sparse matrix.
+
+        This is the weighted Laplacian of the comparison graph, plus the
+        contribution of the prior on the diagonal.
+        """
+        rows, cols, n_compared = self._pairs()
+        win_probability = _sigmoid(log_strength[rows] - log_strength[cols])
+        weights = n_compared * win_probability * (1 - win_probability)
+
+        prior_probability = _sigmoid(log_strength)
+        diagonal = np.bincount(rows, weights=weights, minlength=len(self.index))
+        diagonal += 2 * self.prior * prior_probability * (1 - prior_probability)
+
+        off_diagonal = sparse.csr_matrix((-weights, cols, self.comparisons.indptr),
+                                         shape=self.comparisons.shape)
+        return off_diagonal + sparse.diags(diagonal)
+
+    def _standard_errors(self, log_strength):
+        """
+        Standard errors of the log strengths, relative to their mean.
+
+        These are the square roots of the diagonal of the inverse of the information
+        matrix, which, unlike ``1 / sqrt(information[i, i])``, account for the
+        uncertainty of the strengths of the opponents. The common offset of all
+        strengths is projected out: only the prior pins it down, and it does not
+        change the ranking. Without a prior, the mean of every connected component
+        is fixed instead.
+
+        Boards of up to ``_max_exact_size`` images are inverted exactly. For larger
+        boards the diagonal is estimated from ``_n_probes`` random sign vectors
+        (Hutchinson's estimator), every one a conjugate gradient solve.
+        """
+        information = self._information(log_strength)
+        n_players = len(self.index)
+        labels = self.graph.labels
+        sizes = np.bincount(labels)
+
+        def center(x):
+            # Removes the mean of every component without a prior, and the overall mean.
+            if self.prior == 0:
+                x = x - (np.bincount(labels, weights=x, minlength=len(sizes)) / sizes)[labels]
+            return x - x.mean()
+
+        if n_players <= _max_exact_size:
+            gauge = 0
+            if self.prior == 0:
+                gauge = (labels[:, np.newaxis] == labels) / sizes[labels]
+            covariance = linalg.inv(information.toarray() + gauge) - gauge
+            variance = np.diag(covariance) - 2 * covariance.mean(axis=1) + covariance.mean()
+        else:
+            rng = np.random.default_rng(0)
+            # Images compared only with themselves have no information without a prior.
+            diagonal = information.diagonal()
+            preconditioner = sparse.diags(1 / np.where(diagonal > 0, diagonal, 1))
+            variance = np.zeros(n_players)
+            for _ in range(_n_probes):
+                probe = rng.choice([-1.0, 1.0], n_players)
+                solution, _ = cg(information, center(probe), M=preconditioner,
+                                 atol=self.tol * 1e-2)
+                variance += probe * center(solution)
+            variance /= _n_probes
+        return np.sqrt(np.maximum(variance, 0))
+
+    def _fit_newton(self, total_wins):
+        """
+        Maximises the log likelihood with Newton's method.
+
+        Every step solves the sparse information matrix system with
+        Jacobi preconditioned conjugate gradients.
+        """
+        rows, cols, n_compared = self._pairs()
+        log_strength = np.zeros(len(self.index))
+
+        self.converged = False
+        for self.iterations in range(1, self.max_iter + 1):
+            win_probability = _sigmoid(log_strength[rows] - log_strength[cols])
+            expected_wins = np.bincount(rows, weights=n_compared * win_probability,
+                                        minlength=len(self.index))
+            gradient = total_wins - expected_wins
+            gradient += self.prior * (1 - 2 * _sigmoid(log_strength))
+
+            information = self._information(log_strength)
+            preconditioner = sparse.diags(1 / information.diagonal())
+            step, _ = cg(information, gradient, M=preconditioner, atol=self.tol * 1e-2)
+
+            log_strength += step
+            if self.prior == 0:
+                log_strength -= log_strength.mean()
+            if np.abs(step).max(initial=0) < self.tol:
+                self.converged = True
+                break
+
+        return log_strength
+
+    def _fit_mm(self, total_wins):
+        """
+        Maximises the log likelihood with the MM algorithm of Hunter (2004).
+        """
+        rows, cols, n_compared = self._pairs()
+        total_wins = total_wins + self.prior
+        strength = np.ones(len(self.index))
+
+        self.converged = False
+        for self.iterations in range(1, self.max_iter + 1):
+            denominator = np.bincount(rows, weights=n_compared / (strength[rows] + strength[cols]),
+                                      minlength=len(self.index))
+            denominator += 2 * self.prior / (strength + 1)
+            new_strength = total_wins / denominator
+            if self.prior == 0:
+                new_strength /= np.exp(np.log(new_strength).mean())
+
+            change = np.abs(np.log(new_strength) - np.log(strength)).max(initial=0)
+            strength = new_strength
+            if change < self.tol:
+                self.converged = True
+                break
+
+        return np.log(strength)
+
+    @property
+    def rankings(self):
+        """
+        The rankings as a `pandas.DataFrame`, in the layout used by `~pythia.cleaning.ELO`.
+
+        Scores are on the ELO scale, centred on ``default_score``, and ``std dev``
+        holds their standard errors relative to the mean score. As the fit is not
+        sequential, ``k value`` is undefined and ``last scores`` only holds the final score.
+        """
+        player_ids = self.index.ids
+        return pd.DataFrame({'player id': player_ids,
+                             'score': self.scores,
+                             'k value': np.nan,
+                             'count': self.counts,
+                             'std dev': self.std_devs,
+                             'last scores': list(map(str, self.scores))},
+                            index=player_ids)
+
+    def expected_score(self, score_image_0, score_image_1):
+        """
+        Given two AR scores, calculates expected probability of `image_0` being more complex.
+
+        Parameters
+        ----------
+        score_image_0 : float
+            Score for first image
+        score_image_1 : float
+            Score for second image
+
+        Returns
+        -------
+        expected_0_score : float
+            Expected probability of `image_0` being more complex.
+        """
+        return 1.0 / (1.0 + 10 ** ((score_image_1 - score_image_0) / 400.00))
+
+    def save_as_csv(self, filename):
+        """
+        Saves the Ranking DataFrame to the disk as a CSV file.
+
+        Parameters
+        ----------
+        filename : str
+            filename to store the results.
+        """
+        self.rankings.drop(columns=["last scores"]).to_csv(filename)
+
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
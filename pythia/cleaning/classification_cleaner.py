@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+from pythia.cleaning.elo import _check_column_map
+from sunpy.util import SunpyUserWarning
+
+__all__ = ['ClassificationCleaner']
+
+
+class ClassificationCleaner:
+    """
+    Removes self matches, duplicate votes and contradictory repeat votes from Sunspotter
+    classifications.
+
+    Every vote is reduced to a 64 bit hash of the user and the unordered pair of
+    images, and to the image the user chose as more complex. Votes with the same
+    key and the same choice are duplicates, of which only the first is kept. Keys
+    with both choices are contradictory repeat votes, which are handled as set by
+    ``contradictions``. All of this is done with grouped operations over the whole
+    table, or, for files that do not fit in memory, over one chunk at a time in two passes.
+    """
+
+    def __init__(self, *, user_column='user_id', contradictions='drop', delimiter=';',
+                 chunksize=1_000_000,
+                 column_map={"player 0": "image_id_0",
+                             "player 1": "image_id_1",
+                             "score for player 0": "image0_more_complex_image1"}):
+        """
+        Parameters
+        ----------
+        user_column : str, optional
+            Column holding the user that made every classification, by default 'user_id'
+        contradictions : str, optional
+            How contradictory repeat votes of a user are handled: 'drop' removes all
+            of them, 'first' keeps the first vote and 'last' keeps the last vote,
+            by default 'drop'
+        delimiter : str, optional
+            Delimiter of classification CSV files, by default ';'
+        chunksize : int, optional
+            Number of classifications read at a time by `clean_csv`, by default 1_000_000
+        column_map : dict, optional
+            Dictionary, for mapping the column names of the classifications dataframe
+            to variable names used in the ranking system.
+            by default {"player 0": "image_id_0",
+                        "player 1": "image_id_1",
+                        "score for player 0": "image0_more_complex_image1"}
+
+        Raises
+        ------
+        SunpyUserWarning
+            If unrecognized handling of contradictory votes is passed.
+        """
+        if contradictions not in ['drop', 'first', 'last']:
+            raise SunpyUserWarning('Incorrect handling of contradictory votes specified.')
+
+        self.user_column = user_column
+        self.contradictions = contradictions
+        self.delimiter = delimiter
+        self.chunksize = chunksize
+        self.column_map = column_map
+        self.summary = None
+
+    def clean(self, classifications: pd.DataFrame):
+        """
+        Cleans a table of classifications held in memory.
+
+        Parameters
+        ----------
+        classifications : pandas.DataFrame
+            DataFrame holding the classifications.
+
+        Returns
+        -------
+        cleaned : pandas.DataFrame
+            The classifications that were kept, in their original order.
+            A summary of what was removed is kept in the ``summary`` attribute.
+        """
+        kept = self._kept_rows(self._tally([self._keys(classifications, 0)]))
+        return classifications[np.isin(np.arange(len(classifications)), kept)]
+
+    def clean_csv(self, source, destination):
+        """
+        Cleans a classifications CSV file one chunk at a time.
+
+        The first pass reads the keys of all votes, the second pass writes
+        the kept votes to the destination file, with the same delimiter.
+
+        Parameters
+        ----------
+        source : str or pathlib.Path
+            CSV file holding the classifications.
+        destination : str or pathlib.Path
+            CSV file to store the cleaned classifications.
+
+        Returns
+        -------
+        summary : dict
+            Summary of what was removed, also kept in the ``summary`` attribute.
+        """
+        keys = (self._keys(chunk, start) for chunk, start in self._chunks(source))
+        kept = self._kept_rows(self._tally(keys))
+
+        with open(destination, 'w', newline='') as output:
+            # The header is written on its own, so that it is there even if no rows are kept.
+            header = pd.read_csv(source, delimiter=self.delimiter, nrows=0)
+            header.to_csv(output, sep=self.delimiter, index=False)
+            for chunk, start in self._chunks(source):
+                rows = np.arange(start, start + len(chunk))
+                chunk[np.isin(rows, kept)].to_csv(output, sep=self.delimiter, index=False,
+                                                  header=False)
+        return self.summary
+
+    def _chunks(self, source):
+        """
+        Yields the chunks of a CSV file, with the row number of their first row.
+        """
+        start = 0
+        for chunk in pd.read_csv(source, delimiter=self.delimiter, chunksize=self.chunksize):
+            yield chunk, start
+            start += len(chunk)
+
+    def _keys(self, classifications, start):
+        """
+        Returns the row number, user and pair hash, and chosen image of every vote that is not
+        a self match, with the number of rows and self matches.
+        """
+        _check_column_map(classifications, {**self.column_map, 'user': self.user_column})
+        image_0 = classifications[self.column_map['player 0']].to_numpy()
+        image_1 = classifications[self.column_map['player 1']].to_numpy()
+        outcome = classifications[self.column_map['score for player 0']].to_numpy()
+
+        # The pair is ordered, so that votes on (a, b) and (b, a) share a key.
+        swapped = image_0 > image_1
+        pairs = pd.DataFrame({'user': classifications[self.user_column].to_numpy(),
+                              'low': np.where(swapped, image_1, image_0),
+                              'high': np.where(swapped, image_0, image_1)})
+        keys = pd.DataFrame({'row': np.arange(start, start + len(classifications)),
+                             'key': pd.util.hash_pandas_object(pairs, index=False).to_numpy(),
+                             # 1 if the higher image of the pair was chosen as more complex.
+                             'vote': np.where(swapped, outcome, 1 - outcome).astype(np.int8)})
+        self_matches = image_0 == image_1
+        return keys[~self_matches], len(keys), int(self_matches.sum())
+
+    def _tally(self, keys):
+        """
+        Reduces the votes of all chunks to the first and last row, and the count, of every key
+        and vote.
+        """
+        tallies = []
+        rows = self_matches = 0
+        for chunk, chunk_rows, chunk_self_matches in keys:
+            rows += chunk_rows
+            self_matches += chunk_self_matches
+            tallies.append(chunk.groupby(['key', 'vote'])['row'].agg(['min', 'max', 'size']))
+
+        if tallies:
+            tally = pd.concat(tallies).groupby(level=['key', 'vote'])
+            tally = tally.agg({'min': 'min', 'max': 'max', 'size': 'sum'})
+        else:
+            empty = np.zeros(0, dtype=np.int64)
+            index = pd.MultiIndex.from_arrays([np.zeros(0, dtype=np.uint64),
+                                               np.zeros(0, dtype=np.int8)], names=['key', 'vote'])
+            tally = pd.DataFrame({'min': empty, 'max': empty, 'size': empty}, index=index)
+        tally.attrs.update({'rows': rows, 'self matches': self_matches})
+        return tally
+
+    def _kept_rows(self, tally):
+        """
+        Decides which rows are kept, and summarises what was removed.
+        """
+        per_key = tally.groupby(level='key').agg(first=('min', 'min'), last=('max', 'max'),
+                                                 votes=('size', 'size'), size=('size', 'sum'))
+        contradictory = (per_key['votes'] > 1).to_numpy()
+
+        consistent = per_key.loc[~contradictory, 'first'].to_numpy()
+        if self.contradictions == 'drop':
+            resolved = np.empty(0, dtype=np.int64)
+        else:
+            resolved = per_key.loc[contradictory, self.contradictions].to_numpy()
+        kept = np.sort(np.concatenate([consistent, resolved]))
+
+        duplicates = per_key.loc[~contradictory, 'size'].sum() - len(consistent)
+        contradictory_votes = per_key.loc[contradictory, 'size'].sum() - len(resolved)
+        self.summary = {'rows': tally.attrs['rows'],
+                        'self matches': tally.attrs['self matches'],
+                        'duplicates': int(duplicates),
+                        'contradictory votes': int(contradictory_votes),
+                        'kept': len(kept)}
+        return kept
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+from pythia.cleaning.elo import _check_column_map
+from pythia.cleaning.player_index import PlayerIndex
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+__all__ = ['ComparisonGraph']
+
+
+class ComparisonGraph:
+    """
+    Sparse graph of the pairwise comparisons between Sunspotter images.
+
+    Images are the nodes of the graph, and every pair of images that was compared
+    at least once is joined by an edge, weighted by the number of comparisons.
+    Matches in different connected components never interact, so the components
+    can be rated independently of each other.
+    """
+
+    def __init__(self, index: PlayerIndex, player_0, player_1, outcome):
+        """
+        Parameters
+        ----------
+        index : pythia.cleaning.PlayerIndex
+            Index of all images of the graph.
+        player_0 : numpy.ndarray
+            Slots of the first image of every match.
+        player_1 : numpy.ndarray
+            Slots of the second image of every match.
+        outcome : numpy.ndarray
+            Result of every match for the first image.
+            `0` denotes less complex, `1` denotes more complex
+        """
+        self.index = index
+        n_players = len(index)
+
+        # Self matches say nothing about the relative complexity of two images.
+        valid = player_0 != player_1
+        player_0, player_1, outcome = player_0[valid], player_1[valid], outcome[valid]
+
+        self.wins = sparse.coo_matrix((np.concatenate([outcome, 1 - outcome]),
+                                       (np.concatenate([player_0, player_1]),
+                                        np.concatenate([player_1, player_0]))),
+                                      shape=(n_players, n_players)).tocsr()
+        self.wins.eliminate_zeros()
+        self.adjacency = sparse.coo_matrix((np.ones(2 * len(player_0)),
+                                            (np.concatenate([player_0, player_1]),
+                                             np.concatenate([player_1, player_0]))),
+                                           shape=(n_players, n_players)).tocsr()
+        self._labels = None
+
+    @classmethod
+    def from_score_board(cls, score_board: pd.DataFrame, *,
+                         column_map={"player 0": "image_id_0",
+                                     "player 1": "image_id_1",
+                                     "score for player 0": "image0_more_complex_image1"}):
+        """
+        Builds the comparison graph of a score board.
+
+        Parameters
+        ----------
+        score_board : pandas.DataFrame
+            DataFrame holding the scores of individual matches.
+        column_map : dict, optional
+            Dictionary, for mapping the column names of the score_board dataframe
+            to variable names used in the ranking system.
+            by default {"player 0": "image_id_0",
+                                    "player 1": "image_id_1",
+                                    "score for player 0": "image0_more_complex_image1"}
+
+        Returns
+        -------
+        graph : ComparisonGraph
+            The comparison graph.
+        """
+        _check_column_map(score_board, column_map)
+        index = PlayerIndex()
+        player_0, player_1 = index.encode_pairs(score_board[column_map['player 0']],
+                                                score_board[column_map['player 1']])
+        outcome = score_board[column_map['score for player 0']].to_numpy(dtype=np.float64)
+        return cls(index, player_0, player_1, outcome)
+
+    @property
+    def degree(self):
+        """
+        `numpy.ndarray` of the number of comparisons of every image, indexed by slot.
+        """
+        return np.asarray(self.adjacency.sum(axis=1)).ravel().astype(np.int64)
+
+    @property
+    def n_opponents(self):
+        """
+        `numpy.ndarray` of the number of distinct images every image was compared with,
+        indexed by slot.
+        """
+        return np.diff(self.adjacency.indptr)
+
+    @property
+    def labels(self):
+        """
+        `numpy.ndarray` of the connected component of every image, indexed by slot.
+        """
+        if self._labels is None:
+            _, self._labels = connected_components(self.adjacency, directed=False)
+        return self._labels
+
+    def components(self):
+        """
+        Returns the connected components of the graph.
+
+        Returns
+        -------
+        components : pandas.Series
+            The component of every image, indexed by player id.
+            Components are numbered from ``0``, and isolated images get a component of their own.
+        """
+        return pd.Series(self.labels, index=self.index.ids, name='component')
+
+    def component_sizes(self):
+        """
+        Returns the number of images in every connected component, largest first.
+
+        Returns
+        -------
+        sizes : pandas.Series
+            The number of images, indexed by component.
+        """
+        sizes = pd.Series(np.bincount(self.labels), name='size')
+        sizes.index.name = 'component'
+        return sizes.sort_values(ascending=False, kind='stable')
+
+    def degree_distribution(self):
+        """
+        Returns how many images were compared a given number of times.
+
+        Returns
+        -------
+        distribution : pandas.Series
+            The number of images, indexed by number of comparisons.
+        """
+        distribution = pd.Series(np.bincount(self.degree), name='images')
+        distribution.index.name = 'comparisons'
+        return distribution[distribution > 0]
+
+    def under_compared(self, min_comparisons=10):
+        """
+        Returns the images that were compared fewer times than required.
+
+        Parameters
+        ----------
+        min_comparisons : int, optional
+            Number of comparisons every image should have, by default 10
+
+        Returns
+        -------
+        player_ids : pandas.Index
+            The ids of all images with fewer than ``min_comparisons`` comparisons.
+        """
+        return self.index.decode(np.flatnonzero(self.degree < min_comparisons))
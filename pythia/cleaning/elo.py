@@ -2,6 +2,8 @@ from collections import deque
 
 import numpy as np
 import pandas as pd
+from pythia.cleaning.instrumentation import RunMonitor
+from pythia.cleaning.rankings_io import save_rankings
 from sunpy.util import SunpyUserWarning
 
 __all__ = ['ELO']
@@ -35,6 +37,8 @@ class ELO:
         score_memory : int, optional
             Number of previous scores to consider while calculating
             standard deviation and new K value, by default 10
+        delimiter : str, optional
+            Delimiter used when the score board is read from a CSV file, by default ';'
         column_map : dict, optional
             Dictionary, for mapping the column names of the score_board dataframe
             to variable names used in the ELO ranking system.
@@ -48,16 +52,22 @@ class ELO:
         self.score_change = {'min': min_score_change, 'max': max_score_change}
         self.max_comparisions = max_comparisons
         self.score_memory = score_memory
+        self.delimiter = delimiter
         self.column_map = column_map
 
-        if not set(self.column_map.values()).issubset(self.score_board.columns):
-            missing_columns = set(self.column_map.values()) - set(self.column_map.values()).intersection(self.score_board.columns)
-            missing_columns = ", ".join(missing_columns)
+        self._check_columns(self.score_board)
+        self._create_ranking()
 
-            raise SunpyUserWarning("The following columns mentioned in the column map"
-                                   f" are not present in the score board: {missing_columns}")
+    def _check_columns(self, score_board):
+        """
+        Checks that all columns mentioned in the column map are present in the score board.
 
-        self._create_ranking()
+        Raises
+        ------
+        SunpyUserWarning
+            If any column of the column map is missing from the score board.
+        """
+        _check_column_map(score_board, self.column_map)
 
     def _create_ranking(self):
         """
@@ -146,8 +156,8 @@ class ELO:
                                                self.rankings.loc[image_1]['score'])
         expected_score_1 = 1 - expected_score_0
 
-        _update_state_dict(state_dict_0, image_0, expected_score_0, score_for_image_0)
-        _update_state_dict(state_dict_1, image_1, expected_score_1, 1 - score_for_image_0)
+        self._update_state_dict(state_dict_0, image_0, expected_score_0, score_for_image_0)
+        self._update_state_dict(state_dict_1, image_1, expected_score_1, 1 - score_for_image_0)
 
         # Making the Update DataFrames
         update_df = pd.DataFrame([state_dict_0, state_dict_1])
@@ -156,9 +166,12 @@ class ELO:
         # Updating the original DataFrame
         self.rankings.update(update_df)
 
-    def _update_state_dict(state_dict, image, expected_score, score):
+    def _current_scores(self):
+        return self.rankings['score'].to_numpy()
+
+    def _update_state_dict(self, state_dict, image, expected_score, score):
         new_rating = self.new_rating(self.rankings.loc[image]['score'], self.rankings.loc[image]['k value'],
-                                       score, expected_score)
+                                     score, expected_score)
         state_dict['last scores'].append(new_rating)
         new_std_dev = min(np.std(state_dict['last scores']), 1_000_000)  # prevents Infinity
         new_k = min(max(new_std_dev, self.score_change['min']), self.score_change['max'])
@@ -167,9 +180,11 @@ class ELO:
         state_dict['std dev'] = new_std_dev
         state_dict['k value'] = new_k
         state_dict['count'] += 1
-        state_dict['last scores'] = ",".join(map(str, state_dict['last scores']))  # Storing the list of states as a String
+        # Storing the list of states as a String
+        state_dict['last scores'] = ",".join(map(str, state_dict['last scores']))
 
-    def run(self, save_to_disk=True, filename='run_results.csv'):
+    def run(self, save_to_disk=True, filename='run_results.csv', *, callbacks=None,
+            progress_every=10_000, snapshot_every=None):
         """
         Runs the ELO ranking Algorithm for all score_board.
 
@@ -179,18 +194,41 @@ class ELO:
             If true, saves the rankins in a CSV file on the disk, by default True
         filename : str, optional
             filename to store the results, by default 'run_results.csv'
+        callbacks : list of callable, optional
+            Functions called with the `~pythia.cleaning.RunReport` of the run every
+            ``progress_every`` matches and at the end of the run, for example
+            `~pythia.cleaning.log_progress`, by default None
+        progress_every : int, optional
+            Number of matches between progress callbacks, by default 10_000
+        snapshot_every : int, optional
+            Number of matches between snapshots of the score distribution,
+            by default None, which takes no snapshots
+
+        Returns
+        -------
+        report : pythia.cleaning.RunReport
+            Counters and timings of the run, also kept in the ``report`` attribute.
         """
-        for index, row in self.score_board.iterrows():
+        monitor = RunMonitor(callbacks, progress_every, snapshot_every)
+
+        with monitor.phase('rating'):
+            for index, row in self.score_board.iterrows():
 
-            if row[self.column_map['player 0']] == row[self.column_map['player 1']]:
-                continue
+                if row[self.column_map['player 0']] == row[self.column_map['player 1']]:
+                    monitor.advance(1, n_skipped=1)
+                    continue
 
-            self.score_update(image_0=row[self.column_map['player 0']], image_1=row[self.column_map['player 1']],
-                              score_for_image_0=row[self.column_map['score for player 0']])
-            print(f"Index {index} done!")
+                self.score_update(image_0=row[self.column_map['player 0']],
+                                  image_1=row[self.column_map['player 1']],
+                                  score_for_image_0=row[self.column_map['score for player 0']])
+                monitor.advance(1, scores=self._current_scores)
 
         if save_to_disk:
-            self.save_as_csv(filename)
+            with monitor.phase('saving'):
+                self.save_as_csv(filename)
+
+        self.report = monitor.finish()
+        return self.report
 
     def save_as_csv(self, filename):
         """
@@ -201,5 +239,32 @@ class ELO:
         filename : str
             filename to store the results.
         """
-        self.rankings.drop(columns=["last_scores"], inplace=True)
-        self.rankings.to_csv(filename)
+        self.rankings.drop(columns=["last scores"]).to_csv(filename)
+
+    def save_as_npz(self, filename, *, compressed=False):
+        """
+        Saves the Ranking DataFrame, with the last scores of every image as a fixed width
+        float array, to a binary ``.npz`` file, see `~pythia.cleaning.save_rankings`.
+
+        Parameters
+        ----------
+        filename : str or pathlib.Path
+            filename to store the results.
+        compressed : bool, optional
+            If True, the file is compressed, which makes it smaller but slower
+            to load, by default False
+        """
+        save_rankings(filename, self.rankings, compressed=compressed)
+
+
+def _check_column_map(score_board, column_map):
+    """
+    Raises a `~sunpy.util.SunpyUserWarning` if any column of the column map is missing
+    from the score board.
+    """
+    if not set(column_map.values()).issubset(score_board.columns):
+        missing_columns = set(column_map.values()) - set(score_board.columns)
+        missing_columns = ", ".join(missing_columns)
+
+        raise SunpyUserWarning("The following columns mentioned in the column map"
+                               f" are not present in the score board: {missing_columns}")
@@ -0,0 +1,176 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pythia.cleaning.elo import _check_column_map
+from pythia.cleaning.player_index import PlayerIndex
+from pythia.cleaning.rankings_io import load_rankings
+
+__all__ = ['RankingEvaluator']
+
+
+class RankingEvaluator:
+    """
+    Scores how well a rankings table predicts held out pairwise comparisons.
+
+    For every comparison, the probability of the first image being more complex
+    is found from the scores of both images, as in `~pythia.cleaning.ELO.expected_score`,
+    and compared with the actual result. All comparisons of a frame are scored at once.
+    """
+
+    def __init__(self, rankings, *, default_score=1400, bins=10, delimiter=';',
+                 column_map={"player 0": "image_id_0",
+                             "player 1": "image_id_1",
+                             "score for player 0": "image0_more_complex_image1"}):
+        """
+        Parameters
+        ----------
+        rankings : pandas.DataFrame, str or pathlib.Path
+            Rankings indexed by player id, with a ``score`` column, as made by
+            any of the ranking engines, or a path to a CSV or ``.npz`` file they saved.
+        default_score : int, optional
+            Score of images missing from the rankings, by default 1400
+        bins : int, optional
+            Number of equal width probability bins of the calibration table, by default 10
+        delimiter : str, optional
+            Delimiter of comparison CSV files, by default ';'
+        column_map : dict, optional
+            Dictionary, for mapping the column names of the comparisons dataframe
+            to variable names used in the ranking system.
+            by default {"player 0": "image_id_0",
+                                    "player 1": "image_id_1",
+                                    "score for player 0": "image0_more_complex_image1"}
+        """
+        if isinstance(rankings, (str, Path)):
+            if Path(rankings).suffix == '.npz':
+                rankings = load_rankings(rankings)
+            else:
+                rankings = pd.read_csv(rankings, index_col=0)
+
+        self.default_score = default_score
+        self.bins = bins
+        self.delimiter = delimiter
+        self.column_map = column_map
+
+        self.index = PlayerIndex(rankings.index)
+        # The last entry is the score of unranked images, which are encoded as -1.
+        self.scores = np.append(rankings['score'].to_numpy(dtype=np.float64), default_score)
+
+    def predict(self, comparisons: pd.DataFrame):
+        """
+        Returns the probability of the first image of every comparison being more complex.
+
+        Parameters
+        ----------
+        comparisons : pandas.DataFrame
+            DataFrame holding the pairwise comparisons.
+
+        Returns
+        -------
+        expected_0_score : numpy.ndarray
+            Expected probability of `image_0` being more complex, for every comparison.
+        """
+        _check_column_map(comparisons, self.column_map)
+        player_0, player_1 = self.index.encode_pairs(comparisons[self.column_map['player 0']],
+                                                     comparisons[self.column_map['player 1']],
+                                                     add=False)
+        return 1.0 / (1.0 + 10 ** ((self.scores[player_1] - self.scores[player_0]) / 400.00))
+
+    def evaluate(self, comparisons: pd.DataFrame):
+        """
+        Scores the predictions of a frame of comparisons.
+
+        Self matches are left out.
+
+        Parameters
+        ----------
+        comparisons : pandas.DataFrame
+            DataFrame holding the pairwise comparisons.
+
+        Returns
+        -------
+        metrics : dict
+            The number of comparisons ``n``, their mean ``log loss``, ``brier score``
+            and ``accuracy``, and the ``calibration`` table, a `pandas.DataFrame`
+            with the number of comparisons, the mean predicted probability and the
+            observed frequency of the first image being more complex, per bin.
+            Predictions of exactly one half count as half right.
+        """
+        totals = self._empty_totals()
+        self._accumulate(totals, comparisons)
+        return self._summarise(totals)
+
+    def evaluate_chunks(self, comparisons, chunksize=100_000):
+        """
+        Scores the predictions of comparisons that are streamed one chunk at a time.
+
+        Parameters
+        ----------
+        comparisons : str, pathlib.Path or iterable of pandas.DataFrame
+            Path to a CSV file holding the comparisons, or an iterator over
+            DataFrame chunks of them.
+        chunksize : int, optional
+            Number of comparisons read at a time from a CSV file, by default 100_000
+
+        Returns
+        -------
+        metrics : dict
+            The metrics described in `evaluate`, over all chunks.
+        """
+        if isinstance(comparisons, (str, Path)):
+            comparisons = pd.read_csv(comparisons, delimiter=self.delimiter,
+                                      usecols=list(self.column_map.values()), chunksize=chunksize)
+
+        totals = self._empty_totals()
+        for chunk in comparisons:
+            self._accumulate(totals, chunk)
+        return self._summarise(totals)
+
+    def _empty_totals(self):
+        return {'n': 0, 'log loss': 0.0, 'brier score': 0.0, 'accuracy': 0.0,
+                'bin count': np.zeros(self.bins), 'bin predicted': np.zeros(self.bins),
+                'bin observed': np.zeros(self.bins)}
+
+    def _accumulate(self, totals, comparisons):
+        """
+        Adds the sums over one frame of comparisons to the running totals.
+        """
+        valid = (comparisons[self.column_map['player 0']] !=
+                 comparisons[self.column_map['player 1']]).to_numpy()
+        comparisons = comparisons[valid]
+
+        predicted = self.predict(comparisons)
+        outcome = comparisons[self.column_map['score for player 0']].to_numpy(dtype=np.float64)
+
+        probability = np.clip(predicted, 1e-15, 1 - 1e-15)
+        totals['n'] += len(outcome)
+        totals['log loss'] -= (outcome * np.log(probability) +
+                               (1 - outcome) * np.log(1 - probability)).sum()
+        totals['brier score'] += ((predicted - outcome) ** 2).sum()
+        totals['accuracy'] += np.where(predicted == 0.5, 0.5,
+                                       (predicted > 0.5) == (outcome > 0.5)).sum()
+
+        bin_index = np.minimum((predicted * self.bins).astype(np.int64), self.bins - 1)
+        totals['bin count'] += np.bincount(bin_index, minlength=self.bins)
+        totals['bin predicted'] += np.bincount(bin_index, weights=predicted, minlength=self.bins)
+        totals['bin observed'] += np.bincount(bin_index, weights=outcome, minlength=self.bins)
+
+    def _summarise(self, totals):
+        """
+        Turns the running totals into means and the calibration table.
+        """
+        n = totals['n']
+        edges = np.linspace(0, 1, self.bins + 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            calibration = pd.DataFrame({
+                'lower': edges[:-1],
+                'upper': edges[1:],
+                'count': totals['bin count'].astype(np.int64),
+                'mean predicted': totals['bin predicted'] / totals['bin count'],
+                'observed': totals['bin observed'] / totals['bin count']})
+
+        return {'n': n,
+                'log loss': totals['log loss'] / n if n else np.nan,
+                'brier score': totals['brier score'] / n if n else np.nan,
+                'accuracy': totals['accuracy'] / n if n else np.nan,
+                'calibration': calibration}
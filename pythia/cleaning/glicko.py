@@ -0,0 +1,246 @@
+import numpy as np
+import pandas as pd
+from pythia.cleaning.elo import _check_column_map
+from pythia.cleaning.player_index import PlayerIndex
+
+__all__ = ['Glicko2']
+
+# Conversion factor between the Glicko and Glicko-2 rating scales.
+GLICKO2_SCALE = 400 / np.log(10)
+
+
+class Glicko2:
+    """
+    Glicko-2 rating of Sunspotter images, with matches grouped into rating periods.
+
+    Instead of updating two ratings after every single match, as `~pythia.cleaning.ELO`
+    does, all matches of a rating period are rated against the ratings at the start
+    of the period, and every image is updated at once with NumPy scatter-add operations.
+    Besides a rating, every image gets a rating deviation, which measures how uncertain
+    the rating is, and a volatility, which measures how erratic its results are.
+
+    References
+    ----------
+    * Glickman, M. E., "Example of the Glicko-2 system", http://www.glicko.net/glicko/glicko2.pdf
+    """
+
+    def __init__(self, score_board: pd.DataFrame, *, period=1000, period_freq=None,
+                 default_score=1400, default_deviation=350, default_volatility=0.06, tau=0.5,
+                 max_deviation=None,
+                 column_map={"player 0": "image_id_0",
+                             "player 1": "image_id_1",
+                             "score for player 0": "image0_more_complex_image1"}):
+        """
+        Parameters
+        ----------
+        score_board : pandas.DataFrame
+            DataFrame holding the scores of individual matches.
+        period : int or str, optional
+            Either the number of consecutive matches in every rating period, or the
+            name of a score board column whose values label the rating period of
+            every match, by default 1000
+        period_freq : str, optional
+            If ``period`` is a column of datetimes, the frequency they are floored to,
+            for example 'D' for one rating period per classification day, by default None
+        default_score : int, optional
+            Initial rating, by default 1400
+        default_deviation : float, optional
+            Initial rating deviation, by default 350
+        default_volatility : float, optional
+            Initial volatility, by default 0.06
+        tau : float, optional
+            Constrains the change of the volatility over time, by default 0.5
+        max_deviation : float, optional
+            Largest rating deviation of images that are not compared in a rating period,
+            by default None, which lets it grow without bound as in Glicko-2.
+            Setting it to ``default_deviation`` follows Glicko, where an image that is
+            left out long enough is as uncertain as a new one.
+        column_map : dict, optional
+            Dictionary, for mapping the column names of the score_board dataframe
+            to variable names used in the rating system.
+            by default {"player 0": "image_id_0",
+                                    "player 1": "image_id_1",
+                                    "score for player 0": "image0_more_complex_image1"}
+        """
+        self.score_board = score_board
+        self.period = period
+        self.period_freq = period_freq
+        self.default_score = default_score
+        self.default_deviation = default_deviation
+        self.default_volatility = default_volatility
+        self.tau = tau
+        self.max_deviation = max_deviation
+        self.column_map = column_map
+
+        required = dict(column_map)
+        if isinstance(period, str):
+            required['period'] = period
+        _check_column_map(self.score_board, required)
+
+        self._create_ranking()
+
+    def _create_ranking(self):
+        """
+        Encodes the score board and prepares the rating state arrays, on the Glicko-2 scale.
+        """
+        self.index = PlayerIndex()
+        player_0, player_1 = self.index.encode_pairs(self.score_board[self.column_map['player 0']],
+                                                     self.score_board[self.column_map['player 1']])
+        outcome = self.score_board[self.column_map['score for player 0']].to_numpy(dtype=np.float64)
+
+        if isinstance(self.period, str):
+            labels = self.score_board[self.period]
+            if self.period_freq is not None:
+                labels = pd.to_datetime(labels).dt.floor(self.period_freq)
+            periods, _ = pd.factorize(labels, sort=True)
+        else:
+            periods = np.arange(len(self.score_board)) // self.period
+
+        valid = player_0 != player_1
+        order = np.argsort(periods[valid], kind='stable')
+        self.player_0 = player_0[valid][order]
+        self.player_1 = player_1[valid][order]
+        self.outcome = outcome[valid][order]
+        self.periods = periods[valid][order]
+
+        n_players = len(self.index)
+        self.mu = np.zeros(n_players)
+        self.phi = np.full(n_players, self.default_deviation / GLICKO2_SCALE)
+        self.sigma = np.full(n_players, self.default_volatility)
+        self.counts = np.zeros(n_players, dtype=np.int64)
+
+    def run(self, save_to_disk=True, filename='run_results.csv'):
+        """
+        Rates all rating periods of the score board in order.
+
+        Parameters
+        ----------
+        save_to_disk : bool, optional
+            If true, saves the rankings in a CSV file on the disk, by default True
+        filename : str, optional
+            filename to store the results, by default 'run_results.csv'
+        """
+        boundaries = np.flatnonzero(np.diff(self.periods)) + 1
+        for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(self.periods)]):
+            self.rate_period(self.player_0[start:end], self.player_1[start:end],
+                             self.outcome[start:end])
+
+        if save_to_disk:
+            self.save_as_csv(filename)
+
+    def rate_period(self, player_0, player_1, outcome):
+        """
+        Updates all ratings with the encoded matches of one rating period.
+
+        Parameters
+        ----------
+        player_0 : numpy.ndarray
+            Slots of the first image of every match.
+        player_1 : numpy.ndarray
+            Slots of the second image of every match.
+        outcome : numpy.ndarray
+            Result of every match for the first image.
+            `0` denotes less complex, `1` denotes more complex
+        """
+        n_players = len(self.mu)
+        # Every match is seen from the side of both images.
+        players = np.concatenate([player_0, player_1])
+        opponents = np.concatenate([player_1, player_0])
+        results = np.concatenate([outcome, 1 - outcome])
+
+        g = 1 / np.sqrt(1 + 3 * self.phi[opponents] ** 2 / np.pi ** 2)
+        expected = 1 / (1 + np.exp(-g * (self.mu[players] - self.mu[opponents])))
+
+        inverse_variance = np.bincount(players, weights=g ** 2 * expected * (1 - expected),
+                                       minlength=n_players)
+        improvement = np.bincount(players, weights=g * (results - expected), minlength=n_players)
+
+        played = inverse_variance > 0
+        variance = 1 / inverse_variance[played]
+        delta = variance * improvement[played]
+
+        sigma = _new_volatility(self.phi[played], self.sigma[played], variance, delta, self.tau)
+        phi_star = np.sqrt(self.phi[played] ** 2 + sigma ** 2)
+        new_phi = 1 / np.sqrt(1 / phi_star ** 2 + inverse_variance[played])
+
+        # Images that were not compared only become more uncertain.
+        self.phi[~played] = np.sqrt(self.phi[~played] ** 2 + self.sigma[~played] ** 2)
+        if self.max_deviation is not None:
+            self.phi[~played] = np.minimum(self.phi[~played], self.max_deviation / GLICKO2_SCALE)
+        self.mu[played] += new_phi ** 2 * improvement[played]
+        self.phi[played] = new_phi
+        self.sigma[played] = sigma
+        self.counts += np.bincount(players, minlength=n_players)
+
+    @property
+    def rankings(self):
+        """
+        The rankings as a `pandas.DataFrame`, in the layout used by `~pythia.cleaning.ELO`.
+
+        ``std dev`` holds the rating deviation of every image, which is also
+        available, with the volatility, in the ``rating deviation`` and
+        ``volatility`` columns. ``k value`` is undefined for Glicko-2.
+        """
+        player_ids = self.index.ids
+        scores = self.default_score + GLICKO2_SCALE * self.mu
+        deviations = GLICKO2_SCALE * self.phi
+        return pd.DataFrame({'player id': player_ids,
+                             'score': scores,
+                             'k value': np.nan,
+                             'count': self.counts,
+                             'std dev': deviations,
+                             'last scores': list(map(str, scores)),
+                             'rating deviation': deviations,
+                             'volatility': self.sigma},
+                            index=player_ids)
+
+    def save_as_csv(self, filename):
+        """
+        Saves the Ranking DataFrame to the disk as a CSV file.
+
+        Parameters
+        ----------
+        filename : str
+            filename to store the results.
+        """
+        self.rankings.drop(columns=["last scores"]).to_csv(filename)
+
+
+def _new_volatility(phi, sigma, variance, delta, tau, tolerance=1e-6, max_iter=100):
+    """
+    Solves the Glicko-2 volatility equation for many players at once, with the Illinois algorithm.
+    """
+    a = np.log(sigma ** 2)
+
+    def f(x):
+        exp_x = np.exp(x)
+        return (exp_x * (delta ** 2 - phi ** 2 - variance - exp_x) /
+                (2 * (phi ** 2 + variance + exp_x) ** 2) -
+                (x - a) / tau ** 2)
+
+    A = a.copy()
+    large = delta ** 2 > phi ** 2 + variance
+    B = np.where(large, np.log(np.where(large, delta ** 2 - phi ** 2 - variance, 1)), a - tau)
+    searching = ~large
+    for k in range(2, max_iter):
+        searching &= f(a - (k - 1) * tau) < 0
+        if not searching.any():
+            break
+        B[searching] = a[searching] - k * tau
+
+    f_A, f_B = f(A), f(B)
+    for _ in range(max_iter):
+        active = np.abs(B - A) > tolerance
+        if not active.any():
+            break
+        with np.errstate(divide='ignore', invalid='ignore'):
+            C = A + (A - B) * f_A / (f_B - f_A)
+            f_C = f(C)
+        swap = active & (f_C * f_B <= 0)
+        halve = active & ~swap
+        A = np.where(swap, B, A)
+        f_A = np.where(swap, f_B, np.where(halve, f_A / 2, f_A))
+        B = np.where(active, C, B)
+        f_B = np.where(active, f_C, f_B)
+
+    return np.exp(A / 2)
@@ -0,0 +1,213 @@
+import json
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from sunpy import log
+
+__all__ = ['RunReport', 'RunMonitor', 'log_progress']
+
+
+class RunReport:
+    """
+    Counters and timings of a rating run.
+
+    A report is filled in while a rating engine runs, and is handed to every
+    progress callback, so that callbacks see the counters as they grow.
+
+    Attributes
+    ----------
+    matches_processed : int
+        Number of matches of the score board that were read, including self matches.
+    skipped_self_matches : int
+        Number of matches of an image against itself, which are not rated.
+    elapsed : float
+        Seconds since the start of the run.
+    phases : dict
+        Seconds spent in every phase of the run, such as 'encoding', 'rating' and 'saving'.
+    snapshots : list of dict
+        Summaries of the score distribution, taken every ``snapshot_every`` matches.
+    """
+
+    def __init__(self):
+        self.matches_processed = 0
+        self.skipped_self_matches = 0
+        self.elapsed = 0.0
+        self.phases = {}
+        self.snapshots = []
+
+    @property
+    def matches_rated(self):
+        """
+        Number of matches that updated the ratings.
+        """
+        return self.matches_processed - self.skipped_self_matches
+
+    @property
+    def matches_per_second(self):
+        """
+        Mean throughput of the run so far.
+        """
+        return self.matches_processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self):
+        """
+        Returns the report as a dictionary of plain Python values.
+        """
+        return {'matches_processed': self.matches_processed,
+                'skipped_self_matches': self.skipped_self_matches,
+                'matches_rated': self.matches_rated,
+                'elapsed': self.elapsed,
+                'matches_per_second': self.matches_per_second,
+                'phases': dict(self.phases),
+                'snapshots': list(self.snapshots)}
+
+    def to_json(self, filename=None):
+        """
+        Serialises the report to JSON.
+
+        Parameters
+        ----------
+        filename : str or pathlib.Path, optional
+            If given, the JSON is also written to this file, by default None
+
+        Returns
+        -------
+        report : str
+            The report as a JSON string.
+        """
+        report = json.dumps(self.to_dict(), indent=2)
+        if filename is not None:
+            with open(filename, 'w') as f:
+                f.write(report)
+        return report
+
+    def __repr__(self):
+        return (f"<RunReport: {self.matches_processed} matches,"
+                f" {self.skipped_self_matches} self matches skipped,"
+                f" {self.elapsed:.3f} s, {self.matches_per_second:.0f} matches/s>")
+
+
+class RunMonitor:
+    """
+    Keeps the `RunReport` of a rating run, and calls the progress callbacks.
+
+    Rating engines report every batch of matches they have rated with `advance`,
+    and wrap the stages of a run in `phase`. Callbacks and snapshots are only
+    triggered once their interval has passed, so the cost of monitoring does not
+    grow with the number of matches.
+    """
+
+    def __init__(self, callbacks=None, progress_every=10_000, snapshot_every=None):
+        """
+        Parameters
+        ----------
+        callbacks : list of callable, optional
+            Functions called with the `RunReport` every ``progress_every`` matches,
+            and once at the end of the run, by default None
+        progress_every : int, optional
+            Number of matches between progress callbacks, by default 10_000
+        snapshot_every : int, optional
+            Number of matches between snapshots of the score distribution,
+            by default None, which takes no snapshots
+        """
+        self.callbacks = list(callbacks or [])
+        self.progress_every = progress_every
+        self.snapshot_every = snapshot_every
+        self.report = RunReport()
+        self._next_progress = progress_every
+        self._next_snapshot = snapshot_every
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Adds the time spent in the ``with`` block to the phase ``name``.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.report.phases[name] = self.report.phases.get(name, 0.0) + elapsed
+
+    def advance(self, n_matches, n_skipped=0, scores=None):
+        """
+        Counts a batch of processed matches.
+
+        Parameters
+        ----------
+        n_matches : int
+            Number of matches processed, including self matches.
+        n_skipped : int, optional
+            Number of self matches among them, by default 0
+        scores : callable, optional
+            Returns the current scores as an array. Only called when a snapshot is due,
+            by default None
+        """
+        report = self.report
+        report.matches_processed += n_matches
+        report.skipped_self_matches += n_skipped
+
+        snapshot_due = (self.snapshot_every is not None and
+                        report.matches_processed >= self._next_snapshot)
+        if snapshot_due and scores is not None:
+            self.snapshot(scores())
+            self._next_snapshot = ((report.matches_processed // self.snapshot_every + 1) *
+                                   self.snapshot_every)
+
+        if self.callbacks and report.matches_processed >= self._next_progress:
+            self._notify()
+            self._next_progress = ((report.matches_processed // self.progress_every + 1) *
+                                   self.progress_every)
+
+    def snapshot(self, scores):
+        """
+        Records a summary of the score distribution.
+
+        Parameters
+        ----------
+        scores : numpy.ndarray
+            The current scores of all images.
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        snapshot = {'matches_processed': self.report.matches_processed, 'images': len(scores)}
+        if len(scores):
+            quantiles = np.percentile(scores, [5, 25, 50, 75, 95])
+            snapshot.update({'mean': scores.mean(), 'std': scores.std(),
+                             'min': scores.min(), 'max': scores.max(),
+                             **{f'p{q}': value
+                                for q, value in zip([5, 25, 50, 75, 95], quantiles)}})
+        self.report.snapshots.append({key: value.item() if isinstance(value, np.generic) else value
+                                      for key, value in snapshot.items()})
+
+    def finish(self):
+        """
+        Ends the run, calling the callbacks with the final report.
+
+        Returns
+        -------
+        report : RunReport
+            The final report of the run.
+        """
+        self._notify()
+        return self.report
+
+    def _notify(self):
+        self.report.elapsed = time.perf_counter() - self._start
+        for callback in self.callbacks:
+            callback(self.report)
+
+
+def log_progress(report):
+    """
+    Progress callback that logs the counters of a run with the sunpy logger.
+
+    Parameters
+    ----------
+    report : RunReport
+        The report of the running engine.
+    """
+    log.info(f"{report.matches_processed} matches processed in {report.elapsed:.1f} s"
+             f" ({report.matches_per_second:.0f} matches/s),"
+             f" {report.skipped_self_matches} self matches skipped")
@@ -1,16 +1,49 @@
 import datetime
+import warnings
 
 import astropy.units as u
+import numpy as np
+import pandas as pd
+from astropy.coordinates import Longitude
 from sunpy.physics.differential_rotation import diff_rot
+from sunpy.util import SunpyUserWarning
 
 __all__ = ['MidnightRotation']
 
+# Rotation rate tables of the fast mode, shared by all instances,
+# keyed by rotation model, frame time and tolerance.
+_rotation_tables = {}
+
+# Largest number of latitudes of a rotation rate table.
+_max_table_points = 2 ** 20 + 1
+
 
 class MidnightRotation:
     """
     A class to rotate the coordinates of an observation
     to its coordinates at the nearest midnight.
+
+    The differential rotation over a duration is the duration times a rate that
+    only depends on the squared sine of the latitude. In the fast mode, that rate
+    is tabulated once per rotation model and interpolated, which avoids the unit
+    handling of `~sunpy.physics.differential_rotation.diff_rot` for every call.
     """
+
+    def __init__(self, *, fast=False, tolerance=1e-6 * u.deg):
+        """
+        Parameters
+        ----------
+        fast : bool, optional
+            If True, rotations are interpolated from a rotation rate table, by default False
+        tolerance : u.deg, optional
+            Largest error of the fast mode, against
+            `~sunpy.physics.differential_rotation.diff_rot`, for a rotation over
+            12 hours, the longest time to the nearest midnight, by default 1e-6 deg.
+            Errors grow linearly with the duration of the rotation.
+        """
+        self.fast = fast
+        self.tolerance = tolerance
+
     def get_nearest_midnight(self, obsdate: str, fmt='%Y-%m-%d %H:%M:%S'):
         """
         For a given observation time and date, returns the datetime of the nearest midnight.
@@ -38,7 +71,9 @@ class MidnightRotation:
         >>> midnight_rotation.get_nearest_midnight(obsdate)
         datetime.datetime(2000, 1, 1, 0, 0)
         """
-        current = datetime.datetime.strptime(obsdate, fmt)
+        return self._nearest_midnight(datetime.datetime.strptime(obsdate, fmt))
+
+    def _nearest_midnight(self, current: datetime.datetime):
         if current.hour >= 12:
             current = current + datetime.timedelta(days=1)
         return current.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -71,9 +106,93 @@ class MidnightRotation:
         >>> midnight_rotation.get_seconds_to_nearest_midnight(obsdate)
         -42422.0
         """
-        timedifference = self.get_nearest_midnight(obsdate, fmt) - datetime.datetime.strptime(obsdate, fmt)
+        current = datetime.datetime.strptime(obsdate, fmt)
+        timedifference = self._nearest_midnight(current) - current
         return timedifference.total_seconds()
 
+    def get_nearest_midnights(self, obsdates, fmt='%Y-%m-%d %H:%M:%S'):
+        """
+        For many observation times and dates, returns the datetimes of the nearest midnights.
+
+        All observation dates are parsed and rounded in one vectorized pass.
+
+        Parameters
+        ----------
+        obsdates : pandas.Series, numpy.ndarray or list
+            The observation times and dates, as strings or ``datetime64`` values.
+        fmt : str, optional
+            The format in which string obsdates are represented, by default '%Y-%m-%d %H:%M:%S'
+
+        Returns
+        -------
+        nearest_midnights : pandas.Series or numpy.ndarray
+            The ``datetime64`` of the nearest midnight of every observation date,
+            as a Series with the same index if ``obsdates`` is a Series.
+
+        Examples
+        --------
+        >>> from pythia.cleaning.midnight_rotation import MidnightRotation
+        >>> midnight_rotation = MidnightRotation()
+        >>> obsdates = ['2000-01-01 12:47:02', '2000-01-01 11:47:02']
+        >>> midnight_rotation.get_nearest_midnights(obsdates)
+        array(['2000-01-02T00:00:00.000000000', '2000-01-01T00:00:00.000000000'],
+              dtype='datetime64[ns]')
+        """
+        current = self._to_datetimes(obsdates, fmt)
+        nearest_midnights = self._nearest_midnights(current)
+        return self._like(obsdates, nearest_midnights.to_numpy())
+
+    def get_seconds_to_nearest_midnights(self, obsdates, fmt='%Y-%m-%d %H:%M:%S'):
+        """
+        For many observation times and dates, returns the seconds to the nearest midnights.
+
+        Parameters
+        ----------
+        obsdates : pandas.Series, numpy.ndarray or list
+            The observation times and dates, as strings or ``datetime64`` values.
+        fmt : str, optional
+            The format in which string obsdates are represented, by default '%Y-%m-%d %H:%M:%S'
+
+        Returns
+        -------
+        seconds_to_nearest_midnights : pandas.Series or numpy.ndarray
+            The seconds to the nearest midnight of every observation date, as a Series
+            with the same index if ``obsdates`` is a Series. Returned seconds are
+            negative if the nearest midnight is of the same day.
+
+        Examples
+        --------
+        >>> from pythia.cleaning.midnight_rotation import MidnightRotation
+        >>> midnight_rotation = MidnightRotation()
+        >>> obsdates = ['2000-01-01 12:47:02', '2000-01-01 11:47:02']
+        >>> midnight_rotation.get_seconds_to_nearest_midnights(obsdates)
+        array([ 40378., -42422.])
+        """
+        current = self._to_datetimes(obsdates, fmt)
+        timedifference = self._nearest_midnights(current) - current
+        return self._like(obsdates, timedifference.total_seconds().to_numpy())
+
+    def _to_datetimes(self, obsdates, fmt):
+        """
+        Parses observation dates into a `pandas.DatetimeIndex`, in a single call.
+        """
+        obsdates = obsdates.to_numpy() if isinstance(obsdates, pd.Series) else np.asarray(obsdates)
+        if np.issubdtype(obsdates.dtype, np.datetime64):
+            return pd.DatetimeIndex(obsdates)
+        return pd.DatetimeIndex(pd.to_datetime(obsdates, format=fmt))
+
+    def _nearest_midnights(self, current: pd.DatetimeIndex):
+        return current.floor('D') + pd.to_timedelta((current.hour >= 12).astype(np.int64), unit='D')
+
+    def _like(self, obsdates, values):
+        """
+        Returns the values as a Series with the index of the observation dates, if they are a
+        Series.
+        """
+        if isinstance(obsdates, pd.Series):
+            return pd.Series(values, index=obsdates.index)
+        return values
+
     def get_longitude_at_nearest_midnight(self, obsdate: str, latitude: u.deg,
                                           fmt='%Y-%m-%d %H:%M:%S', **kwargs):
         """
@@ -93,7 +212,9 @@ class MidnightRotation:
         Returns
         -------
         longitude : u.deg
-            longitude of the observation at midnight.
+            Shift in longitude of the observation up to midnight, wrapped to
+            [-180, 180) degrees like `get_longitudes_at_nearest_midnight`, so that
+            observations before midnight rotate backwards.
 
         Examples
         --------
@@ -108,4 +229,261 @@ class MidnightRotation:
         <Longitude 4.87918286 deg>
         """
         seconds_to_midnight = self.get_seconds_to_nearest_midnight(obsdate, fmt=fmt) * u.s
-        return diff_rot(seconds_to_midnight, latitude, **kwargs)
+        longitude = self._diff_rot(seconds_to_midnight, latitude, **kwargs)
+        return Longitude(longitude, wrap_angle=180 * u.deg)
+
+    def get_longitudes_at_nearest_midnight(self, obsdates, latitudes, fmt='%Y-%m-%d %H:%M:%S',
+                                           **kwargs):
+        """
+        Returns the Longitudes at midnight, for many Latitudes and observation dates.
+
+        All rotations are found with a single call to
+        `~sunpy.physics.differential_rotation.diff_rot` on array Quantities.
+
+        Parameters
+        ----------
+        obsdates : str, pandas.Series, numpy.ndarray or list
+            The observation times and dates, as strings or ``datetime64`` values,
+            one per latitude, or a single observation date for all latitudes.
+        latitudes : u.deg
+            latitudes of the observations, as a Quantity or an array of degrees.
+        fmt : str, optional
+            The format in which string obsdates are represented, by default '%Y-%m-%d %H:%M:%S'
+        kwargs : dict
+            Keyword arguments passed to `~sunpy.physics.differential_rotation.diff_rot`
+
+        Returns
+        -------
+        longitudes : u.deg
+            Shifts in longitude of the observations up to midnight, wrapped to
+            [-180, 180) degrees like `get_longitude_at_nearest_midnight`, so that
+            observations before midnight rotate backwards.
+
+        Examples
+        --------
+        >>> import astropy.units as u
+        >>> from pythia.cleaning.midnight_rotation import MidnightRotation
+        >>> midnight_rotation = MidnightRotation()
+        >>> obsdates = ['2000-01-01 12:47:02', '2000-01-01 11:47:02']
+        >>> midnight_rotation.get_longitudes_at_nearest_midnight(obsdates, [443.92976, 10] * u.deg)
+        <Longitude [ 4.87918286, -7.0019744 ] deg>
+        """
+        if isinstance(obsdates, str):
+            obsdates = [obsdates]
+        seconds_to_midnight = self.get_seconds_to_nearest_midnights(obsdates, fmt=fmt)
+        seconds_to_midnight = np.asarray(seconds_to_midnight) * u.s
+        longitudes = self._diff_rot(seconds_to_midnight, u.Quantity(latitudes, u.deg), **kwargs)
+        return Longitude(longitudes, wrap_angle=180 * u.deg)
+
+    def add_longitudes_at_nearest_midnight(self, table: pd.DataFrame, *, obsdate_column='obs_date',
+                                           latitude_column='lat', column='midnight lon shift',
+                                           fmt='%Y-%m-%d %H:%M:%S', **kwargs):
+        """
+        Adds the shift in Longitude up to midnight of every row of a table as a column,
+        in degrees wrapped to [-180, 180), so that ``lon + shift`` is the Longitude at midnight.
+
+        Parameters
+        ----------
+        table : pandas.DataFrame
+            DataFrame holding the observation dates and latitudes, in degrees.
+        obsdate_column : str, optional
+            Column holding the observation dates, by default 'obs_date'
+        latitude_column : str, optional
+            Column holding the latitudes, by default 'lat'
+        column : str, optional
+            Name of the added column, by default 'midnight lon shift'
+        fmt : str, optional
+            The format in which string obsdates are represented, by default '%Y-%m-%d %H:%M:%S'
+        kwargs : dict
+            Keyword arguments passed to `~sunpy.physics.differential_rotation.diff_rot`
+
+        Returns
+        -------
+        table : pandas.DataFrame
+            A copy of the table, with the added column.
+        """
+        longitudes = self.get_longitudes_at_nearest_midnight(table[obsdate_column],
+                                                             table[latitude_column].to_numpy(),
+                                                             fmt=fmt, **kwargs)
+        return table.assign(**{column: longitudes.to_value(u.deg)})
+
+    def get_seconds_to_epochs(self, obsdates, epochs, fmt='%Y-%m-%d %H:%M:%S'):
+        """
+        Returns the seconds from every observation date to its target epoch.
+
+        Parameters
+        ----------
+        obsdates : pandas.Series, numpy.ndarray or list
+            The observation times and dates, as strings or ``datetime64`` values.
+        epochs : str, datetime.datetime, pandas.Series, numpy.ndarray or list
+            A single target epoch for all observations, or one per observation.
+        fmt : str, optional
+            The format in which string obsdates and epochs are represented,
+            by default '%Y-%m-%d %H:%M:%S'
+
+        Returns
+        -------
+        seconds_to_epochs : pandas.Series or numpy.ndarray
+            The seconds to the target epoch of every observation, as a Series with the
+            same index if ``obsdates`` is a Series. Returned seconds are negative if the
+            epoch is before the observation.
+        """
+        current = self._to_datetimes(obsdates, fmt)
+        if isinstance(epochs, str):
+            epochs = datetime.datetime.strptime(epochs, fmt)
+        if isinstance(epochs, (datetime.datetime, np.datetime64)):
+            epochs = pd.Timestamp(epochs)
+        else:
+            epochs = self._to_datetimes(epochs, fmt)
+        return self._like(obsdates, (epochs - current).total_seconds().to_numpy())
+
+    def get_longitudes_at_epochs(self, obsdates, latitudes, epochs, fmt='%Y-%m-%d %H:%M:%S',
+                                 **kwargs):
+        """
+        Returns the rotation in Longitude from every observation date to its target epoch.
+
+        Parameters
+        ----------
+        obsdates : pandas.Series, numpy.ndarray or list
+            The observation times and dates, as strings or ``datetime64`` values.
+        latitudes : u.deg
+            latitudes of the observations, as a Quantity or an array of degrees.
+        epochs : str, datetime.datetime, pandas.Series, numpy.ndarray or list
+            A single target epoch for all observations, or one per observation.
+        fmt : str, optional
+            The format in which string obsdates and epochs are represented,
+            by default '%Y-%m-%d %H:%M:%S'
+        kwargs : dict
+            Keyword arguments passed to `~sunpy.physics.differential_rotation.diff_rot`
+
+        Returns
+        -------
+        longitudes : u.deg
+            rotation in longitude of every observation up to its epoch, wrapped to
+            [-180, 180) degrees, so that rotations back to earlier epochs are negative.
+        """
+        seconds_to_epochs = np.asarray(self.get_seconds_to_epochs(obsdates, epochs, fmt=fmt)) * u.s
+        longitudes = self._diff_rot(seconds_to_epochs, u.Quantity(latitudes, u.deg), **kwargs)
+        return Longitude(longitudes, wrap_angle=180 * u.deg)
+
+    def rotate_to_epoch(self, table: pd.DataFrame, epochs, *, obsdate_column='obs_date',
+                        lon_column='lon', lat_column='lat', fmt='%Y-%m-%d %H:%M:%S', **kwargs):
+        """
+        Rotates the positions of a table of observations to a common epoch, or to one epoch per row.
+
+        Parameters
+        ----------
+        table : pandas.DataFrame
+            DataFrame holding the observation dates, and Heliographic Stonyhurst
+            longitudes and latitudes in degrees.
+        epochs : str, datetime.datetime, pandas.Series, numpy.ndarray or list
+            A single target epoch for all rows, such as a HEK query time,
+            or one target epoch per row.
+        obsdate_column : str, optional
+            Column holding the observation dates, by default 'obs_date'
+        lon_column : str, optional
+            Column holding the longitudes, by default 'lon'
+        lat_column : str, optional
+            Column holding the latitudes, by default 'lat'
+        fmt : str, optional
+            The format in which string obsdates and epochs are represented,
+            by default '%Y-%m-%d %H:%M:%S'
+        kwargs : dict
+            Keyword arguments passed to `~sunpy.physics.differential_rotation.diff_rot`
+
+        Returns
+        -------
+        rotated : pandas.DataFrame
+            The rotated longitudes, wrapped to [-180, 180) degrees, and the latitudes,
+            in columns named ``lon_column`` and ``lat_column``, with the index of the table.
+
+        Examples
+        --------
+        >>> import pandas as pd
+        >>> from pythia.cleaning.midnight_rotation import MidnightRotation
+        >>> midnight_rotation = MidnightRotation()
+        >>> table = pd.DataFrame({'obs_date': ['2000-01-01 12:47:02', '2000-01-02 00:00:00'],
+        ...                       'lon': [10.0, -179.9], 'lat': [20.0, -5.0]})
+        >>> midnight_rotation.rotate_to_epoch(table, '2000-01-03 00:00:00')
+                  lon   lat
+        0   30.621113  20.0
+        1 -165.589872  -5.0
+        """
+        latitudes = table[lat_column].to_numpy()
+        rotation = self.get_longitudes_at_epochs(table[obsdate_column], latitudes, epochs,
+                                                 fmt=fmt, **kwargs)
+        longitudes = Longitude((table[lon_column].to_numpy() * u.deg + rotation),
+                               wrap_angle=180 * u.deg)
+        return pd.DataFrame({lon_column: longitudes.to_value(u.deg), lat_column: latitudes},
+                            index=table.index)
+
+    def get_rotation_table_error(self, rot_type='howard', frame_time='sidereal'):
+        """
+        Returns the largest error of the fast mode for a rotation over 12 hours.
+
+        The error is measured against `~sunpy.physics.differential_rotation.diff_rot`
+        on a latitude grid ten times finer than the table.
+
+        Parameters
+        ----------
+        rot_type : str, optional
+            The rotation model, by default 'howard'
+        frame_time : str, optional
+            Either 'sidereal' or 'synodic', by default 'sidereal'
+
+        Returns
+        -------
+        max_error : u.deg
+            The largest error of the interpolated rotation.
+        """
+        return self._rotation_table(rot_type, frame_time)[2]
+
+    def _diff_rot(self, duration, latitude, rot_type='howard', frame_time='sidereal'):
+        """
+        Runs `~sunpy.physics.differential_rotation.diff_rot`, or interpolates it in the fast mode.
+        """
+        if not self.fast:
+            return diff_rot(duration, latitude, rot_type=rot_type, frame_time=frame_time)
+
+        sin2_grid, rates, _ = self._rotation_table(rot_type, frame_time)
+        sin2_latitude = np.sin(u.Quantity(latitude, u.deg).to_value(u.rad)) ** 2
+        days = u.Quantity(duration, u.s).to_value(u.day)
+        rotation = np.interp(sin2_latitude, sin2_grid, rates) * days
+        return Longitude(rotation * u.deg)
+
+    def _rotation_table(self, rot_type, frame_time):
+        """
+        Returns the squared sines of the latitude grid, the rotation rates in degrees per day,
+        and the largest error over 12 hours, building the table on first use.
+
+        The grid is refined until the error, measured on a finer grid, is within the tolerance.
+
+        Raises
+        ------
+        SunpyUserWarning
+            If the error is above the tolerance with the largest table.
+        """
+        tolerance = u.Quantity(self.tolerance, u.deg).to_value(u.deg)
+        key = (rot_type, frame_time, tolerance)
+        if key not in _rotation_tables:
+            def rate(sin2_latitude):
+                latitude = np.arcsin(np.sqrt(sin2_latitude)) * u.rad
+                # Rotation over one day, kept signed rather than wrapped to 360 degrees.
+                rotation = diff_rot(1 * u.day, latitude, rot_type=rot_type, frame_time=frame_time)
+                return rotation.wrap_at(180 * u.deg).to_value(u.deg)
+
+            n_points = 17
+            while True:
+                sin2_grid = np.linspace(0, 1, n_points)
+                rates = rate(sin2_grid)
+                check = np.linspace(0, 1, 10 * (n_points - 1) + 1)
+                max_error = 0.5 * np.abs(np.interp(check, sin2_grid, rates) - rate(check)).max()
+                if max_error <= tolerance:
+                    break
+                if 2 * n_points - 1 > _max_table_points:
+                    warnings.warn(SunpyUserWarning(f"The fast mode error of {max_error} deg is "
+                                                   f"above the tolerance of {tolerance} deg."))
+                    break
+                n_points = 2 * n_points - 1
+            _rotation_tables[key] = (sin2_grid, rates, max_error * u.deg)
+        return _rotation_tables[key]
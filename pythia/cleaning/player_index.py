@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+__all__ = ['PlayerIndex']
+
+
+class PlayerIndex:
+    """
+    Interns arbitrary player ids (image ids) into dense integer slots.
+
+    Slots are assigned in order of first appearance, starting at 0, and never change
+    once assigned, so arrays indexed by slot can keep growing as new players appear.
+
+    Examples
+    --------
+    >>> from pythia.cleaning import PlayerIndex
+    >>> index = PlayerIndex()
+    >>> index.encode(['5397a56a', '5397b77e', '5397a56a'])
+    array([0, 1, 0], dtype=int32)
+    >>> index.decode([1, 0])
+    Index(['5397b77e', '5397a56a'], dtype='object', name='player id')
+    """
+
+    def __init__(self, ids=None):
+        """
+        Parameters
+        ----------
+        ids : iterable, optional
+            Unique player ids to intern up front, in slot order, by default None
+        """
+        self._slots = {}
+        self._ids = []
+        self._index = None
+
+        if ids is not None:
+            self.encode(list(ids))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, player_id):
+        return player_id in self._slots
+
+    @property
+    def ids(self):
+        """
+        `pandas.Index` of all interned player ids, in slot order.
+        """
+        if self._index is None or len(self._index) != len(self._ids):
+            self._index = pd.Index(self._ids, name='player id')
+        return self._index
+
+    def encode(self, values, add=True):
+        """
+        Maps player ids to their slots.
+
+        Parameters
+        ----------
+        values : array-like
+            Player ids to encode.
+        add : bool, optional
+            If True, unseen ids are assigned new slots, otherwise they are
+            encoded as ``-1``, by default True
+
+        Returns
+        -------
+        slots : numpy.ndarray
+            ``int32`` array of slots, with the same length as ``values``.
+        """
+        codes, uniques = pd.factorize(np.asarray(values))
+        lookup = np.empty(len(uniques), dtype=np.int32)
+
+        for code, player_id in enumerate(uniques.tolist()):
+            slot = self._slots.get(player_id)
+            if slot is None:
+                if not add:
+                    slot = -1
+                else:
+                    slot = self._slots[player_id] = len(self._ids)
+                    self._ids.append(player_id)
+            lookup[code] = slot
+
+        return lookup[codes]
+
+    def encode_pairs(self, values_0, values_1, add=True):
+        """
+        Encodes two columns of player ids at once, such as the two players of every match.
+
+        Parameters
+        ----------
+        values_0 : array-like
+            Player ids of the first column.
+        values_1 : array-like
+            Player ids of the second column.
+        add : bool, optional
+            If True, unseen ids are assigned new slots, by default True
+
+        Returns
+        -------
+        slots_0, slots_1 : numpy.ndarray
+            ``int32`` arrays of slots for the two columns.
+        """
+        values_0 = np.asarray(values_0)
+        slots = self.encode(np.concatenate([values_0, np.asarray(values_1)]), add=add)
+        return slots[:len(values_0)], slots[len(values_0):]
+
+    def decode(self, slots):
+        """
+        Maps slots back to player ids.
+
+        Parameters
+        ----------
+        slots : array-like
+            Slots to decode.
+
+        Returns
+        -------
+        ids : pandas.Index
+            The player ids for the given slots.
+        """
+        return self.ids.take(np.asarray(slots, dtype=np.intp))
@@ -0,0 +1,127 @@
+import json
+
+import numpy as np
+import pandas as pd
+from sunpy.util import SunpyUserWarning
+
+__all__ = ['save_rankings', 'load_rankings', 'load_score_history']
+
+RANKINGS_FORMAT = 'pythia.rankings'
+RANKINGS_VERSION = 1
+
+
+def save_rankings(filename, rankings, score_history=None, *, compressed=False):
+    """
+    Saves rankings and the score history of every image to a versioned ``.npz`` file.
+
+    Every column is stored as its own typed array, and the last scores of every image
+    as one row of a fixed width float array, oldest first, padded with NaN.
+
+    Parameters
+    ----------
+    filename : str or pathlib.Path
+        filename to store the rankings.
+    rankings : pandas.DataFrame
+        Rankings indexed by player id, in the layout used by `~pythia.cleaning.ELO`.
+    score_history : numpy.ndarray, optional
+        The last scores of every image, as an array of shape ``(n_images, score_memory)``
+        padded with NaN, by default None, which parses the ``last scores`` column of the rankings
+    compressed : bool, optional
+        If True, the file is compressed, which makes it about a third smaller
+        but twice as slow to load, by default False
+    """
+    if score_history is None:
+        if 'last scores' in rankings.columns:
+            score_history = _parse_last_scores(rankings['last scores'])
+        else:
+            score_history = np.empty((len(rankings), 0))
+
+    player_ids = np.asarray(rankings.index)
+    if player_ids.dtype == object:
+        player_ids = player_ids.astype(str)
+
+    columns = [column for column in rankings.columns if column not in ('player id', 'last scores')]
+    arrays = {f'column_{i}': rankings[column].to_numpy() for i, column in enumerate(columns)}
+    header = {'format': RANKINGS_FORMAT, 'version': RANKINGS_VERSION, 'columns': columns}
+
+    save = np.savez_compressed if compressed else np.savez
+    save(filename, header=np.array(json.dumps(header)), player_ids=player_ids,
+         score_history=np.asarray(score_history, dtype=np.float64), **arrays)
+
+
+def load_rankings(filename, *, last_scores=False):
+    """
+    Loads rankings saved with `save_rankings`.
+
+    Parameters
+    ----------
+    filename : str or pathlib.Path
+        filename the rankings were stored in.
+    last_scores : bool, optional
+        If True, the score history is also returned as the comma joined ``last scores``
+        column of `~pythia.cleaning.ELO`, which is slow for many images, by default False
+
+    Returns
+    -------
+    rankings : pandas.DataFrame
+        Rankings indexed by player id.
+
+    Notes
+    -----
+    Integer player ids are loaded as they are stored. String ids have to be turned
+    into Python strings, which is most of the loading time of a large file.
+    """
+    with np.load(filename, allow_pickle=False) as data:
+        header = _read_header(data)
+        player_ids = pd.Index(data['player_ids'], name='player id')
+        columns = {column: data[f'column_{i}'] for i, column in enumerate(header['columns'])}
+        # The ids are converted once, for the index, and shared with the column.
+        rankings = pd.DataFrame({'player id': player_ids.to_numpy(), **columns},
+                                index=player_ids, copy=False)
+        if last_scores:
+            rankings['last scores'] = [",".join(map(str, row[~np.isnan(row)]))
+                                       for row in data['score_history']]
+    return rankings
+
+
+def load_score_history(filename):
+    """
+    Loads the score history of every image from a file written by `save_rankings`.
+
+    Parameters
+    ----------
+    filename : str or pathlib.Path
+        filename the rankings were stored in.
+
+    Returns
+    -------
+    score_history : pandas.DataFrame
+        The last scores of every image, oldest first and padded with NaN, indexed by player id.
+    """
+    with np.load(filename, allow_pickle=False) as data:
+        _read_header(data)
+        return pd.DataFrame(data['score_history'],
+                            index=pd.Index(data['player_ids'], name='player id'))
+
+
+def _read_header(data):
+    """
+    Reads the header of a rankings file, checking its format and version.
+    """
+    if 'header' not in data:
+        raise SunpyUserWarning("The file does not hold rankings saved by pythia.")
+    header = json.loads(str(data['header']))
+    if header.get('format') != RANKINGS_FORMAT or header.get('version') != RANKINGS_VERSION:
+        raise SunpyUserWarning(f"Unsupported rankings file version: {header.get('version')}")
+    return header
+
+
+def _parse_last_scores(last_scores):
+    """
+    Turns a column of comma joined scores into a NaN padded array.
+    """
+    rows = [np.array(str(scores).split(','), dtype=np.float64) for scores in last_scores]
+    score_history = np.full((len(rows), max(map(len, rows), default=0)), np.nan)
+    for score_row, row in zip(score_history, rows):
+        score_row[:len(row)] = row
+    return score_history
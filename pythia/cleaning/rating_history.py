@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+from pythia.cleaning.player_index import PlayerIndex
+from sunpy.util import SunpyUserWarning
+
+__all__ = ['RatingHistory']
+
+
+class RatingHistory:
+    """
+    Append-only record of every rating update of a run.
+
+    Every update is stored as the match index (``uint32``), the slot of the
+    player (``int32``) and its new score (``float32``), in preallocated arrays
+    that double in size when full, so a recorded update takes 12 bytes.
+    Match indices above ``2**32 - 1`` are refused rather than wrapped.
+
+    Queries go through an index of the updates sorted by player and match,
+    which is built on the first query after new updates were appended.
+    """
+
+    def __init__(self, index: PlayerIndex = None, capacity=1024, default_score=1400):
+        """
+        Parameters
+        ----------
+        index : pythia.cleaning.PlayerIndex, optional
+            Index decoding the slots of the players, by default None, which
+            creates an empty index
+        capacity : int, optional
+            Number of updates to allocate room for, by default 1024
+        default_score : int, optional
+            Score of players before their first update, by default 1400
+        """
+        self.index = index if index is not None else PlayerIndex()
+        self.default_score = default_score
+        self._matches = np.empty(capacity, dtype=np.uint32)
+        self._slots = np.empty(capacity, dtype=np.int32)
+        self._scores = np.empty(capacity, dtype=np.float32)
+        self._size = 0
+        self._sorted = None
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def matches(self):
+        """
+        `numpy.ndarray` of the match index of every update, in the order recorded.
+        """
+        return self._matches[:self._size]
+
+    @property
+    def slots(self):
+        """
+        `numpy.ndarray` of the player slot of every update, in the order recorded.
+        """
+        return self._slots[:self._size]
+
+    @property
+    def scores(self):
+        """
+        `numpy.ndarray` of the new score of every update, in the order recorded.
+        """
+        return self._scores[:self._size]
+
+    @property
+    def nbytes(self):
+        """
+        Number of bytes held by the recorded updates.
+        """
+        return self.matches.nbytes + self.slots.nbytes + self.scores.nbytes
+
+    def append(self, matches, slots, scores):
+        """
+        Records a batch of rating updates.
+
+        Parameters
+        ----------
+        matches : numpy.ndarray
+            Index of the match of every update.
+        slots : numpy.ndarray
+            Slot of the updated player.
+        scores : numpy.ndarray
+            New score of the player.
+
+        Raises
+        ------
+        SunpyUserWarning
+            If a match index does not fit in 32 bits.
+        """
+        matches = np.asarray(matches)
+        if len(matches) and (matches.min() < 0 or matches.max() > np.iinfo(np.uint32).max):
+            raise SunpyUserWarning("Match indices must be between 0 and 2**32 - 1 to be recorded.")
+
+        n_updates = len(matches)
+        end = self._size + n_updates
+        if end > len(self._matches):
+            capacity = max(end, 2 * len(self._matches))
+            extra = capacity - self._size
+            self._matches = np.concatenate([self.matches, np.empty(extra, dtype=np.uint32)])
+            self._slots = np.concatenate([self.slots, np.empty(extra, dtype=np.int32)])
+            self._scores = np.concatenate([self.scores, np.empty(extra, dtype=np.float32)])
+
+        self._matches[self._size:end] = matches
+        self._slots[self._size:end] = slots
+        self._scores[self._size:end] = scores
+        self._size = end
+        self._sorted = None
+
+    def _sort(self):
+        """
+        Builds the query index: the updates ordered by player and then match, and where every
+        player starts.
+        """
+        if self._sorted is None:
+            order = np.lexsort((self.matches, self.slots))
+            slots = self.slots[order]
+            keys = slots.astype(np.int64) << 32 | self.matches[order].astype(np.int64)
+            starts = np.searchsorted(slots, np.arange(len(self.index) + 1))
+            self._sorted = (order, keys, starts)
+        return self._sorted
+
+    def trajectory(self, player_id):
+        """
+        Returns every score of one player, in match order.
+
+        Parameters
+        ----------
+        player_id : int or str
+            Id of the player.
+
+        Returns
+        -------
+        trajectory : pandas.Series
+            The scores of the player, indexed by match.
+
+        Raises
+        ------
+        KeyError
+            If the player is not in the index.
+        """
+        slot = self.index.encode([player_id], add=False)[0]
+        if slot < 0:
+            raise KeyError(f"Unknown player id: {player_id}")
+
+        order, _, starts = self._sort()
+        updates = order[starts[slot]:starts[slot + 1]]
+        return pd.Series(self.scores[updates], index=pd.Index(self.matches[updates], name='match'),
+                         name=player_id)
+
+    def scores_at(self, match):
+        """
+        Returns the score of every player right after a given match.
+
+        Parameters
+        ----------
+        match : int
+            Index of the match.
+
+        Returns
+        -------
+        scores : pandas.Series
+            The latest score of every player, indexed by player id.
+            Players without an update up to the match get the default score.
+        """
+        order, keys, starts = self._sort()
+        slots = np.arange(len(self.index), dtype=np.int64)
+        # Position of the last update of every player at or before the match.
+        last = np.searchsorted(keys, slots << 32 | match, side='right') - 1
+        found = last >= starts[:-1]
+
+        scores = np.full(len(slots), self.default_score, dtype=np.float32)
+        scores[found] = self.scores[order[last[found]]]
+        return pd.Series(scores, index=self.index.ids, name=match)
+
+    def to_frame(self):
+        """
+        Returns all recorded updates as a `pandas.DataFrame`, in the order recorded.
+        """
+        return pd.DataFrame({'match': self.matches,
+                             'player id': self.index.decode(self.slots),
+                             'score': self.scores})
@@ -0,0 +1,163 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+from pythia.cleaning.array_elo import ArrayELO
+from sunpy.util import SunpyUserWarning
+
+__all__ = ['PairScheduler']
+
+
+class PairScheduler:
+    """
+    Proposes the next pairs of Sunspotter images to be classified.
+
+    Rather than pairing random images among the least classified ones, every
+    proposed pair joins the image most in need of comparisons, the one with the
+    fewest comparisons and then the most uncertain rating, with the neediest image
+    among its nearest neighbours in score, whose comparison is the most informative.
+
+    Images are kept in a binary heap keyed on their number of comparisons, counting
+    proposals still awaiting a result, and their rating standard deviation. Entries
+    are invalidated lazily, so that results only update the images they involve.
+    """
+
+    def __init__(self, elo: ArrayELO, *, window=10):
+        """
+        Parameters
+        ----------
+        elo : pythia.cleaning.ArrayELO
+            Rating engine holding the current ratings. Images that were compared
+            ``max_comparisons`` times are no longer proposed.
+        window : int, optional
+            Number of images on either side in score order that are considered
+            as the partner of an image, by default 10
+
+        Raises
+        ------
+        SunpyUserWarning
+            If the rating engine does not keep its state in arrays.
+        """
+        if not isinstance(elo, ArrayELO):
+            raise SunpyUserWarning("The pair scheduler needs the rating state of an ArrayELO "
+                                   "engine.")
+
+        self.elo = elo
+        self.window = window
+        self.pending = np.zeros(0, dtype=np.int64)
+        self._versions = np.zeros(0, dtype=np.int64)
+        self._heap = []
+        self._order = None
+        self._push(np.arange(len(elo.index)))
+
+    def _push(self, slots):
+        """
+        Adds heap entries with the current keys of the players, invalidating their older entries.
+        """
+        n_players = len(self.elo.index)
+        if len(self._versions) < n_players:
+            extra = np.zeros(n_players - len(self._versions), dtype=np.int64)
+            self.pending = np.concatenate([self.pending, extra])
+            self._versions = np.concatenate([self._versions, extra])
+
+        self._versions[slots] += 1
+        entries = list(zip((self.elo.counts[slots] + self.pending[slots]).tolist(),
+                           (-self.elo.std_devs[slots]).tolist(), slots.tolist(),
+                           self._versions[slots].tolist()))
+
+        if len(self._heap) + len(entries) > 4 * n_players:
+            # Too many stale entries, rebuild the heap from the current keys.
+            self._heap = []
+            self._push(np.arange(n_players))
+        elif len(entries) > len(self._heap):
+            self._heap.extend(entries)
+            heapq.heapify(self._heap)
+        else:
+            for entry in entries:
+                heapq.heappush(self._heap, entry)
+
+    def propose(self, n_pairs=100):
+        """
+        Proposes the next pairs of images to be classified.
+
+        Every image is proposed at most once per call. Proposed images count as
+        compared until their result is passed to `update`.
+
+        Parameters
+        ----------
+        n_pairs : int, optional
+            Number of pairs to propose, by default 100
+
+        Returns
+        -------
+        pairs : pandas.DataFrame
+            The proposed pairs, with the image id columns of the score board.
+            Fewer pairs are returned if too few images need comparisons.
+        """
+        elo = self.elo
+        n_players = len(elo.index)
+        scores = elo.scores[:n_players]
+        if self._order is None:
+            self._order = np.argsort(scores, kind='stable')
+            self._rank = np.empty(n_players, dtype=np.int64)
+            self._rank[self._order] = np.arange(n_players)
+
+        needed = ((elo.counts[:n_players] + self.pending) < elo.max_comparisions).tolist()
+        comparisons = (elo.counts[:n_players] + self.pending).tolist()
+        score = scores.tolist()
+
+        used = set()
+        popped = []
+        pairs = []
+        while len(pairs) < n_pairs and self._heap:
+            count, _, slot, version = heapq.heappop(self._heap)
+            if version != self._versions[slot]:
+                continue
+            popped.append(slot)
+            if count >= elo.max_comparisions:
+                # Every remaining image has at least as many comparisons.
+                break
+            if slot in used:
+                continue
+
+            position = self._rank[slot]
+            partner, partner_key = None, None
+            neighbours = self._order[max(position - self.window, 0):position + self.window + 1]
+            for candidate in neighbours.tolist():
+                if candidate == slot or candidate in used or not needed[candidate]:
+                    continue
+                key = (comparisons[candidate], abs(score[candidate] - score[slot]))
+                if partner is None or key < partner_key:
+                    partner, partner_key = candidate, key
+            if partner is None:
+                continue
+
+            used.update((slot, partner))
+            pairs.append((slot, partner))
+
+        pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        np.add.at(self.pending, pairs.ravel(), 1)
+        self._push(np.unique(np.concatenate([popped, pairs.ravel()]).astype(np.int64)))
+
+        return pd.DataFrame({elo.column_map['player 0']: elo.index.decode(pairs[:, 0]),
+                             elo.column_map['player 1']: elo.index.decode(pairs[:, 1])})
+
+    def update(self, score_board: pd.DataFrame):
+        """
+        Rates the results of classified pairs and updates the priorities of their images.
+
+        Parameters
+        ----------
+        score_board : pandas.DataFrame
+            DataFrame holding the scores of the classified pairs.
+        """
+        elo = self.elo
+        elo.update(score_board)
+
+        slots = elo.index.encode(pd.concat([score_board[elo.column_map['player 0']],
+                                            score_board[elo.column_map['player 1']]]), add=False)
+        self._push(np.arange(len(self._versions), len(elo.index)))
+        np.subtract.at(self.pending, slots, 1)
+        np.maximum(self.pending, 0, out=self.pending)
+        self._push(np.unique(slots))
+        self._order = None
@@ -0,0 +1,205 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+from pythia.cleaning.elo import _check_column_map
+from pythia.cleaning.player_index import PlayerIndex
+from sunpy.util import SunpyUserWarning
+
+__all__ = ['ELOSweep']
+
+# Hyperparameters of `~pythia.cleaning.ELO` that can be swept, with their defaults.
+SWEEP_PARAMETERS = {'k_value': 32, 'score_memory': 10,
+                    'min_score_change': 16, 'max_score_change': 32}
+
+
+class ELOSweep:
+    """
+    Evaluates many ELO configurations in a single pass over the score board.
+
+    Every configuration gets its own rating state, stacked along an extra array
+    axis, so that one walk through the matches updates all of them at once.
+    The ratings are trained on the first part of the score board, and every
+    configuration is scored on how well it predicts the held out matches.
+    """
+
+    def __init__(self, score_board: pd.DataFrame, param_grid, *, test_size=0.2, shuffle=False,
+                 random_state=None, default_score=1400,
+                 column_map={"player 0": "image_id_0",
+                             "player 1": "image_id_1",
+                             "score for player 0": "image0_more_complex_image1"}):
+        """
+        Parameters
+        ----------
+        score_board : pandas.DataFrame
+            DataFrame holding the scores of individual matches.
+        param_grid : dict or list of dict
+            Either a dictionary mapping any of 'k_value', 'score_memory',
+            'min_score_change' and 'max_score_change' to a list of values, of
+            which every combination is evaluated, or a list of such dictionaries
+            mapping to single values, one per configuration. Parameters left out
+            take the defaults of `~pythia.cleaning.ELO`.
+        test_size : float, optional
+            Fraction of the matches held out for evaluation, by default 0.2
+        shuffle : bool, optional
+            If False, the last matches are held out, otherwise a random subset
+            of matches is held out, by default False
+        random_state : int, optional
+            Seed for the random hold out, by default None
+        default_score : int, optional
+            Initial rating, by default 1400
+        column_map : dict, optional
+            Dictionary, for mapping the column names of the score_board dataframe
+            to variable names used in the ELO ranking system.
+            by default {"player 0": "image_id_0",
+                                    "player 1": "image_id_1",
+                                    "score for player 0": "image0_more_complex_image1"}
+
+        Raises
+        ------
+        SunpyUserWarning
+            If the parameter grid holds parameters that cannot be swept.
+        """
+        self.score_board = score_board
+        self.test_size = test_size
+        self.shuffle = shuffle
+        self.random_state = random_state
+        self.default_score = default_score
+        self.column_map = column_map
+
+        _check_column_map(self.score_board, self.column_map)
+
+        if isinstance(param_grid, dict):
+            names = list(param_grid)
+            param_grid = [dict(zip(names, values))
+                          for values in itertools.product(*param_grid.values())]
+
+        unknown = set().union(*param_grid) - set(SWEEP_PARAMETERS)
+        if unknown:
+            raise SunpyUserWarning("The following parameters cannot be swept: "
+                                   f"{', '.join(sorted(unknown))}")
+
+        self.configurations = pd.DataFrame(
+            [{**SWEEP_PARAMETERS, **params} for params in param_grid],
+            columns=list(SWEEP_PARAMETERS))
+
+        self._encode()
+
+    def _encode(self):
+        """
+        Encodes the score board and splits it into training and held out matches.
+        """
+        self.index = PlayerIndex()
+        player_0, player_1 = self.index.encode_pairs(self.score_board[self.column_map['player 0']],
+                                                     self.score_board[self.column_map['player 1']])
+        outcome = self.score_board[self.column_map['score for player 0']].to_numpy(dtype=np.float64)
+
+        n_matches = len(outcome)
+        n_test = int(round(n_matches * self.test_size))
+        test = np.zeros(n_matches, dtype=bool)
+        if self.shuffle:
+            rng = np.random.default_rng(self.random_state)
+            test[rng.choice(n_matches, n_test, replace=False)] = True
+        else:
+            test[n_matches - n_test:] = True
+
+        self.train = (player_0[~test], player_1[~test], outcome[~test])
+        self.test = (player_0[test], player_1[test], outcome[test])
+
+    def run(self):
+        """
+        Trains every configuration on the training matches and scores it on the held out matches.
+
+        Returns
+        -------
+        results : pandas.DataFrame
+            The configurations, with the ``accuracy`` and ``log loss`` of their
+            predictions of the held out matches.
+
+        Notes
+        -----
+        The final scores of all configurations are kept in the ``scores`` attribute,
+        an array of shape ``(n_configurations, n_players)``.
+        """
+        config = self.configurations
+        n_configs, n_players = len(config), len(self.index)
+        k_value = config['k_value'].to_numpy(dtype=np.float64)
+        min_score_change = config['min_score_change'].to_numpy(dtype=np.float64)
+        max_score_change = config['max_score_change'].to_numpy(dtype=np.float64)
+        score_memory = config['score_memory'].to_numpy(dtype=np.int64)
+        width = score_memory.max()
+
+        # State arrays are indexed by player first, so that the state of one player,
+        # across all configurations, is a contiguous row.
+        scores = np.full((n_players, n_configs), float(self.default_score))
+        k_values = np.repeat(k_value[None, :], n_players, axis=0)
+        # Flattened ring buffers, `width` entries per player and configuration, of which every
+        # configuration uses the first `score_memory`. Unused entries hold zero.
+        memory = np.zeros((n_players, n_configs, width))
+        memory[:, :, 0] = self.default_score
+        memory = memory.ravel()
+        memory_len = np.ones((n_players, n_configs))
+        memory_pos = np.repeat((1 % score_memory)[None, :], n_players, axis=0)
+        # Running sums of the ring buffers, from which the standard deviations follow.
+        memory_sum = np.full((n_players, n_configs), float(self.default_score))
+        memory_squares = memory_sum ** 2
+
+        offsets = np.arange(n_configs) * width
+        sign = np.array([[1.0], [-1.0]])
+        log_10 = np.log(10)
+
+        for image_0, image_1, result in zip(*(array.tolist() for array in self.train)):
+            if image_0 == image_1:
+                continue
+            images = [image_0, image_1]
+
+            current = scores.take(images, axis=0)
+            expected_0 = 1.0 / (1.0 + np.exp((current[1] - current[0]) * (log_10 / 400.00)))
+            new_scores = current + k_values.take(images, axis=0) * (sign * (result - expected_0))
+
+            pos = memory_pos.take(images, axis=0)
+            ring = (np.array(images)[:, None] * (n_configs * width) + offsets) + pos
+            evicted = memory.take(ring)
+            memory[ring] = new_scores
+
+            pos += 1
+            pos[pos == score_memory] = 0
+            memory_pos[images] = pos
+            length = memory_len.take(images, axis=0)
+            length += length < score_memory
+            memory_len[images] = length
+
+            total = memory_sum.take(images, axis=0) + (new_scores - evicted)
+            squares = (memory_squares.take(images, axis=0) +
+                       (new_scores * new_scores - evicted * evicted))
+            memory_sum[images] = total
+            memory_squares[images] = squares
+
+            mean = total / length
+            std_dev = np.sqrt(np.maximum(squares / length - mean * mean, 0))
+
+            scores[images] = new_scores
+            k_values[images] = np.minimum(np.maximum(std_dev, min_score_change), max_score_change)
+
+        scores = scores.T
+        self.scores = scores
+        return self._evaluate(scores)
+
+    def _evaluate(self, scores):
+        """
+        Scores the predictions of the held out matches by every configuration.
+        """
+        player_0, player_1, outcome = self.test
+        valid = player_0 != player_1
+        player_0, player_1, outcome = player_0[valid], player_1[valid], outcome[valid]
+
+        expected_0 = 1.0 / (1.0 + 10 ** ((scores[:, player_1] - scores[:, player_0]) / 400.00))
+        # Predictions of exactly one half count as half right.
+        correct = np.where(expected_0 == 0.5, 0.5, (expected_0 > 0.5) == (outcome > 0.5))
+        probability = np.clip(expected_0, 1e-15, 1 - 1e-15)
+        log_loss = -(outcome * np.log(probability) + (1 - outcome) * np.log(1 - probability))
+
+        results = self.configurations.copy()
+        results['accuracy'] = correct.mean(axis=1) if len(outcome) else np.nan
+        results['log loss'] = log_loss.mean(axis=1) if len(outcome) else np.nan
+        return results
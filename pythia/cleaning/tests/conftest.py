@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def random_score_board():
+    """
+    Returns a function making a score board of random matches with random outcomes.
+    """
+    def make(n_images, n_matches, seed=0):
+        rng = np.random.default_rng(seed)
+        return pd.DataFrame({'image_id_0': rng.integers(0, n_images, n_matches),
+                             'image_id_1': rng.integers(0, n_images, n_matches),
+                             'image0_more_complex_image1': rng.integers(0, 2, n_matches)})
+    return make
+
+
+@pytest.fixture
+def strength_score_board():
+    """
+    Returns a function making a score board of random matches, whose outcomes follow
+    a logistic model of image strengths evenly spread between -2 and 2.
+    """
+    def make(n_images, n_matches, seed=0):
+        rng = np.random.default_rng(seed)
+        strength = np.linspace(-2, 2, n_images)
+        image_0 = rng.integers(0, n_images, n_matches)
+        image_1 = rng.integers(0, n_images, n_matches)
+        probability = 1 / (1 + np.exp(strength[image_1] - strength[image_0]))
+        outcome = (rng.random(n_matches) < probability).astype(int)
+        return pd.DataFrame({'image_id_0': image_0,
+                             'image_id_1': image_1,
+                             'image0_more_complex_image1': outcome})
+    return make
@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pythia.cleaning import ELO, ArrayELO
+from sunpy.util import SunpyUserWarning
+
+
+@pytest.fixture
+def score_board(random_score_board):
+    return random_score_board(n_images=15, n_matches=200, seed=42)
+
+
+def test_same_rankings_as_elo(score_board):
+    elo = ELO(score_board)
+    elo.run(save_to_disk=False)
+    array_elo = ArrayELO(score_board)
+    array_elo.run(save_to_disk=False)
+
+    expected = elo.rankings
+    rankings = array_elo.rankings.loc[expected.index]
+
+    assert np.allclose(rankings['score'], expected['score'])
+    assert np.allclose(rankings['k value'], expected['k value'])
+    assert np.allclose(rankings['std dev'], expected['std dev'])
+    assert np.array_equal(rankings['count'], expected['count'])
+
+    for last, expected_last in zip(rankings['last scores'], expected['last scores']):
+        assert np.allclose(list(map(float, last.split(','))),
+                           list(map(float, expected_last.split(','))))
+
+
+@pytest.mark.parametrize('record_history', [False, True])
+def test_levels_same_as_sequential(random_score_board, monkeypatch, record_history):
+    score_board = random_score_board(n_images=500, n_matches=3000, seed=7)
+    levels = ArrayELO(score_board, record_history=record_history)
+    levels.run(save_to_disk=False)
+    monkeypatch.setattr('pythia.cleaning.array_elo._MIN_LEVEL_WIDTH', np.inf)
+    sequential = ArrayELO(score_board, record_history=record_history)
+    sequential.run(save_to_disk=False)
+
+    pd.testing.assert_frame_equal(levels.rankings, sequential.rankings)
+    if record_history:
+        pd.testing.assert_frame_equal(levels.history.to_frame(), sequential.history.to_frame())
+
+
+def test_last_scores_follow_updates(score_board):
+    elo = ArrayELO(score_board)
+    elo.run(save_to_disk=False)
+    last_scores = elo.rankings.loc[0, 'last scores'].split(',')
+    elo.score_update(0, 1, 1)
+
+    # The oldest score leaves the full score memory.
+    new_score = str(elo.rankings.loc[0, 'score'])
+    assert elo.rankings.loc[0, 'last scores'].split(',') == last_scores[1:] + [new_score]
+
+
+def test_self_matches_skipped():
+    score_board = pd.DataFrame({'image_id_0': [1, 2, 1],
+                                'image_id_1': [1, 3, 3],
+                                'image0_more_complex_image1': [1, 1, 0]})
+    elo = ArrayELO(score_board)
+    elo.run(save_to_disk=False)
+
+    assert elo.rankings.loc[1, 'count'] == 1
+    assert elo.rankings.loc[3, 'count'] == 2
+
+
+def test_score_update():
+    score_board = pd.DataFrame({'image_id_0': ['a'],
+                                'image_id_1': ['b'],
+                                'image0_more_complex_image1': [1]})
+    elo = ArrayELO(score_board)
+    elo.score_update('a', 'b', 1)
+
+    assert elo.rankings.loc['a', 'score'] == 1416.0
+    assert elo.rankings.loc['b', 'score'] == 1384.0
+    assert elo.rankings.loc['a', 'last scores'] == '1400.0,1416.0'
+
+
+def test_save_as_csv(score_board, tmp_path):
+    elo = ArrayELO(score_board)
+    elo.run(filename=tmp_path / 'rankings.csv')
+
+    saved = pd.read_csv(tmp_path / 'rankings.csv', index_col=0)
+    assert 'last scores' not in saved.columns
+    assert np.allclose(saved.loc[elo.rankings.index, 'score'], elo.rankings['score'])
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 1000])
+def test_streaming_from_path(score_board, tmp_path, chunksize):
+    score_board.to_csv(tmp_path / 'classifications.csv', sep=';')
+    elo = ArrayELO(score_board)
+    elo.run(save_to_disk=False)
+    streamed = ArrayELO(tmp_path / 'classifications.csv', chunksize=chunksize)
+    streamed.run(save_to_disk=False)
+
+    assert streamed.streaming
+    assert np.allclose(streamed.rankings.loc[elo.rankings.index, 'score'], elo.rankings['score'])
+
+
+def test_streaming_from_chunks(score_board):
+    elo = ArrayELO(score_board)
+    elo.run(save_to_disk=False)
+    streamed = ArrayELO(score_board.iloc[i:i + 30] for i in range(0, len(score_board), 30))
+    streamed.run(save_to_disk=False)
+
+    assert np.allclose(streamed.rankings.loc[elo.rankings.index, 'score'], elo.rankings['score'])
+    assert np.array_equal(streamed.rankings.loc[elo.rankings.index, 'count'], elo.rankings['count'])
+
+
+def test_update_adds_players(score_board):
+    elo = ArrayELO(score_board)
+    elo.run(save_to_disk=False)
+    elo.update(pd.DataFrame({'image_id_0': [100], 'image_id_1': [0],
+                             'image0_more_complex_image1': [1]}))
+
+    assert len(elo.rankings) == 16
+    assert elo.rankings.loc[100, 'count'] == 1
+
+
+def test_streaming_missing_columns(score_board):
+    elo = ArrayELO(iter([score_board.rename(columns={'image_id_0': 'player'})]))
+    with pytest.raises(SunpyUserWarning):
+        elo.run(save_to_disk=False)
+
+
+def test_checkpoint_resume(score_board, tmp_path):
+    elo = ArrayELO(score_board)
+    elo.run(save_to_disk=False)
+
+    partial = ArrayELO(score_board.iloc[:120], k_value=32)
+    partial.run(save_to_disk=False)
+    partial.save_checkpoint(tmp_path / 'checkpoint.npz')
+
+    resumed = ArrayELO.from_checkpoint(tmp_path / 'checkpoint.npz', score_board)
+    assert resumed.matches_processed == 120
+    resumed.run(save_to_disk=False)
+
+    assert resumed.matches_processed == len(score_board)
+    rankings = resumed.rankings.loc[elo.rankings.index]
+    assert np.allclose(rankings['score'], elo.rankings['score'])
+    assert np.array_equal(rankings['count'], elo.rankings['count'])
+    assert list(rankings['last scores']) == list(elo.rankings['last scores'])
+
+
+def test_checkpoint_resume_streaming(score_board, tmp_path):
+    score_board.to_csv(tmp_path / 'classifications.csv', sep=';')
+    elo = ArrayELO(score_board)
+    elo.run(save_to_disk=False)
+
+    partial = ArrayELO(score_board.iloc[:50])
+    partial.run(save_to_disk=False)
+    partial.save_checkpoint(tmp_path / 'checkpoint.npz')
+
+    resumed = ArrayELO.from_checkpoint(tmp_path / 'checkpoint.npz',
+                                       tmp_path / 'classifications.csv', chunksize=33)
+    resumed.run(save_to_disk=False)
+    assert np.allclose(resumed.rankings.loc[elo.rankings.index, 'score'], elo.rankings['score'])
+
+    new_matches = ArrayELO.from_checkpoint(tmp_path / 'checkpoint.npz', score_board.iloc[50:],
+                                           skip_processed=False)
+    new_matches.run(save_to_disk=False)
+    assert np.allclose(new_matches.rankings.loc[elo.rankings.index, 'score'], elo.rankings['score'])
+
+
+def test_checkpoint_resume_skips_parsing(score_board, tmp_path):
+    elo = ArrayELO(score_board)
+    elo.run(save_to_disk=False)
+
+    partial = ArrayELO(score_board.iloc[:50])
+    partial.run(save_to_disk=False)
+    partial.save_checkpoint(tmp_path / 'checkpoint.npz')
+
+    # The processed rows are garbled, so the resume only works if they are never parsed.
+    score_board.to_csv(tmp_path / 'classifications.csv', sep=';')
+    lines = (tmp_path / 'classifications.csv').read_text().splitlines(keepends=True)
+    lines[1:51] = ['not;a;valid;row;at;all\n'] * 50
+    (tmp_path / 'classifications.csv').write_text(''.join(lines))
+
+    resumed = ArrayELO.from_checkpoint(tmp_path / 'checkpoint.npz',
+                                       tmp_path / 'classifications.csv', chunksize=33)
+    resumed.run(save_to_disk=False)
+
+    assert resumed.matches_processed == len(score_board)
+    pd.testing.assert_frame_equal(resumed.rankings.loc[elo.rankings.index], elo.rankings)
+
+
+def test_checkpoint_string_ids(tmp_path):
+    score_board = pd.DataFrame({'image_id_0': ['a', 'b'],
+                                'image_id_1': ['b', 'c'],
+                                'image0_more_complex_image1': [1, 0]})
+    elo = ArrayELO(score_board, score_memory=3)
+    elo.run(save_to_disk=False)
+    elo.save_checkpoint(tmp_path / 'checkpoint.npz')
+
+    restored = ArrayELO.from_checkpoint(tmp_path / 'checkpoint.npz', score_board.iloc[:0])
+    assert restored.score_memory == 3
+    pd.testing.assert_frame_equal(restored.rankings, elo.rankings)
+
+    with pytest.raises(SunpyUserWarning):
+        ArrayELO(score_board, checkpoint=tmp_path / 'checkpoint.npz', score_memory=5)
+
+
+@pytest.mark.parametrize('resample', [False, True])
+def test_bootstrap(score_board, resample):
+    elo = ArrayELO(score_board)
+    bootstrap = elo.bootstrap(20, resample=resample, n_jobs=1, random_state=0)
+
+    assert list(bootstrap.index) == list(elo.rankings.index)
+    assert (bootstrap['lower score'] <= bootstrap['mean score']).all()
+    assert (bootstrap['mean score'] <= bootstrap['upper score']).all()
+    assert bootstrap['mean rank'].between(1, len(bootstrap)).all()
+    assert pytest.approx(bootstrap['mean rank'].sum()) == len(bootstrap) * (len(bootstrap) + 1) / 2
+
+
+def test_bootstrap_process_pool(score_board):
+    elo = ArrayELO(score_board)
+    serial = elo.bootstrap(8, n_jobs=1, random_state=1)
+    parallel = elo.bootstrap(8, n_jobs=2, random_state=1)
+
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+def test_bootstrap_streaming(score_board):
+    with pytest.raises(SunpyUserWarning):
+        ArrayELO(iter([score_board])).bootstrap(2)
+
+
+def test_bootstrap_after_resume(score_board, tmp_path):
+    partial = ArrayELO(score_board.iloc[:50])
+    partial.run(save_to_disk=False)
+    partial.save_checkpoint(tmp_path / 'checkpoint.npz')
+
+    resumed = ArrayELO.from_checkpoint(tmp_path / 'checkpoint.npz', score_board)
+    with pytest.raises(SunpyUserWarning):
+        resumed.bootstrap(2, n_jobs=1)
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pythia.cleaning import ELO, BradleyTerry
+from sunpy.util import SunpyUserWarning
+
+
+@pytest.fixture
+def score_board(strength_score_board):
+    return strength_score_board(n_images=20, n_matches=2000)
+
+
+def test_rankings_layout(score_board):
+    bradley_terry = BradleyTerry(score_board)
+    bradley_terry.run(save_to_disk=False)
+    elo = ELO(score_board)
+
+    assert list(bradley_terry.rankings.columns) == list(elo.rankings.columns)
+    assert bradley_terry.rankings.index.name == 'player id'
+    assert set(bradley_terry.rankings.index) == set(elo.rankings.index)
+
+
+def test_recovers_order(score_board):
+    bradley_terry = BradleyTerry(score_board)
+    bradley_terry.run(save_to_disk=False)
+
+    assert bradley_terry.converged
+    scores = bradley_terry.rankings['score'].sort_index()
+    assert np.corrcoef(scores, np.arange(20))[0, 1] > 0.95
+
+
+def test_newton_matches_mm(score_board):
+    newton = BradleyTerry(score_board, tol=1e-10)
+    newton.run(save_to_disk=False)
+    mm = BradleyTerry(score_board, method='mm', tol=1e-10)
+    mm.run(save_to_disk=False)
+
+    assert np.allclose(newton.rankings['score'], mm.rankings['score'], atol=1e-4)
+
+
+def test_order_independent(score_board):
+    bradley_terry = BradleyTerry(score_board)
+    bradley_terry.run(save_to_disk=False)
+    shuffled = BradleyTerry(score_board.sample(frac=1, random_state=1))
+    shuffled.run(save_to_disk=False)
+
+    assert np.allclose(shuffled.rankings.loc[bradley_terry.rankings.index, 'score'],
+                       bradley_terry.rankings['score'])
+
+
+def test_std_devs_match_bootstrap(score_board):
+    bradley_terry = BradleyTerry(score_board)
+    bradley_terry.run(save_to_disk=False)
+
+    rng = np.random.default_rng(1)
+    samples = []
+    for _ in range(100):
+        matches = rng.integers(0, len(score_board), len(score_board))
+        resampled = BradleyTerry(score_board.iloc[matches])
+        resampled.run(save_to_disk=False)
+        scores = resampled.rankings['score']
+        samples.append(scores - scores.mean())
+    spread = pd.concat(samples, axis=1).std(axis=1)
+
+    ratio = bradley_terry.rankings['std dev'] / spread.loc[bradley_terry.rankings.index]
+    assert np.isclose(ratio.mean(), 1, atol=0.1)
+    assert np.allclose(ratio, 1, atol=0.3)
+
+
+@pytest.mark.parametrize('prior', [1.0, 0.0])
+def test_std_devs_estimate(score_board, prior, monkeypatch):
+    bradley_terry = BradleyTerry(score_board, prior=prior)
+    bradley_terry.run(save_to_disk=False)
+    exact = bradley_terry.std_devs
+
+    monkeypatch.setattr('pythia.cleaning.bradley_terry._max_exact_size', 0)
+    bradley_terry.run(save_to_disk=False)
+
+    assert np.allclose(bradley_terry.std_devs, exact, rtol=0.1)
+
+
+def test_wins_matrix():
+    score_board = pd.DataFrame({'image_id_0': [1, 1, 2, 3],
+                                'image_id_1': [2, 2, 3, 3],
+                                'image0_more_complex_image1': [1, 0, 1, 1]})
+    bradley_terry = BradleyTerry(score_board)
+
+    assert np.array_equal(bradley_terry.wins.toarray(), [[0, 1, 0], [1, 0, 1], [0, 0, 0]])
+
+
+def test_incorrect_method(score_board):
+    with pytest.raises(SunpyUserWarning):
+        BradleyTerry(score_board, method='notAMethod')
+
+
+def test_incorrect_column_map(score_board):
+    with pytest.raises(SunpyUserWarning):
+        BradleyTerry(score_board,
+                     column_map={"player 0": "a", "player 1": "b", "score for player 0": "c"})
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pythia.cleaning import ClassificationCleaner
+from sunpy.util import SunpyUserWarning
+
+
+@pytest.fixture
+def classifications():
+    return pd.DataFrame({'user_id': [1, 1, 1, 2, 2, 3, 3, 3, 4],
+                         'image_id_0': [5, 5, 6, 5, 7, 8, 9, 4, 2],
+                         'image_id_1': [6, 6, 5, 6, 7, 9, 8, 4, 3],
+                         'image0_more_complex_image1': [1, 1, 0, 0, 1, 1, 1, 0, 1]},
+                        index=np.arange(10, 19))
+
+
+def test_clean(classifications):
+    cleaner = ClassificationCleaner()
+    cleaned = cleaner.clean(classifications)
+
+    # Rows 11 and 12 repeat the vote of row 10, with the images swapped for row 12.
+    # Rows 15 and 16 are contradictory votes of user 3, rows 14 and 17 are self matches.
+    assert list(cleaned.index) == [10, 13, 18]
+    assert cleaner.summary == {'rows': 9, 'self matches': 2, 'duplicates': 2,
+                               'contradictory votes': 2, 'kept': 3}
+
+
+@pytest.mark.parametrize('contradictions, kept', [('first', 15), ('last', 16)])
+def test_keep_contradictory(classifications, contradictions, kept):
+    cleaner = ClassificationCleaner(contradictions=contradictions)
+    cleaned = cleaner.clean(classifications)
+
+    assert list(cleaned.index) == sorted([10, 13, 18, kept])
+    assert cleaner.summary['contradictory votes'] == 1
+
+
+def test_clean_csv(classifications, tmp_path):
+    classifications.to_csv(tmp_path / 'classifications.csv', sep=';', index=False)
+    cleaner = ClassificationCleaner(chunksize=4)
+    summary = cleaner.clean_csv(tmp_path / 'classifications.csv', tmp_path / 'cleaned.csv')
+
+    cleaned = pd.read_csv(tmp_path / 'cleaned.csv', delimiter=';')
+    expected = ClassificationCleaner().clean(classifications).reset_index(drop=True)
+    pd.testing.assert_frame_equal(cleaned, expected)
+    assert summary == cleaner.summary
+    assert summary['kept'] == 3
+
+
+def test_string_ids():
+    classifications = pd.DataFrame({'user_id': ['u', 'u', 'v'],
+                                    'image_id_0': ['a', 'b', 'a'],
+                                    'image_id_1': ['b', 'a', 'b'],
+                                    'image0_more_complex_image1': [1, 0, 1]})
+    cleaned = ClassificationCleaner().clean(classifications)
+
+    assert list(cleaned.index) == [0, 2]
+
+
+def test_incorrect_contradictions():
+    with pytest.raises(SunpyUserWarning):
+        ClassificationCleaner(contradictions='majority')
+
+
+def test_missing_user_column(classifications):
+    with pytest.raises(SunpyUserWarning):
+        ClassificationCleaner(user_column='user').clean(classifications)
+
+
+def test_clean_csv_overwrites(classifications, tmp_path):
+    classifications.to_csv(tmp_path / 'classifications.csv', sep=';', index=False)
+    (tmp_path / 'cleaned.csv').write_text('stale\n' * 100)
+    ClassificationCleaner(chunksize=4).clean_csv(tmp_path / 'classifications.csv',
+                                                 tmp_path / 'cleaned.csv')
+
+    assert len(pd.read_csv(tmp_path / 'cleaned.csv', delimiter=';')) == 3
+
+
+def test_clean_empty_csv(classifications, tmp_path):
+    classifications.iloc[:0].to_csv(tmp_path / 'classifications.csv', sep=';', index=False)
+    summary = ClassificationCleaner().clean_csv(tmp_path / 'classifications.csv',
+                                                tmp_path / 'cleaned.csv')
+
+    assert summary == {'rows': 0, 'self matches': 0, 'duplicates': 0, 'contradictory votes': 0,
+                       'kept': 0}
+    cleaned = pd.read_csv(tmp_path / 'cleaned.csv', delimiter=';')
+    assert list(cleaned.columns) == list(classifications.columns)
+    assert len(cleaned) == 0
+
+
+def test_clean_csv_nothing_kept(classifications, tmp_path):
+    self_matches = classifications[classifications['image_id_0'] == classifications['image_id_1']]
+    self_matches.to_csv(tmp_path / 'classifications.csv', sep=';', index=False)
+    summary = ClassificationCleaner(chunksize=1).clean_csv(tmp_path / 'classifications.csv',
+                                                           tmp_path / 'cleaned.csv')
+
+    assert summary['self matches'] == 2
+    assert summary['kept'] == 0
+    cleaned = pd.read_csv(tmp_path / 'cleaned.csv', delimiter=';')
+    assert list(cleaned.columns) == list(classifications.columns)
+    assert len(cleaned) == 0
+
+
+def test_clean_empty(classifications):
+    cleaner = ClassificationCleaner()
+    cleaned = cleaner.clean(classifications.iloc[:0])
+
+    assert len(cleaned) == 0
+    assert cleaner.summary == {'rows': 0, 'self matches': 0, 'duplicates': 0,
+                               'contradictory votes': 0, 'kept': 0}
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pythia.cleaning import ArrayELO, ComparisonGraph
+from sunpy.util import SunpyUserWarning
+
+
+@pytest.fixture
+def score_board():
+    return pd.DataFrame({'image_id_0': [1, 2, 10, 3, 11, 4, 4],
+                         'image_id_1': [2, 3, 11, 1, 12, 4, 5],
+                         'image0_more_complex_image1': [1, 0, 1, 1, 0, 1, 1]})
+
+
+@pytest.fixture
+def graph(score_board):
+    return ComparisonGraph.from_score_board(score_board)
+
+
+def test_wins(graph):
+    wins = pd.DataFrame(graph.wins.toarray(), index=graph.index.ids, columns=graph.index.ids)
+
+    assert wins.loc[1, 2] == 1
+    assert wins.loc[2, 1] == 0
+    assert wins.loc[3, 2] == 1
+    assert wins.loc[12, 11] == 1
+    # Self matches are left out.
+    assert wins.loc[4, 4] == 0
+    assert graph.wins.sum() == 6
+
+
+def test_components(graph):
+    components = graph.components()
+
+    assert components[1] == components[2] == components[3]
+    assert components[10] == components[11] == components[12]
+    assert components[4] == components[5]
+    assert len(set(components)) == 3
+    assert list(graph.component_sizes()) == [3, 3, 2]
+
+
+def test_degree(graph):
+    degree = pd.Series(graph.degree, index=graph.index.ids)
+
+    assert degree[1] == 2
+    assert degree[11] == 2
+    assert degree[4] == 1
+    assert list(graph.n_opponents) == list(graph.degree)
+    assert graph.degree_distribution().to_dict() == {1: 4, 2: 4}
+
+
+def test_under_compared(graph):
+    assert set(graph.under_compared(2)) == {4, 5, 10, 12}
+    assert len(graph.under_compared(1)) == 0
+
+
+def test_parallel_run_matches_serial():
+    rng = np.random.default_rng(7)
+    # Two groups of images that are never compared with each other.
+    image_0 = rng.integers(0, 10, 300) + 100 * rng.integers(0, 2, 300)
+    image_1 = rng.integers(0, 10, 300) + 100 * (image_0 // 100)
+    score_board = pd.DataFrame({'image_id_0': image_0,
+                                'image_id_1': image_1,
+                                'image0_more_complex_image1': rng.integers(0, 2, 300)})
+
+    serial = ArrayELO(score_board)
+    serial.run(save_to_disk=False)
+    parallel = ArrayELO(score_board)
+    parallel.run(save_to_disk=False, n_jobs=2)
+
+    pd.testing.assert_frame_equal(parallel.rankings, serial.rankings)
+    assert parallel.matches_processed == 300
+
+
+def test_parallel_run_streaming(score_board):
+    elo = ArrayELO(iter([score_board]))
+    with pytest.raises(SunpyUserWarning):
+        elo.run(save_to_disk=False, n_jobs=2)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pythia.cleaning import ArrayELO, RankingEvaluator
+
+
+@pytest.fixture
+def rankings():
+    return pd.DataFrame({'score': [1400.0, 1600.0, 1200.0]},
+                        index=pd.Index([1, 2, 3], name='player id'))
+
+
+@pytest.fixture
+def comparisons():
+    return pd.DataFrame({'image_id_0': [2, 1, 3, 1, 4, 2],
+                         'image_id_1': [1, 3, 2, 1, 1, 3],
+                         'image0_more_complex_image1': [1, 1, 0, 1, 0, 1]})
+
+
+def test_predict(rankings, comparisons):
+    evaluator = RankingEvaluator(rankings)
+    predicted = evaluator.predict(comparisons)
+
+    assert pytest.approx(predicted[0]) == 1 / (1 + 10 ** (-0.5))
+    assert pytest.approx(predicted[4]) == 0.5  # image 4 is unranked
+
+
+def test_evaluate(rankings, comparisons):
+    metrics = RankingEvaluator(rankings).evaluate(comparisons)
+    # The self match is left out.
+    predicted = np.array([1 / (1 + 10 ** -0.5), 1 / (1 + 10 ** -0.5), 1 / (1 + 10 ** 1.0), 0.5,
+                          1 / (1 + 10 ** -1.0)])
+    outcome = np.array([1, 1, 0, 0, 1])
+
+    assert metrics['n'] == 5
+    assert pytest.approx(metrics['accuracy']) == 4.5 / 5
+    assert pytest.approx(metrics['brier score']) == np.mean((predicted - outcome) ** 2)
+    assert pytest.approx(metrics['log loss']) == -np.mean(outcome * np.log(predicted) +
+                                                          (1 - outcome) * np.log(1 - predicted))
+    assert len(metrics['calibration']) == 10
+    assert list(metrics['calibration']['count']) == [1, 0, 0, 0, 0, 1, 0, 2, 0, 1]
+
+
+def test_evaluate_chunks(comparisons, random_score_board, tmp_path):
+    score_board = random_score_board(n_images=30, n_matches=500)
+    elo = ArrayELO(score_board.iloc[:400])
+    elo.run(filename=tmp_path / 'rankings.csv')
+    score_board.iloc[400:].to_csv(tmp_path / 'comparisons.csv', sep=';')
+
+    evaluator = RankingEvaluator(tmp_path / 'rankings.csv')
+    metrics = evaluator.evaluate(score_board.iloc[400:])
+    streamed = evaluator.evaluate_chunks(tmp_path / 'comparisons.csv', chunksize=7)
+
+    for name in ['n', 'log loss', 'brier score', 'accuracy']:
+        assert pytest.approx(streamed[name]) == metrics[name]
+    pd.testing.assert_frame_equal(streamed['calibration'], metrics['calibration'])
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pythia.cleaning import Glicko2
+from pythia.cleaning.glicko import GLICKO2_SCALE
+from sunpy.util import SunpyUserWarning
+
+
+@pytest.fixture
+def score_board(strength_score_board):
+    score_board = strength_score_board(n_images=20, n_matches=3000)
+    score_board['created_at'] = pd.date_range('2014-01-01', periods=3000, freq='h')
+    return score_board
+
+
+def test_glickman_example():
+    # Worked example of Glickman, "Example of the Glicko-2 system".
+    score_board = pd.DataFrame({'image_id_0': [0, 0, 0],
+                                'image_id_1': [1, 2, 3],
+                                'image0_more_complex_image1': [1, 0, 0]})
+    glicko = Glicko2(score_board, default_score=1500)
+    glicko.mu[:] = (np.array([1500, 1400, 1550, 1700]) - 1500) / GLICKO2_SCALE
+    glicko.phi[:] = np.array([200, 30, 100, 300]) / GLICKO2_SCALE
+    glicko.run(save_to_disk=False)
+
+    rankings = glicko.rankings
+    assert pytest.approx(rankings.loc[0, 'score'], abs=0.01) == 1464.06
+    assert pytest.approx(rankings.loc[0, 'rating deviation'], abs=0.01) == 151.52
+    assert pytest.approx(rankings.loc[0, 'volatility'], abs=1e-5) == 0.05999
+
+
+@pytest.mark.parametrize('period,period_freq', [(100, None), ('created_at', 'D')])
+def test_recovers_order(score_board, period, period_freq):
+    glicko = Glicko2(score_board, period=period, period_freq=period_freq)
+    glicko.run(save_to_disk=False)
+
+    rankings = glicko.rankings.sort_index()
+    assert np.corrcoef(rankings['score'], np.arange(20))[0, 1] > 0.95
+    assert (rankings['rating deviation'] < 350).all()
+    assert rankings['count'].sum() == 2 * (score_board.image_id_0 != score_board.image_id_1).sum()
+
+
+def test_daily_periods(score_board):
+    glicko = Glicko2(score_board, period='created_at', period_freq='D')
+    assert len(np.unique(glicko.periods)) == 125
+
+
+def test_missing_period_column(score_board):
+    with pytest.raises(SunpyUserWarning):
+        Glicko2(score_board, period='classified_at')
+
+
+@pytest.mark.parametrize('max_deviation', [None, 350])
+def test_deviation_of_images_not_compared(max_deviation):
+    score_board = pd.DataFrame({'image_id_0': [0] + [2] * 6,
+                                'image_id_1': [1] + [3] * 6,
+                                'image0_more_complex_image1': [1, 0, 1, 0, 1, 0, 1]})
+    glicko = Glicko2(score_board, period=1, default_volatility=0.5, max_deviation=max_deviation)
+    glicko.run(save_to_disk=False)
+
+    # Images 0 and 1 are left out of the last six rating periods.
+    deviation = glicko.rankings.loc[0, 'rating deviation']
+    if max_deviation is None:
+        assert deviation > 350
+    else:
+        assert deviation == pytest.approx(350)
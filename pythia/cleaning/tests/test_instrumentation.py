@@ -0,0 +1,86 @@
+import json
+
+import numpy as np
+import pytest
+from pythia.cleaning import ELO, ArrayELO, RunMonitor, RunReport, log_progress
+
+
+@pytest.fixture
+def score_board(random_score_board):
+    return random_score_board(n_images=8, n_matches=100, seed=3)
+
+
+def test_monitor_counters():
+    reports = []
+    monitor = RunMonitor([lambda report: reports.append(report.matches_processed)],
+                         progress_every=10, snapshot_every=15)
+    for _ in range(5):
+        monitor.advance(7, n_skipped=1, scores=lambda: np.array([1400.0, 1500.0]))
+    report = monitor.finish()
+
+    assert report.matches_processed == 35
+    assert report.skipped_self_matches == 5
+    assert report.matches_rated == 30
+    assert reports == [14, 21, 35, 35]
+    assert [snapshot['matches_processed'] for snapshot in report.snapshots] == [21, 35]
+    assert report.snapshots[0]['mean'] == 1450.0
+    assert report.elapsed > 0
+
+
+def test_monitor_phase():
+    monitor = RunMonitor()
+    with monitor.phase('rating'):
+        pass
+    with monitor.phase('rating'):
+        pass
+
+    assert list(monitor.report.phases) == ['rating']
+    assert monitor.report.phases['rating'] >= 0
+
+
+def test_elo_report(score_board, capsys):
+    elo = ELO(score_board)
+    report = elo.run(save_to_disk=False, snapshot_every=50)
+
+    self_matches = (score_board['image_id_0'] == score_board['image_id_1']).sum()
+    assert elo.report is report
+    assert report.matches_processed == 100
+    assert report.skipped_self_matches == self_matches
+    assert len(report.snapshots) == 2
+    assert 'rating' in report.phases
+    # The run no longer prints a line for every match.
+    assert capsys.readouterr().out == ''
+
+
+@pytest.mark.parametrize('chunks', [False, True])
+def test_array_elo_report(score_board, chunks, tmp_path):
+    board = [score_board.iloc[:60], score_board.iloc[60:]] if chunks else score_board
+    elo = ArrayELO(board, chunksize=30)
+    progress = []
+    report = elo.run(filename=tmp_path / 'rankings.csv', callbacks=[progress.append],
+                     progress_every=25, snapshot_every=50)
+
+    assert report.matches_processed == 100
+    n_self_matches = (score_board['image_id_0'] == score_board['image_id_1']).sum()
+    assert report.skipped_self_matches == n_self_matches
+    assert len(progress) > 1
+    assert len(report.snapshots) == 2
+    assert {'rating', 'saving'} <= set(report.phases)
+    if chunks:
+        assert {'reading', 'encoding'} <= set(report.phases)
+
+
+def test_report_json(tmp_path):
+    report = RunReport()
+    report.matches_processed = 10
+    report.phases['rating'] = 0.5
+    text = report.to_json(tmp_path / 'report.json')
+
+    assert json.loads(text) == json.loads((tmp_path / 'report.json').read_text())
+    assert json.loads(text)['matches_processed'] == 10
+    assert json.loads(text)['phases'] == {'rating': 0.5}
+
+
+def test_log_progress(score_board):
+    elo = ArrayELO(score_board)
+    elo.run(save_to_disk=False, callbacks=[log_progress])
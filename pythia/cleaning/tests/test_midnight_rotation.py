@@ -1,9 +1,15 @@
 import datetime
 from pathlib import Path
 
+import astropy.units as u
+import numpy as np
+import pandas as pd
 import pytest
+from astropy.coordinates import Longitude
 from pythia.cleaning import MidnightRotation
 from pythia.seo import Sunspotter
+from sunpy.physics.differential_rotation import diff_rot
+from sunpy.util import SunpyUserWarning
 
 path = Path(__file__).resolve().parent.parent.parent.parent / "data/all_clear"
 
@@ -42,3 +48,160 @@ def test_nearest_midnight(midnight_rotation, obsdate, nearest_midnight):
                           ('2000-11-25 12:51:02', 40138.0)])
 def test_seconds_to_nearest_midnight(midnight_rotation, obsdate, seconds_to_nearest_midnight):
     assert midnight_rotation.get_seconds_to_nearest_midnight(obsdate) == seconds_to_nearest_midnight
+
+
+@pytest.fixture
+def obsdates():
+    return ['2000-02-29 12:51:02', '2000-01-01 11:47:02', '2000-01-24 12:00:00',
+            '2010-01-18 10:51:02', '2000-03-31 12:47:02', '2000-11-25 12:51:02']
+
+
+def test_nearest_midnights(midnight_rotation, obsdates):
+    expected = [midnight_rotation.get_nearest_midnight(obsdate) for obsdate in obsdates]
+    nearest_midnights = midnight_rotation.get_nearest_midnights(obsdates)
+
+    assert list(pd.DatetimeIndex(nearest_midnights).to_pydatetime()) == expected
+
+
+def test_seconds_to_nearest_midnights(midnight_rotation, obsdates):
+    expected = [midnight_rotation.get_seconds_to_nearest_midnight(obsdate) for obsdate in obsdates]
+
+    assert list(midnight_rotation.get_seconds_to_nearest_midnights(obsdates)) == expected
+    times = np.array(obsdates, dtype='datetime64[s]')
+    assert list(midnight_rotation.get_seconds_to_nearest_midnights(times)) == expected
+
+
+def test_series_index_kept(midnight_rotation, obsdates):
+    obsdates = pd.Series(obsdates, index=np.arange(10, 16))
+    seconds = midnight_rotation.get_seconds_to_nearest_midnights(obsdates)
+    nearest_midnights = midnight_rotation.get_nearest_midnights(obsdates)
+
+    assert list(seconds.index) == list(obsdates.index)
+    assert seconds[11] == -42422.0
+    assert nearest_midnights[10] == pd.Timestamp('2000-03-01')
+
+
+def test_longitudes_at_nearest_midnight(midnight_rotation, obsdates):
+    latitudes = np.linspace(-40, 40, len(obsdates)) * u.deg
+    expected = [midnight_rotation.get_longitude_at_nearest_midnight(obsdate, latitude)
+                for obsdate, latitude in zip(obsdates, latitudes)]
+    expected = u.Quantity(expected).to_value(u.deg)
+    longitudes = midnight_rotation.get_longitudes_at_nearest_midnight(obsdates, latitudes)
+
+    assert np.allclose(longitudes.to_value(u.deg), expected)
+    single = midnight_rotation.get_longitudes_at_nearest_midnight(obsdates[0], latitudes)
+    assert np.allclose(single[0].to_value(u.deg), expected[0])
+
+
+def test_add_longitudes_at_nearest_midnight(midnight_rotation, obsdates):
+    table = pd.DataFrame({'obs_date': obsdates, 'lat': np.linspace(-40, 40, len(obsdates))})
+    rotated = midnight_rotation.add_longitudes_at_nearest_midnight(table, rot_type='allen')
+
+    latitudes = table['lat'].to_numpy() * u.deg
+    expected = midnight_rotation.get_longitudes_at_nearest_midnight(obsdates, latitudes,
+                                                                    rot_type='allen')
+    assert 'midnight lon shift' not in table
+    assert np.allclose(rotated['midnight lon shift'], expected.to_value(u.deg))
+
+
+def test_shift_before_midnight(midnight_rotation):
+    table = pd.DataFrame({'obs_date': ['2000-01-01 11:47:02', '2000-01-01 12:47:02'],
+                          'lat': [10, 10]})
+    rotated = midnight_rotation.add_longitudes_at_nearest_midnight(table)
+
+    # An observation before noon is rotated back to the previous midnight.
+    shift = rotated['midnight lon shift']
+    assert -180 <= shift[0] < 0 < shift[1]
+    assert np.isclose(shift[0], -7.0019744)
+    assert np.isclose(shift[0], -diff_rot(42422 * u.s, 10 * u.deg).to_value(u.deg))
+    scalar = midnight_rotation.get_longitude_at_nearest_midnight('2000-01-01 11:47:02', 10 * u.deg)
+    assert np.isclose(scalar.to_value(u.deg), shift[0])
+
+
+@pytest.mark.parametrize('rot_type', ['howard', 'snodgrass', 'allen'])
+@pytest.mark.parametrize('frame_time', ['sidereal', 'synodic'])
+def test_fast_mode(obsdates, rot_type, frame_time):
+    latitudes = np.linspace(-80, 80, 37) * u.deg
+    obsdates = np.resize(obsdates, len(latitudes))
+    fast_rotation = MidnightRotation(fast=True)
+
+    exact = MidnightRotation().get_longitudes_at_nearest_midnight(obsdates, latitudes,
+                                                                  rot_type=rot_type,
+                                                                  frame_time=frame_time)
+    fast = fast_rotation.get_longitudes_at_nearest_midnight(obsdates, latitudes, rot_type=rot_type,
+                                                            frame_time=frame_time)
+    max_error = fast_rotation.get_rotation_table_error(rot_type, frame_time)
+
+    assert max_error <= 1e-6 * u.deg
+    # Up to rounding of the longitudes, which are at most 360 degrees.
+    assert np.abs((fast - exact).wrap_at(180 * u.deg)).max() <= max_error + 1e-12 * u.deg
+
+
+def test_fast_mode_tolerance():
+    coarse = MidnightRotation(fast=True, tolerance=1e-2 * u.deg)
+    fine = MidnightRotation(fast=True, tolerance=1e-8 * u.deg)
+
+    assert coarse.get_rotation_table_error() <= 1e-2 * u.deg
+    assert fine.get_rotation_table_error() <= 1e-8 * u.deg
+    coarse_grid, _, _ = coarse._rotation_table('howard', 'sidereal')
+    fine_grid, _, _ = fine._rotation_table('howard', 'sidereal')
+    assert len(coarse_grid) < len(fine_grid)
+
+    obsdate = '2000-01-01 12:47:02'
+    exact = MidnightRotation().get_longitude_at_nearest_midnight(obsdate, 443.92976 * u.deg)
+    fast = fine.get_longitude_at_nearest_midnight(obsdate, 443.92976 * u.deg)
+    assert np.abs(fast - exact) <= 1e-8 * u.deg
+
+
+def test_fast_mode_tolerance_not_reached(monkeypatch):
+    monkeypatch.setattr('pythia.cleaning.midnight_rotation._max_table_points', 65)
+    monkeypatch.setattr('pythia.cleaning.midnight_rotation._rotation_tables', {})
+    fast_rotation = MidnightRotation(fast=True, tolerance=1e-12 * u.deg)
+
+    with pytest.warns(SunpyUserWarning):
+        max_error = fast_rotation.get_rotation_table_error()
+    assert max_error > 1e-12 * u.deg
+    assert len(fast_rotation._rotation_table('howard', 'sidereal')[0]) == 65
+
+
+@pytest.fixture
+def positions(obsdates):
+    return pd.DataFrame({'obs_date': obsdates,
+                         'lon': np.linspace(-170, 170, len(obsdates)),
+                         'lat': np.linspace(-40, 40, len(obsdates))}, index=np.arange(20, 26))
+
+
+def test_rotate_to_nearest_midnight_epochs(midnight_rotation, positions):
+    epochs = midnight_rotation.get_nearest_midnights(positions['obs_date'])
+    rotated = midnight_rotation.rotate_to_epoch(positions, epochs)
+
+    shift = midnight_rotation.get_longitudes_at_nearest_midnight(positions['obs_date'],
+                                                                 positions['lat'].to_numpy())
+    expected = (positions['lon'].to_numpy() * u.deg + shift).wrap_at(180 * u.deg).to_value(u.deg)
+    assert list(rotated.columns) == ['lon', 'lat']
+    assert list(rotated.index) == list(positions.index)
+    assert np.allclose(rotated['lon'], expected)
+    assert np.array_equal(rotated['lat'], positions['lat'])
+
+
+def test_rotate_to_common_epoch(midnight_rotation, positions):
+    epoch = datetime.datetime(2000, 6, 1)
+    rotated = midnight_rotation.rotate_to_epoch(positions, epoch, rot_type='allen')
+
+    seconds = midnight_rotation.get_seconds_to_epochs(positions['obs_date'], '2000-06-01 00:00:00')
+    assert seconds[21] == (epoch - datetime.datetime(2000, 1, 1, 11, 47, 2)).total_seconds()
+    for (_, row), lon in zip(positions.iterrows(), rotated['lon']):
+        obsdate = datetime.datetime.strptime(row['obs_date'], '%Y-%m-%d %H:%M:%S')
+        duration = (epoch - obsdate).total_seconds() * u.s
+        rotation = diff_rot(duration, row['lat'] * u.deg, rot_type='allen')
+        expected = Longitude(row['lon'] * u.deg + rotation,
+                             wrap_angle=180 * u.deg)
+        assert np.isclose(lon, expected.to_value(u.deg))
+    assert ((rotated['lon'] >= -180) & (rotated['lon'] < 180)).all()
+
+
+def test_rotation_to_earlier_epoch(midnight_rotation):
+    rotation = midnight_rotation.get_longitudes_at_epochs(['2000-01-02 00:00:00'], [0],
+                                                          '2000-01-01 12:00:00')
+
+    assert np.isclose(rotation[0].to_value(u.deg), -diff_rot(12 * u.h, 0 * u.deg).to_value(u.deg))
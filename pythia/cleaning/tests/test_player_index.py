@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from pythia.cleaning import PlayerIndex
+
+
+@pytest.fixture
+def index():
+    return PlayerIndex([10, 20, 30])
+
+
+def test_encode_existing(index):
+    slots = index.encode([30, 10, 10])
+    assert slots.dtype == np.int32
+    assert np.array_equal(slots, [2, 0, 0])
+    assert len(index) == 3
+
+
+def test_encode_new_ids(index):
+    assert np.array_equal(index.encode([40, 20, 50, 40]), [3, 1, 4, 3])
+    assert list(index.ids) == [10, 20, 30, 40, 50]
+
+
+def test_encode_without_adding(index):
+    assert np.array_equal(index.encode([20, 99], add=False), [1, -1])
+    assert 99 not in index
+    assert len(index) == 3
+
+
+def test_encode_pairs():
+    index = PlayerIndex()
+    slots_0, slots_1 = index.encode_pairs(['a', 'b', 'c'], ['b', 'd', 'a'])
+    assert np.array_equal(slots_0, [0, 1, 2])
+    assert np.array_equal(slots_1, [1, 3, 0])
+
+
+def test_decode(index):
+    assert list(index.decode([2, 0])) == [30, 10]
+    assert list(index.decode(index.encode([20, 10]))) == [20, 10]
@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from pythia.cleaning import (ELO, ArrayELO, RankingEvaluator, load_rankings, load_score_history,
+                             save_rankings)
+from sunpy.util import SunpyUserWarning
+
+
+@pytest.fixture
+def score_board(random_score_board):
+    return random_score_board(n_images=12, n_matches=150, seed=11)
+
+
+def test_roundtrip(score_board, tmp_path):
+    elo = ArrayELO(score_board, score_memory=4)
+    elo.run(save_to_disk=False)
+    elo.save_as_npz(tmp_path / 'rankings.npz')
+
+    expected = elo.rankings
+    rankings = load_rankings(tmp_path / 'rankings.npz', last_scores=True)
+    pd.testing.assert_frame_equal(rankings, expected)
+
+    history = load_score_history(tmp_path / 'rankings.npz')
+    assert history.shape == (len(expected), 4)
+    assert history.index.equals(expected.index)
+    for row, last in zip(history.to_numpy(), expected['last scores']):
+        assert np.array_equal(row[~np.isnan(row)], np.array(last.split(','), dtype=float))
+
+
+def test_elo_and_array_elo_files_agree(score_board, tmp_path):
+    elo = ELO(score_board, score_memory=4)
+    elo.run(save_to_disk=False)
+    elo.save_as_npz(tmp_path / 'elo.npz')
+    array_elo = ArrayELO(score_board, score_memory=4)
+    array_elo.run(save_to_disk=False)
+    array_elo.save_as_npz(tmp_path / 'array_elo.npz')
+
+    rankings = load_rankings(tmp_path / 'elo.npz').sort_index()
+    array_rankings = load_rankings(tmp_path / 'array_elo.npz').sort_index()
+    assert np.allclose(rankings['score'], array_rankings['score'])
+    assert np.allclose(load_score_history(tmp_path / 'elo.npz').sort_index(),
+                       load_score_history(tmp_path / 'array_elo.npz').sort_index(), equal_nan=True)
+
+
+def test_string_ids(tmp_path):
+    rankings = pd.DataFrame({'player id': ['a', 'b'], 'score': [1400.0, 1416.0],
+                             'last scores': ['1400', '1400,1416.0']},
+                            index=pd.Index(['a', 'b'], name='player id'))
+    save_rankings(tmp_path / 'rankings.npz', rankings, compressed=False)
+
+    loaded = load_rankings(tmp_path / 'rankings.npz')
+    assert list(loaded.index) == ['a', 'b']
+    assert list(loaded.columns) == ['player id', 'score']
+    assert np.isnan(load_score_history(tmp_path / 'rankings.npz').loc['a', 1])
+
+
+def test_evaluator_reads_npz(score_board, tmp_path):
+    elo = ArrayELO(score_board)
+    elo.run(save_to_disk=False)
+    elo.save_as_npz(tmp_path / 'rankings.npz')
+
+    metrics = RankingEvaluator(tmp_path / 'rankings.npz').evaluate(score_board)
+    expected = RankingEvaluator(elo.rankings).evaluate(score_board)
+    assert metrics['log loss'] == expected['log loss']
+
+
+def test_unsupported_version(tmp_path):
+    header = json.dumps({'format': 'pythia.rankings', 'version': 99})
+    np.savez(tmp_path / 'rankings.npz', header=np.array(header))
+    with pytest.raises(SunpyUserWarning):
+        load_rankings(tmp_path / 'rankings.npz')
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pythia.cleaning import ArrayELO, PlayerIndex, RatingHistory
+from sunpy.util import SunpyUserWarning
+
+
+@pytest.fixture
+def score_board(random_score_board):
+    return random_score_board(n_images=10, n_matches=120, seed=5)
+
+
+@pytest.fixture
+def history():
+    history = RatingHistory(PlayerIndex(['a', 'b', 'c']), capacity=2)
+    history.append([0, 0], [0, 1], [1416.0, 1384.0])
+    history.append([1, 1, 3, 3], [0, 2, 1, 2], [1430.0, 1386.0, 1400.0, 1370.0])
+    return history
+
+
+def test_append(history):
+    assert len(history) == 6
+    assert history.matches.dtype == np.uint32
+    assert history.slots.dtype == np.int32
+    assert history.scores.dtype == np.float32
+    assert history.nbytes == 6 * 12
+    assert list(history.to_frame()['player id']) == ['a', 'b', 'a', 'c', 'b', 'c']
+
+
+def test_trajectory(history):
+    trajectory = history.trajectory('a')
+
+    assert list(trajectory.index) == [0, 1]
+    assert list(trajectory) == [1416.0, 1430.0]
+    assert list(history.trajectory('c').index) == [1, 3]
+    with pytest.raises(KeyError):
+        history.trajectory('d')
+
+
+def test_scores_at(history):
+    scores = history.scores_at(0)
+    assert scores['a'] == 1416.0
+    assert scores['b'] == 1384.0
+    # Players are at the default score until their first update.
+    assert scores['c'] == 1400.0
+
+    scores = history.scores_at(2)
+    assert list(scores) == [1430.0, 1384.0, 1386.0]
+    assert list(history.scores_at(10)) == [1430.0, 1400.0, 1370.0]
+
+
+def test_match_index_bound(history):
+    with pytest.raises(SunpyUserWarning):
+        history.append([2 ** 32], [0], [1400.0])
+    assert len(history) == 6
+
+
+def test_array_elo_history(score_board):
+    elo = ArrayELO(score_board, chunksize=50, record_history=True)
+    elo.run(save_to_disk=False)
+
+    rankings = elo.rankings
+    final = elo.history.scores_at(len(score_board))
+    assert len(elo.history) == rankings['count'].sum()
+    assert np.allclose(final[rankings.index], rankings['score'], rtol=1e-6)
+
+    for player_id, row in rankings.iterrows():
+        trajectory = elo.history.trajectory(player_id)
+        assert len(trajectory) == row['count']
+        last = np.array(row['last scores'].split(','), dtype=float)
+        n = min(len(trajectory), len(last))
+        assert np.allclose(trajectory.to_numpy()[len(trajectory) - n:], last[len(last) - n:],
+                           rtol=1e-6)
+
+
+def test_parallel_history_matches_serial(score_board):
+    serial = ArrayELO(score_board, record_history=True)
+    serial.run(save_to_disk=False)
+    parallel = ArrayELO(score_board, record_history=True)
+    parallel.run(save_to_disk=False, n_jobs=2)
+
+    for match in [0, 40, 119]:
+        pd.testing.assert_series_equal(parallel.history.scores_at(match),
+                                       serial.history.scores_at(match))
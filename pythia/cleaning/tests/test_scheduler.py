@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pythia.cleaning import ELO, ArrayELO, PairScheduler
+from sunpy.util import SunpyUserWarning
+
+
+@pytest.fixture
+def elo(random_score_board):
+    elo = ArrayELO(random_score_board(n_images=40, n_matches=100, seed=2))
+    elo.run(save_to_disk=False)
+    return elo
+
+
+def test_propose(elo):
+    scheduler = PairScheduler(elo)
+    pairs = scheduler.propose(10)
+
+    assert list(pairs.columns) == ['image_id_0', 'image_id_1']
+    assert len(pairs) == 10
+    images = np.concatenate([pairs['image_id_0'], pairs['image_id_1']])
+    assert len(set(images)) == 20
+    # The least compared image is always proposed first.
+    counts = elo.rankings['count']
+    assert counts[pairs['image_id_0'].iloc[0]] == counts.min()
+    assert scheduler.pending.sum() == 20
+
+
+def test_update(elo):
+    scheduler = PairScheduler(elo)
+    pairs = scheduler.propose(5)
+    pairs['image0_more_complex_image1'] = 1
+    counts = elo.rankings['count'].copy()
+    scheduler.update(pairs)
+
+    assert scheduler.pending.sum() == 0
+    assert (elo.rankings.loc[pairs['image_id_0'], 'count'] == counts[pairs['image_id_0']] + 1).all()
+
+    # New images are scheduled as soon as they are rated.
+    scheduler.update(pd.DataFrame({'image_id_0': [100], 'image_id_1': [101],
+                                   'image0_more_complex_image1': [1]}))
+    pairs = scheduler.propose(40)
+    assert {100, 101} <= set(pairs['image_id_0']) | set(pairs['image_id_1'])
+
+
+def test_max_comparisons():
+    score_board = pd.DataFrame({'image_id_0': [1, 1, 3], 'image_id_1': [2, 2, 4],
+                                'image0_more_complex_image1': [1, 0, 1]})
+    elo = ArrayELO(score_board, max_comparisons=2)
+    elo.run(save_to_disk=False)
+    pairs = PairScheduler(elo).propose(5)
+
+    assert len(pairs) == 1
+    assert set(pairs.iloc[0]) == {3, 4}
+
+
+def test_needs_array_elo():
+    score_board = pd.DataFrame({'image_id_0': [1], 'image_id_1': [2],
+                                'image0_more_complex_image1': [1]})
+    with pytest.raises(SunpyUserWarning):
+        PairScheduler(ELO(score_board))
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from pythia.cleaning import ArrayELO, ELOSweep
+from sunpy.util import SunpyUserWarning
+
+
+@pytest.fixture
+def score_board(strength_score_board):
+    return strength_score_board(n_images=30, n_matches=1000)
+
+
+def test_grid(score_board):
+    sweep = ELOSweep(score_board, {'k_value': [16, 32], 'score_memory': [3, 5, 10]})
+    assert len(sweep.configurations) == 6
+    assert (sweep.configurations['min_score_change'] == 16).all()
+
+
+def test_same_scores_as_array_elo(score_board):
+    param_grid = [{'k_value': 16, 'score_memory': 3},
+                  {'k_value': 32, 'score_memory': 10,
+                   'min_score_change': 8, 'max_score_change': 64}]
+    sweep = ELOSweep(score_board, param_grid, test_size=0.25)
+    sweep.run()
+
+    for scores, params in zip(sweep.scores, param_grid):
+        elo = ArrayELO(score_board.iloc[:750], **params)
+        elo.run(save_to_disk=False)
+        assert np.allclose(scores[sweep.index.encode(elo.rankings.index)], elo.rankings['score'])
+
+
+@pytest.mark.parametrize('shuffle', [False, True])
+def test_accuracy(score_board, shuffle):
+    sweep = ELOSweep(score_board, {'k_value': [8, 32]}, shuffle=shuffle, random_state=0)
+    results = sweep.run()
+
+    assert len(sweep.test[0]) == 200
+    assert list(results.columns) == ['k_value', 'score_memory', 'min_score_change',
+                                     'max_score_change', 'accuracy', 'log loss']
+    assert (results['accuracy'] > 0.6).all()
+    assert (results['log loss'] < np.log(2)).all()
+
+
+def test_unknown_parameter(score_board):
+    with pytest.raises(SunpyUserWarning):
+        ELOSweep(score_board, {'default_score': [1200, 1400]})
@@ -769,10 +769,9 @@ class Sunspotter:
         """
         rotator = MidnightRotation()
         longitude, latitude = self.get_lat_lon_in_hgs(obsdate, **kwargs)
-        rotated = []
-        for lon, lat in zip(longitude, latitude):
-            rotated.append((lon + Longitude(rotator.get_longitude_at_nearest_midnight(obsdate, lat)), lat))
-        return rotated
+        rotation = rotator.get_longitudes_at_nearest_midnight(obsdate, latitude, fmt=fmt)
+        rotated_longitude = longitude + rotation
+        return list(zip(rotated_longitude, latitude))
 
     def rotate_list_to_midnight(self, obslist: list, fmt='%Y-%m-%d %H:%M:%S'):
         """
@@ -869,7 +868,7 @@ class Sunspotter:
         hgs_frame = self.hpc_to_hgs_position(obsdate, get_nearest)
         return hgs_frame.lon, hgs_frame.lat
 
-    def match_with_swpc_for_obsdate(self, obsdate, *, days_delta=1, match_type='euclidean',
+    def match_with_swpc_for_obsdate(self, obsdate, *, days_delta=1, match_type='spherical',
                                     noaa_ar='NOAA SWPC Observer', fmt='%Y-%m-%d %H:%M:%S', match_threshold=20):
         """
         Match Sunspotter observations to observations from HEK.
@@ -881,13 +880,14 @@ class Sunspotter:
         days_delta : int, optional
             Number of days from the obsdate, by default 1
         match_type : str, optional
-            The matching Algorithm that tablematcher will use, by default 'euclidean'
+            The matching Algorithm that tablematcher will use, by default 'spherical'
         noaa_ar : str, optional
             Parameter used by HEK attr, by default 'NOAA SWPC Observer'
         fmt : str, optional
             Format of the obsdate, by default '%Y-%m-%d %H:%M:%S'
         match_threshold : float, optional
-            Threshold for being considered a good match
+            Threshold for being considered a good match, in degrees of
+            angular separation for spherical matching, by default 20
 
         Returns
         -------
@@ -1,6 +1,9 @@
+import os
 import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import numpy as np
+import pandas as pd
 from sunpy.util import SunpyUserWarning
 
 __all__ = ['TableMatcher']
@@ -11,12 +14,28 @@ class TableMatcher:
     Table Matcher Object for finding corresponding rows across two distinct dataframes.
     """
 
-    def __init__(self, match_type='cosine'):
+    def __init__(self, match_type='cosine', *, memory_budget=None, n_threads=1):
         """
         Parameters
         ----------
         match_type : str, optional
             The row matching algorithm, by default 'cosine'
+            'cosine' and 'euclidean' compare every pair of rows, while 'cosine_tree'
+            and 'euclidean_tree' query a KD-tree built on the rows of the second table,
+            which scales as O((n + m) log m) rather than O(n m) in time and memory.
+            'spherical' matches positions given as longitude and latitude in degrees
+            by their angular separation, also using a KD-tree.
+        memory_budget : int, optional
+            Maximum number of bytes taken by the pairwise scores of 'cosine' and
+            'euclidean' matching. If given, the rows of the first table are matched
+            in tiles, keeping only the best match of every row, by default None,
+            which computes the whole matrix of scores at once. Tiles hold at least
+            one row, so the budget is exceeded if the second table is very large.
+            Scores of tiles are equal to the whole matrix up to rounding, as the
+            result of the BLAS routines depends on the shape of the matrices.
+        n_threads : int, optional
+            Number of threads matching tiles at the same time, sharing the memory budget,
+            by default 1
 
         Raises
         ------
@@ -24,8 +43,11 @@ class TableMatcher:
             If unrecognized match type is passed.
         """
         self.match_type = match_type
+        self.memory_budget = memory_budget
+        self.n_threads = n_threads
 
-        if self.match_type not in ['cosine', 'euclidean']:
+        if self.match_type not in ['cosine', 'euclidean', 'cosine_tree', 'euclidean_tree',
+                                   'spherical']:
             raise SunpyUserWarning('Incorrect matching algorithm specified.')
 
     def _prepare_tables(self, df_1, df_2, feature_1=None, feature_2=None):
@@ -112,6 +134,9 @@ class TableMatcher:
             raise SunpyUserWarning(
                 "Table Matcher requires Scikit Learn to be installed")
 
+        if self.memory_budget is not None:
+            return self._match_blocked(cosine_similarity, np.argmax, df_1, df_2)
+
         cosine = cosine_similarity(X=df_1, Y=df_2)
         result = np.argmax(cosine, axis=1)
         match_score = np.max(cosine, axis=1)
@@ -142,12 +167,146 @@ class TableMatcher:
             raise SunpyUserWarning(
                 "Table Matcher requires Scikit Learn to be installed")
 
+        if self.memory_budget is not None:
+            return self._match_blocked(euclidean_distances, np.argmin, df_1, df_2)
+
         euclidean = euclidean_distances(X=df_1, Y=df_2)
         result = np.argmin(euclidean, axis=1)
         match_score = np.min(euclidean, axis=1)
 
         return result, match_score
 
+    def _row_tiles(self, n_rows, n_columns):
+        """
+        Splits the rows of the first table into tiles whose scores fit in the memory budget.
+
+        The scores of a tile and the temporary arrays of the pairwise functions take
+        about two float64 matrices. A tile holds at least one row, so a budget smaller
+        than the scores of a single row against the second table is exceeded.
+        """
+        tile_rows = max(self.memory_budget // (2 * 8 * max(n_columns, 1) * self.n_threads), 1)
+
+        return [slice(start, min(start + tile_rows, n_rows))
+                for start in range(0, n_rows, tile_rows)]
+
+    def _map_tiles(self, match_tile, tiles):
+        """
+        Matches the tiles of rows, on a thread pool if more than one thread is used.
+        """
+        if self.n_threads == 1:
+            return list(map(match_tile, tiles))
+
+        with ThreadPoolExecutor(max_workers=self.n_threads) as executor:
+            return list(executor.map(match_tile, tiles))
+
+    def _match_blocked(self, pairwise, best, df_1, df_2):
+        """
+        Finds the best matches of the rows of df_1 one tile of rows at a time.
+        """
+        values_1 = np.asarray(df_1, dtype=float)
+        values_2 = np.asarray(df_2, dtype=float)
+
+        def match_tile(rows):
+            scores = pairwise(X=values_1[rows], Y=values_2)
+            result = best(scores, axis=1)
+            return result, scores[np.arange(len(result)), result]
+
+        matches = self._map_tiles(match_tile, self._row_tiles(len(values_1), len(values_2)))
+        if not matches:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        result, match_score = zip(*matches)
+
+        return np.concatenate(result), np.concatenate(match_score)
+
+    def match_euclidean_tree(self, df_1, df_2):
+        """
+        Finds the nearest row of df_2 in euclidean distance for every row of df_1,
+        using a KD-tree built on the rows of df_2.
+        Parameters
+        ----------
+        df_1: `pd.DataFrame`
+            First DataFrame to match the rows from.
+        df_2: `pd.DataFrame`
+            Second DataFrame to match the rows from.
+        Returns
+        -------
+        result: `numpy.ndarray`
+            Array of size `(n,)` where n is the number of rows in df_1.
+            Contains indices of rows from df_2 that best correspond to rows from df_1.
+        match_score: `numpy.ndarray`
+            Array of size `(n,)` where n is the number of rows in df_1.
+            Contains match score for  corresponding best matches.
+        """
+        tree = _build_tree(np.asarray(df_2, dtype=float))
+        match_score, result = tree.query(np.asarray(df_1, dtype=float))
+
+        return result, match_score
+
+    def match_cosine_tree(self, df_1, df_2):
+        """
+        Finds the row of df_2 with the highest Cosine similarity for every row of df_1,
+        using a KD-tree built on the normalized rows of df_2.
+
+        For unit vectors the euclidean distance d and the Cosine similarity
+        are related by ``1 - d**2 / 2``, so the nearest normalized row is the most similar one.
+        Parameters
+        ----------
+        df_1: `pd.DataFrame`
+            First DataFrame to match the rows from.
+        df_2: `pd.DataFrame`
+            Second DataFrame to match the rows from.
+        Returns
+        -------
+        result: `numpy.ndarray`
+            Array of size `(n,)` where n is the number of rows in df_1.
+            Contains indices of rows from df_2 that best correspond to rows from df_1.
+        match_score: `numpy.ndarray`
+            Array of size `(n,)` where n is the number of rows in df_1.
+            Contains match score for  corresponding best matches.
+        """
+        unit_1 = _normalize_rows(df_1)
+        unit_2 = _normalize_rows(df_2)
+
+        tree = _build_tree(unit_2)
+        _, result = tree.query(unit_1)
+        match_score = np.einsum('ij,ij->i', unit_1, unit_2[result])
+
+        return result, match_score
+
+    def match_spherical(self, df_1, df_2):
+        """
+        Finds the nearest position of df_2 on the sphere for every position of df_1.
+
+        Longitudes and latitudes are converted to unit vectors, whose euclidean
+        distance d gives the angular separation ``2 * arcsin(d / 2)``, so that the
+        positions can be searched with a KD-tree. Unlike euclidean matching of
+        the angles, this holds near the limb and across the longitude wrap-around.
+        Parameters
+        ----------
+        df_1: `pd.DataFrame`
+            First DataFrame to match the rows from, holding longitudes and latitudes in degrees.
+        df_2: `pd.DataFrame`
+            Second DataFrame to match the rows from, holding longitudes and latitudes in degrees.
+        Returns
+        -------
+        result: `numpy.ndarray`
+            Array of size `(n,)` where n is the number of rows in df_1.
+            Contains indices of rows from df_2 that best correspond to rows from df_1.
+        match_score: `numpy.ndarray`
+            Array of size `(n,)` where n is the number of rows in df_1.
+            Contains the angular separation in degrees of the corresponding best matches.
+
+        Raises
+        ------
+        SunpyUserWarning
+            If the tables do not have exactly two columns.
+        """
+        tree = _build_tree(_unit_vectors(df_2))
+        chord, result = tree.query(_unit_vectors(df_1))
+        match_score = _chord_to_degrees(chord)
+
+        return result, match_score
+
     def verify(self, match_score, threshold):
         """
         Verify matching quality. If any match score is less than the threshold,
@@ -162,7 +321,10 @@ class TableMatcher:
         """
         match_dict = {
             'euclidean' : lambda x, y: True if x > y else False,
-            'cosine' : lambda x, y: True if x < y else False
+            'cosine' : lambda x, y: True if x < y else False,
+            'euclidean_tree' : lambda x, y: True if x > y else False,
+            'cosine_tree' : lambda x, y: True if x < y else False,
+            'spherical' : lambda x, y: True if x > y else False
             }
 
         for index, score_value in enumerate(match_score):
@@ -191,7 +353,10 @@ class TableMatcher:
 
         match_dict = {
             'euclidean' : self.match_euclidean,
-            'cosine' : self.match_cosine
+            'cosine' : self.match_cosine,
+            'euclidean_tree' : self.match_euclidean_tree,
+            'cosine_tree' : self.match_cosine_tree,
+            'spherical' : self.match_spherical
             }
 
         result, match_score = match_dict[self.match_type](df_1, df_2)
@@ -199,3 +364,326 @@ class TableMatcher:
         self.verify(match_score, threshold)
 
         return result
+
+    def match_topk(self, df_1, df_2, feature_1=None, feature_2=None, k=5):
+        """
+        Finds the k best matches in df_2 for every row of df_1, best first.
+
+        'cosine' and 'euclidean' matching select the k best scores of every row
+        with a partial sort of the pairwise scores, one tile of rows at a time
+        if a memory budget is set. The other match types query k neighbours from a KD-tree.
+        Parameters
+        ----------
+        feature_1: `list`
+            List of columns from df_1 to match the rows with.
+        feature_2: `list`
+            List of columns from df_2 to match the rows with.
+        k: `int`
+            Number of matches to find for every row, at most the number of rows in df_2.
+        Returns
+        -------
+        result: `numpy.ndarray`
+            Array of size `(n, k)` where n is the number of rows in df_1.
+            Contains indices of rows from df_2 that best correspond to rows from df_1.
+        match_score: `numpy.ndarray`
+            Array of size `(n, k)` where n is the number of rows in df_1.
+            Contains match score for the corresponding matches.
+        """
+        df_1, df_2 = self._prepare_tables(df_1, df_2, feature_1, feature_2)
+        k = min(k, len(df_2))
+        if k == 0:
+            return np.zeros((len(df_1), 0), dtype=np.int64), np.zeros((len(df_1), 0))
+
+        if self.match_type not in ['cosine', 'euclidean']:
+            points_1 = self._points(df_1)
+            points_2 = self._points(df_2)
+            distance, result = _build_tree(points_2).query(points_1, k=k)
+            result, distance = result.reshape(len(points_1), k), distance.reshape(len(points_1), k)
+            if self.match_type.startswith('cosine'):
+                return result, np.einsum('ijk,ik->ij', points_2[result], points_1)
+            return result, self._distance_to_score(distance)
+
+        try:
+            from sklearn.metrics.pairwise import cosine_similarity, euclidean_distances
+        except ImportError:
+            raise SunpyUserWarning(
+                "Table Matcher requires Scikit Learn to be installed")
+
+        values_1 = np.asarray(df_1, dtype=float)
+        values_2 = np.asarray(df_2, dtype=float)
+        similarity = self.match_type == 'cosine'
+        pairwise = cosine_similarity if similarity else euclidean_distances
+
+        def match_tile(rows):
+            scores = pairwise(X=values_1[rows], Y=values_2)
+            order = -scores if similarity else scores
+            best = np.argpartition(order, k - 1, axis=1)[:, :k]
+            ranks = np.argsort(np.take_along_axis(order, best, axis=1), axis=1, kind='stable')
+            best = np.take_along_axis(best, ranks, axis=1)
+            return best, np.take_along_axis(scores, best, axis=1)
+
+        if self.memory_budget is None:
+            tiles = [slice(0, len(values_1))]
+        else:
+            tiles = self._row_tiles(len(values_1), len(values_2))
+        matches = self._map_tiles(match_tile, tiles) if len(values_1) else []
+        if not matches:
+            return np.zeros((len(values_1), k), dtype=np.int64), np.zeros((len(values_1), k))
+        result, match_score = zip(*matches)
+
+        return np.concatenate(result), np.concatenate(match_score)
+
+    def match_grouped(self, df_1, df_2, group_1, group_2=None, feature_1=None, feature_2=None,
+                      threshold=5, n_jobs=1):
+        """
+        Finds the best match of every row of df_1 among the rows of df_2 in the same group.
+
+        Both tables are validated once, and split into groups by the group columns,
+        such as the observation date. Groups are matched independently, optionally
+        across a pool of processes, and their matches are gathered in one table.
+        Parameters
+        ----------
+        group_1: `str`
+            Column of df_1 holding the group of every row.
+        group_2: `str`
+            Column of df_2 holding the group of every row, by default the same as group_1.
+        feature_1: `list`
+            List of columns from df_1 to match the rows with, by default all columns but the group.
+        feature_2: `list`
+            List of columns from df_2 to match the rows with, by default all columns but the group.
+        threshold: `float`
+            Minimum score for considering a proper match.
+        n_jobs: `int`
+            Number of processes matching groups, by default 1.
+            None uses as many processes as there are CPUs.
+        Returns
+        -------
+        matches: `pd.DataFrame`
+            DataFrame with the index of df_1, holding the index in df_2 of the best
+            match of every row under 'match', and its score under 'match score'.
+            Matches keep the dtype of the index of df_2. Rows whose group is not
+            present in df_2 have a missing match, integer labels becoming a nullable
+            integer dtype, and a NaN score.
+
+        Raises
+        ------
+        SunpyUserWarning
+            If a group column is not present in its table.
+        """
+        group_2 = group_1 if group_2 is None else group_2
+        if group_1 not in df_1.columns or group_2 not in df_2.columns:
+            raise SunpyUserWarning("The group columns must be present in both tables.")
+
+        if feature_1 is None:
+            feature_1 = df_1.columns.drop(group_1).values
+        if feature_2 is None:
+            feature_2 = df_2.columns.drop(group_2).values
+        values_1, values_2 = self._prepare_tables(df_1, df_2, feature_1, feature_2)
+        values_1 = np.asarray(values_1, dtype=float)
+        values_2 = np.asarray(values_2, dtype=float)
+
+        groups_1 = df_1.groupby(group_1, sort=False).indices
+        groups_2 = df_2.groupby(group_2, sort=False).indices
+        groups = [group for group in groups_1 if group in groups_2]
+        tasks = [(self, values_1[groups_1[group]], values_2[groups_2[group]]) for group in groups]
+
+        if n_jobs == 1:
+            matches = list(map(_match_group, tasks))
+        else:
+            n_jobs = n_jobs or os.cpu_count()
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                chunksize = max(1, len(tasks) // (4 * n_jobs))
+                matches = list(executor.map(_match_group, tasks, chunksize=chunksize))
+
+        positions = np.full(len(df_1), -1, dtype=np.int64)
+        match_score = np.full(len(df_1), np.nan)
+        for group, (result, score) in zip(groups, matches):
+            positions[groups_1[group]] = groups_2[group][result]
+            match_score[groups_1[group]] = score
+
+        # Unmatched rows have a NaN score, which never fails verification, so the
+        # reported positions are the rows of df_1.
+        self.verify(match_score, threshold)
+
+        matched = positions >= 0
+
+        labels = pd.Series(df_2.index.take(positions[matched]), index=np.flatnonzero(matched))
+        if not matched.all():
+            if labels.dtype.kind in 'iu':
+                # Missing matches would turn integer labels into floats.
+                kind = 'UInt' if labels.dtype.kind == 'u' else 'Int'
+                labels = labels.astype(f"{kind}{8 * labels.dtype.itemsize}")
+            labels = labels.reindex(np.arange(len(df_1)))
+
+        return pd.DataFrame({'match': labels.values, 'match score': match_score}, index=df_1.index)
+
+    def _points(self, df):
+        """
+        Returns the points whose euclidean distance orders the rows as the match type does.
+        """
+        if self.match_type == 'spherical':
+            return _unit_vectors(df)
+        if self.match_type.startswith('cosine'):
+            return _normalize_rows(df)
+        return np.asarray(df, dtype=float)
+
+    def _distance_to_score(self, distance):
+        """
+        Converts the euclidean distance between points to the match score of the match type.
+        """
+        if self.match_type == 'spherical':
+            return _chord_to_degrees(distance)
+        if self.match_type.startswith('cosine'):
+            return 1 - distance ** 2 / 2
+        return distance
+
+    def _score_to_distance(self, score):
+        """
+        Converts a match score of the match type to the euclidean distance between points.
+        """
+        if self.match_type == 'spherical':
+            return 2 * np.sin(np.deg2rad(np.clip(score, 0, 180)) / 2)
+        if self.match_type.startswith('cosine'):
+            return np.sqrt(2 * (1 - np.clip(score, -1, 1)))
+        return score
+
+    def match_one_to_one(self, df_1, df_2, feature_1=None, feature_2=None, gate=None):
+        """
+        Finds the one to one matching of the rows of the two dataframes with the best total score.
+
+        Only pairs of rows whose score passes the gate are candidates. The candidate
+        pairs are split into independent groups of rows, the connected components of
+        the candidate graph, and a minimum cost assignment is solved for every group.
+        The cost of a pair is its distance, or one minus its Cosine similarity.
+        Parameters
+        ----------
+        feature_1: `list`
+            List of columns from df_1 to match the rows with.
+        feature_2: `list`
+            List of columns from df_2 to match the rows with.
+        gate: `float`
+            Maximum distance, or minimum Cosine similarity, of a candidate pair,
+            by default 5 for 'euclidean' and 'euclidean_tree', 5 degrees for
+            'spherical', and 0.99 for 'cosine' and 'cosine_tree'.
+        Returns
+        -------
+        result: `numpy.ndarray`
+            Array of size `(n,)` where n is the number of rows in df_1.
+            Contains indices of rows from df_2 that are matched to rows from df_1,
+            or -1 for rows from df_1 that are left unmatched.
+        match_score: `numpy.ndarray`
+            Array of size `(n,)` where n is the number of rows in df_1.
+            Contains match score for the matched rows, or NaN for unmatched rows.
+        """
+        try:
+            from scipy.optimize import linear_sum_assignment
+            from scipy.sparse import coo_matrix
+            from scipy.sparse.csgraph import connected_components
+        except ImportError:
+            raise SunpyUserWarning(
+                "One to one table matching requires Scipy to be installed")
+
+        if gate is None:
+            gate = 0.99 if self.match_type.startswith('cosine') else 5
+
+        df_1, df_2 = self._prepare_tables(df_1, df_2, feature_1, feature_2)
+        points_1 = self._points(df_1)
+        points_2 = self._points(df_2)
+        n_1, n_2 = len(points_1), len(points_2)
+
+        candidates = _build_tree(points_1).sparse_distance_matrix(_build_tree(points_2),
+                                                                  self._score_to_distance(gate),
+                                                                  output_type='ndarray')
+        rows, columns = candidates['i'].astype(np.int64), candidates['j'].astype(np.int64)
+        scores = self._distance_to_score(candidates['v'])
+        if self.match_type.startswith('cosine'):
+            # The exact similarity, as the distance between normalized rows loses precision.
+            scores = np.einsum('ij,ij->i', points_1[rows], points_2[columns])
+            costs = 1 - scores
+        else:
+            costs = scores
+
+        # Rows of df_2 are nodes n_1 to n_1 + n_2 - 1 of the candidate graph.
+        graph = coo_matrix((np.ones(len(rows)), (rows, n_1 + columns)),
+                           shape=(n_1 + n_2, n_1 + n_2))
+        _, labels = connected_components(graph, directed=False)
+
+        result = np.full(n_1, -1, dtype=np.int64)
+        match_score = np.full(n_1, np.nan)
+
+        order = np.argsort(labels[rows], kind='stable')
+        for block in np.split(order, np.flatnonzero(np.diff(labels[rows][order])) + 1):
+            if len(block) == 1:
+                result[rows[block]] = columns[block]
+                match_score[rows[block]] = scores[block]
+                continue
+
+            block_rows, local_rows = np.unique(rows[block], return_inverse=True)
+            block_columns, local_columns = np.unique(columns[block], return_inverse=True)
+            # Pairs that are not candidates cost more than any assignment of candidates.
+            cost = np.full((len(block_rows), len(block_columns)), costs[block].sum() + 1)
+            cost[local_rows, local_columns] = costs[block]
+            candidate = np.zeros(cost.shape, dtype=bool)
+            candidate[local_rows, local_columns] = True
+            pair_score = np.zeros(cost.shape)
+            pair_score[local_rows, local_columns] = scores[block]
+
+            assigned_rows, assigned_columns = linear_sum_assignment(cost)
+            kept = candidate[assigned_rows, assigned_columns]
+            assigned_rows, assigned_columns = assigned_rows[kept], assigned_columns[kept]
+            result[block_rows[assigned_rows]] = block_columns[assigned_columns]
+            match_score[block_rows[assigned_rows]] = pair_score[assigned_rows, assigned_columns]
+
+        return result, match_score
+
+
+def _match_group(task):
+    """
+    Matches the rows of one group, in a worker process of `TableMatcher.match_grouped`.
+    """
+    matcher, values_1, values_2 = task
+    return getattr(matcher, f'match_{matcher.match_type}')(values_1, values_2)
+
+
+def _build_tree(points):
+    """
+    Builds a KD-tree on the given points.
+    """
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        raise SunpyUserWarning(
+            "Tree based table matching requires Scipy to be installed")
+
+    return cKDTree(points)
+
+
+def _normalize_rows(df):
+    """
+    Scales the rows of a table to unit length, leaving rows of zeros unchanged.
+    """
+    values = np.asarray(df, dtype=float)
+    norms = np.linalg.norm(values, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+
+    return values / norms
+
+
+def _unit_vectors(df):
+    """
+    Converts longitudes and latitudes in degrees to unit vectors.
+    """
+    values = np.asarray(df, dtype=float)
+    if values.ndim != 2 or values.shape[1] != 2:
+        raise SunpyUserWarning("Spherical matching requires exactly two columns, "
+                               "the longitude and the latitude in degrees.")
+
+    lon, lat = np.deg2rad(values).T
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def _chord_to_degrees(chord):
+    """
+    Converts the euclidean distance between unit vectors to their angular separation in degrees.
+    """
+    return np.rad2deg(2 * np.arcsin(np.clip(chord / 2, 0, 1)))
@@ -78,7 +78,7 @@ def test_match(match_type, threshold, df_1, df_2, feature_1, feature_2, best_mat
         matcher.match(df_1, df_2, feature_1, feature_2, threshold=threshold)
 
 
-@pytest.mark.parametrize('match_type', ['euclidean','cosine'])
+@pytest.mark.parametrize('match_type', ['euclidean', 'cosine', 'euclidean_tree', 'cosine_tree'])
 def test_match_no_threshold(match_type, df_1, df_2, feature_1, feature_2, best_match):
     matcher = TableMatcher(match_type=match_type)
 
@@ -103,3 +103,248 @@ def test_match_no_features(match_type, threshold, df_1, df_2, feature_1, feature
     df_2 = df_2[feature_2]
     with pytest.warns(SunpyUserWarning):
         matcher.match(df_1, df_2, threshold=threshold)
+
+
+@pytest.mark.parametrize('match_type', ['euclidean', 'cosine'])
+def test_tree_match_same_as_pairwise(match_type):
+    rng = np.random.default_rng(0)
+    df_1 = pd.DataFrame(rng.normal(size=(200, 3)))
+    df_2 = pd.DataFrame(rng.normal(size=(500, 3)))
+    matcher = TableMatcher(match_type=match_type)
+    tree_matcher = TableMatcher(match_type=f'{match_type}_tree')
+
+    result, match_score = getattr(matcher, f'match_{match_type}')(df_1, df_2)
+    tree_result, tree_match_score = getattr(tree_matcher, f'match_{match_type}_tree')(df_1, df_2)
+
+    assert np.array_equal(tree_result, result)
+    assert np.allclose(tree_match_score, match_score)
+
+
+@pytest.mark.parametrize('match_type', ['euclidean', 'cosine'])
+@pytest.mark.parametrize('memory_budget,n_threads',
+                         [(2 * 8 * 500 * 7, 1), (2 * 8 * 500 * 64, 2), (1, 1)])
+def test_blocked_match_same_as_dense(match_type, memory_budget, n_threads):
+    rng = np.random.default_rng(1)
+    df_1 = pd.DataFrame(rng.normal(size=(200, 3)) * 100)
+    df_2 = pd.DataFrame(rng.normal(size=(500, 3)) * 100)
+    matcher = TableMatcher(match_type=match_type)
+    blocked_matcher = TableMatcher(match_type=match_type, memory_budget=memory_budget,
+                                   n_threads=n_threads)
+
+    result, match_score = getattr(matcher, f'match_{match_type}')(df_1, df_2)
+    blocked_result, blocked_match_score = getattr(blocked_matcher,
+                                                  f'match_{match_type}')(df_1, df_2)
+
+    assert np.array_equal(blocked_result, result)
+    # Tiled scores are computed by BLAS routines that round differently from the whole matrix.
+    assert np.allclose(blocked_match_score, match_score)
+
+
+def test_row_tiles():
+    matcher = TableMatcher(memory_budget=2 * 8 * 10 * 3)
+
+    assert matcher._row_tiles(7, 10) == [slice(0, 3), slice(3, 6), slice(6, 7)]
+    assert matcher._row_tiles(9, 10) == [slice(0, 3), slice(3, 6), slice(6, 9)]
+    # A tile holds at least one row, even if its scores do not fit in the budget.
+    assert matcher._row_tiles(2, 1000) == [slice(0, 1), slice(1, 2)]
+
+
+def test_match_spherical():
+    positions_1 = pd.DataFrame({'lon': [179.5, 10, 0, 45], 'lat': [0, 89.5, 0, -30]})
+    positions_2 = pd.DataFrame({'hgs_x': [-179.5, 170, -170, 5, 46], 'hgs_y': [0, 89.5, 0, 1, -30]})
+    matcher = TableMatcher(match_type='spherical')
+
+    result, match_score = matcher.match_spherical(positions_1, positions_2)
+
+    # Matches across the longitude wrap-around and near the pole, where euclidean matching fails.
+    assert list(result) == [0, 1, 3, 4]
+    polar = 2 * np.rad2deg(np.arcsin(np.cos(np.deg2rad(89.5)) * np.sin(np.deg2rad(80))))
+    assert np.allclose(match_score[:2], [1, polar])
+    separation = np.arccos(np.sin(np.deg2rad(-30)) ** 2 +
+                           np.cos(np.deg2rad(30)) ** 2 * np.cos(np.deg2rad(1)))
+    assert np.isclose(match_score[3], np.rad2deg(separation))
+    euclidean_result = TableMatcher(match_type='euclidean').match(positions_1, positions_2,
+                                                                  threshold=90)
+    assert list(euclidean_result) != list(result)
+
+
+def test_match_spherical_columns(df_1, df_2):
+    with pytest.raises(SunpyUserWarning):
+        TableMatcher(match_type='spherical').match(df_1, df_2, ['feat_a', 'feat_b', 'feat_c'],
+                                                   ['feat_aa', 'feat_bb', 'feat_cc'])
+
+
+def test_match_one_to_one():
+    df_1 = pd.DataFrame({'x': [0.0, 1.0, 10.0, 30.0]})
+    df_2 = pd.DataFrame({'x': [0.8, 1.1, 10.5, 50.0]})
+    matcher = TableMatcher(match_type='euclidean')
+
+    # Both 0 and 1 are nearest to 1.1, and 30 has no candidate within the gate.
+    assert list(matcher.match_euclidean(df_1, df_2)[0]) == [0, 1, 2, 2]
+    result, match_score = matcher.match_one_to_one(df_1, df_2, gate=2)
+
+    assert list(result) == [0, 1, 2, -1]
+    assert np.allclose(match_score[:3], [0.8, 0.1, 0.5])
+    assert np.isnan(match_score[3])
+
+
+@pytest.mark.parametrize('match_type', ['cosine', 'cosine_tree'])
+def test_match_one_to_one_default_cosine_gate(match_type):
+    df_1 = pd.DataFrame({'x': [0.1, 1.0], 'y': [1.0, 0.0]})
+    df_2 = pd.DataFrame({'x': [1.0, 0.0, -1.0], 'y': [0.1, 1.0, 0.0]})
+    matcher = TableMatcher(match_type=match_type)
+
+    # The default gate is a Cosine similarity rather than a distance.
+    result, match_score = matcher.match_one_to_one(df_1, df_2)
+
+    assert list(result) == [1, 0]
+    assert np.allclose(match_score, 1 / np.sqrt(1.01))
+
+
+@pytest.mark.parametrize('match_type,gate',
+                         [('euclidean', 1e9), ('cosine_tree', -1), ('spherical', 180)])
+def test_match_one_to_one_same_as_dense_assignment(match_type, gate):
+    from scipy.optimize import linear_sum_assignment
+    from sklearn.metrics.pairwise import cosine_similarity, euclidean_distances
+
+    rng = np.random.default_rng(3)
+    df_1 = pd.DataFrame(rng.uniform(-60, 60, size=(40, 2)))
+    df_2 = pd.DataFrame(rng.uniform(-60, 60, size=(50, 2)))
+    matcher = TableMatcher(match_type=match_type)
+
+    result, match_score = matcher.match_one_to_one(df_1, df_2, gate=gate)
+
+    if match_type == 'cosine_tree':
+        cost = 1 - cosine_similarity(df_1, df_2)
+    elif match_type == 'spherical':
+        lon_1, lat_1 = np.deg2rad(df_1.to_numpy()).T[:, :, np.newaxis]
+        lon_2, lat_2 = np.deg2rad(df_2.to_numpy()).T[:, np.newaxis, :]
+        cos_separation = (np.sin(lat_1) * np.sin(lat_2) +
+                          np.cos(lat_1) * np.cos(lat_2) * np.cos(lon_1 - lon_2))
+        cost = np.rad2deg(np.arccos(np.clip(cos_separation, -1, 1)))
+    else:
+        cost = euclidean_distances(df_1, df_2)
+    rows, columns = linear_sum_assignment(cost)
+
+    assert (result >= 0).all()
+    assert len(set(result)) == len(df_1)
+    assert np.isclose(cost[np.arange(len(df_1)), result].sum(), cost[rows, columns].sum())
+
+
+def test_match_one_to_one_gate():
+    rng = np.random.default_rng(4)
+    df_1 = pd.DataFrame(rng.uniform(0, 100, size=(300, 2)))
+    df_2 = pd.DataFrame(rng.uniform(0, 100, size=(300, 2)))
+    matcher = TableMatcher(match_type='euclidean_tree')
+
+    result, match_score = matcher.match_one_to_one(df_1, df_2, gate=3)
+
+    matched = result >= 0
+    assert len(set(result[matched])) == matched.sum()
+    assert (match_score[matched] <= 3).all()
+    distances = np.linalg.norm(df_1.to_numpy()[matched] - df_2.to_numpy()[result[matched]], axis=1)
+    assert np.allclose(match_score[matched], distances)
+
+
+@pytest.mark.parametrize('match_type',
+                         ['euclidean', 'cosine', 'euclidean_tree', 'cosine_tree', 'spherical'])
+@pytest.mark.parametrize('memory_budget', [None, 2 * 8 * 60 * 7])
+def test_match_topk(match_type, memory_budget):
+    rng = np.random.default_rng(5)
+    df_1 = pd.DataFrame(rng.uniform(-60, 60, size=(30, 2)))
+    df_2 = pd.DataFrame(rng.uniform(-60, 60, size=(60, 2)))
+    matcher = TableMatcher(match_type=match_type, memory_budget=memory_budget)
+
+    result, match_score = matcher.match_topk(df_1, df_2, k=4)
+    best, best_score = getattr(matcher, f'match_{match_type}')(df_1, df_2)
+    _, all_scores = matcher.match_topk(df_1, df_2, k=100)
+
+    assert result.shape == match_score.shape == (30, 4)
+    assert all_scores.shape == (30, 60)
+    assert np.array_equal(result[:, 0], best)
+    assert np.allclose(match_score[:, 0], best_score)
+    assert np.allclose(match_score, all_scores[:, :4])
+    # Scores are ordered from the best match.
+    steps = np.diff(all_scores, axis=1)
+    if match_type.startswith('cosine'):
+        steps = -steps
+    assert (steps >= -1e-12).all()
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_match_grouped(n_jobs):
+    rng = np.random.default_rng(6)
+    df_1 = pd.DataFrame({'obs_date': rng.integers(0, 20, 300),
+                         'lon': rng.uniform(-60, 60, 300), 'lat': rng.uniform(-40, 40, 300)},
+                        index=np.arange(1000, 1300))
+    df_2 = pd.DataFrame({'date': rng.integers(0, 18, 200),
+                         'hgs_x': rng.uniform(-60, 60, 200), 'hgs_y': rng.uniform(-40, 40, 200)},
+                        index=[f'ar {i}' for i in range(200)])
+    matcher = TableMatcher(match_type='spherical')
+
+    matches = matcher.match_grouped(df_1, df_2, 'obs_date', 'date', threshold=180, n_jobs=n_jobs)
+
+    assert list(matches.index) == list(df_1.index)
+    assert list(matches.columns) == ['match', 'match score']
+    # Observation dates 18 and 19 have no rows to match with.
+    unmatched = df_1['obs_date'] >= 18
+    assert matches.loc[unmatched, 'match'].isna().all()
+    assert matches.loc[unmatched, 'match score'].isna().all()
+
+    for date, rows in df_1[~unmatched].groupby('obs_date'):
+        candidates = df_2[df_2['date'] == date]
+        result, match_score = matcher.match_spherical(rows[['lon', 'lat']],
+                                                      candidates[['hgs_x', 'hgs_y']])
+        assert list(matches.loc[rows.index, 'match']) == list(candidates.index[result])
+        assert np.allclose(matches.loc[rows.index, 'match score'], match_score)
+
+
+def test_match_grouped_missing_group(df_1, df_2):
+    with pytest.raises(SunpyUserWarning):
+        TableMatcher().match_grouped(df_1, df_2, 'obs_date')
+
+
+@pytest.mark.parametrize('match_type',
+                         ['euclidean', 'cosine', 'euclidean_tree', 'cosine_tree', 'spherical'])
+def test_match_topk_empty(match_type):
+    df_1 = pd.DataFrame({'lon': [10.0, 20.0, 30.0], 'lat': [0.0, 5.0, -5.0]})
+    matcher = TableMatcher(match_type=match_type)
+
+    result, match_score = matcher.match_topk(df_1, df_1.iloc[:0], k=3)
+    assert result.shape == match_score.shape == (3, 0)
+
+    result, match_score = matcher.match_topk(df_1.iloc[:0], df_1, k=2)
+    assert result.shape == match_score.shape == (0, 2)
+
+
+@pytest.mark.parametrize('index', [np.arange(2000, 2004), ['ar a', 'ar b', 'ar c', 'ar d']])
+def test_match_grouped_labels(index):
+    df_1 = pd.DataFrame({'obs_date': [0, 1, 1, 2], 'x': [0.0, 1.0, 5.0, 3.0]}, index=[7, 7, 8, 9])
+    df_2 = pd.DataFrame({'obs_date': [0, 1, 1, 3], 'x': [0.5, 4.0, 1.2, 3.0]}, index=index)
+    matcher = TableMatcher(match_type='euclidean_tree')
+
+    matches = matcher.match_grouped(df_1, df_2, 'obs_date', threshold=10)
+    matched = matches['match'].notna()
+
+    assert list(matched) == [True, True, True, False]
+    assert list(matches.loc[matched, 'match']) == [index[0], index[2], index[1]]
+    assert df_2.loc[matches.loc[matched, 'match'], 'x'].tolist() == [0.5, 1.2, 4.0]
+    if df_2.index.dtype.kind == 'i':
+        assert matches['match'].dtype == 'Int64'
+
+    matches = matcher.match_grouped(df_1.iloc[:3], df_2, 'obs_date', threshold=10)
+    assert matches['match'].dtype == df_2.index.dtype
+
+
+def test_match_grouped_verify_positions():
+    df_1 = pd.DataFrame({'obs_date': [2, 0, 1], 'x': [3.0, 0.0, 9.0]})
+    df_2 = pd.DataFrame({'obs_date': [0, 1], 'x': [0.5, 1.0]})
+    matcher = TableMatcher(match_type='euclidean_tree')
+
+    with pytest.warns(SunpyUserWarning) as record:
+        matcher.match_grouped(df_1, df_2, 'obs_date', threshold=1)
+
+    # The first row has no group to match with, and the last row is far from its match.
+    messages = [str(warning.message).strip() for warning in record
+                if issubclass(warning.category, SunpyUserWarning)]
+    assert messages == ['Match at Index 2 is likely to be incorrect']